@@ -0,0 +1,164 @@
+"""Benchmark suite of the detectors, the cleaning step and the file loaders
+
+Times calcs.calculations, calcs.kalman_filters, calcs.rolling_mad, calcs.clean_data and the loaders used by
+load_file on synthetic series, records the peak memory of every case and writes everything
+to a JSON file. With --baseline, the run is compared against an earlier result file and the
+exit code is 1 if any case got slower than --threshold times its baseline.
+
+Examples:
+    python bench.py --output bench_results.json
+    python bench.py --sizes 1e3 1e5 1e7 --lookbacks 14 500 --output new.json --baseline bench_results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import calcs
+import loaders
+
+
+def synthetic_series(n, nan_density=0.0, zero_density=0.0, seed=0):
+    """Random walk price series with a few spikes and the requested share of NaN and zero values"""
+    rng = np.random.default_rng(seed)
+    data = 1000 + np.cumsum(rng.normal(0, 1, n))
+    spikes = rng.integers(0, n, max(n // 1000, 1))
+    data[spikes] += rng.normal(0, 50, len(spikes))
+    data[rng.random(n) < nan_density] = np.nan
+    data[rng.random(n) < zero_density] = 0
+    return data
+
+def measure(function, repeat=3):
+    """Best wall time of repeat calls and peak traced memory of one extra call"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return _measure(function, repeat)
+
+def _measure(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # Memory is measured separately, tracemalloc slows the allocations down
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(times), peak
+
+def bench_cases(sizes, lookbacks, densities, file_sizes, directory):
+    """Yields (name, params, function) for every benchmark case"""
+    for n in sizes:
+        data = synthetic_series(n)
+
+        for lookback in lookbacks:
+            yield "calculations", {"n": n, "lookback": lookback}, lambda data=data, lookback=lookback: calcs.calculations(data, lookback, 2)
+
+        yield "kalman_filters", {"n": n}, lambda data=data: calcs.kalman_filters(data, 3, 1)
+
+        for lookback in lookbacks:
+            yield "rolling_mad", {"n": n, "lookback": lookback}, lambda data=data, lookback=lookback: calcs.rolling_mad(data, lookback, 3)
+
+        for nan_density, zero_density in densities:
+            dirty = synthetic_series(n, nan_density, zero_density)
+            params = {"n": n, "nan_density": nan_density, "zero_density": zero_density}
+            yield "clean_data", params, lambda dirty=dirty: calcs.clean_data(dirty, keep_zeros=False)
+
+    for n in file_sizes:
+        data = synthetic_series(n, nan_density=0.001)
+
+        npy_path = os.path.join(directory, f"bench_{n}.npy")
+        np.save(npy_path, np.column_stack((np.arange(n), data)))
+        yield "load_npy", {"n": n}, lambda path=npy_path: loaders.load_prices(path)
+
+        csv_path = os.path.join(directory, f"bench_{n}.csv")
+        with open(csv_path, "w") as f:
+            f.write("Index,Close\n")
+            np.savetxt(f, np.column_stack((np.arange(n), data)), delimiter=",", fmt=["%d", "%.6f"])
+        yield "load_csv", {"n": n}, lambda path=csv_path: loaders.load_prices(path)
+
+def run(sizes, lookbacks, densities, file_sizes, repeat=3, verbose=True):
+    """Runs all cases and returns the result document"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, params, function in bench_cases(sizes, lookbacks, densities, file_sizes, directory):
+            seconds, peak = measure(function, repeat)
+            results.append({"name": name, "params": params, "seconds": seconds, "peak_bytes": peak})
+            if verbose:
+                print(f"{name:15s} {json.dumps(params):60s} {seconds * 1000:10.2f} ms {peak / 2**20:10.1f} MiB")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "kalman_backend": calcs.KALMAN_BACKEND,
+            "median_backend": calcs.MEDIAN_BACKEND,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def _case_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+def compare(current, baseline, threshold):
+    """Cases of current that take more than threshold times their baseline time\n
+    **returns:**\n
+    list of (name, params, baseline seconds, current seconds)\n
+    """
+    previous = {_case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(_case_key(result))
+        if old is not None and result["seconds"] > threshold * old["seconds"]:
+            regressions.append((result["name"], result["params"], old["seconds"], result["seconds"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the detectors, cleaning and loaders")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e3, 1e4, 1e5, 1e6], help="series lengths (up to 1e8)")
+    parser.add_argument("--lookbacks", type=int, nargs="+", default=[14, 200])
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.0, 0.0, 0.01, 0.01], help="pairs of NaN and zero densities")
+    parser.add_argument("--file-sizes", type=float, nargs="+", default=[1e4, 1e6], help="rows of the generated .npy/.csv files")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier result file to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown factor against the baseline")
+    options = parser.parse_args(argv)
+
+    densities = list(zip(options.densities[::2], options.densities[1::2]))
+    current = run(
+        [int(n) for n in options.sizes],
+        options.lookbacks,
+        densities,
+        [int(n) for n in options.file_sizes],
+        options.repeat,
+    )
+
+    with open(options.output, "w") as f:
+        json.dump(current, f, indent=1)
+    print(f"Results written to {options.output}")
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, options.threshold)
+        for name, params, old, new in regressions:
+            print(f"REGRESSION {name} {json.dumps(params)}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,77 +1,488 @@
+import importlib.util
+import math
+import threading
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
-def calculations(data:np, lookback_period=14, std_multiplier=2):
+#numba is optional, without it the Kalman recursion runs in pure Python. Importing it takes longer
+#than the rest of the program, so it is only imported when a compiled kernel is first used (_load_jit)
+_HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
+#Stands for a compiled kernel that _load_jit hasn't built yet
+_PENDING = object()
+_jit_lock = threading.Lock()
+
+#Minimum number of window ends sharing one pivot in the rolling engine
+_BLOCK_SIZE = 256
+
+#Approximate number of points processed per vectorized pass (bounds the temporaries)
+_PASS_SIZE = 1 << 20
+
+#Windows whose variance is this small relative to the prefix sums are recomputed exactly
+_ILL_CONDITIONED = 1e-6
+
+#Points closer than this (relative) to a bound may be on either side of it, by rounding of the prefix sums
+_TIE_TOLERANCE = 1e-9
+
+def _constant_window_stats(values, lookback_period):
+    """Mean and std of windows made of lookback_period copies of each value, computed the same way
+    np.sum and np.std do, so ties on flat stretches are labeled like the reference loop\n
+    """
+    uniq, inverse = np.unique(values, return_inverse=True)
+    rows = np.repeat(uniq, lookback_period).reshape(-1, lookback_period)
+    mean = np.sum(rows, axis=1) / lookback_period
+    std = np.std(rows, axis=1)
+    return mean[inverse], std[inverse]
+
+def _exact_window_stats(windows, where, lookback_period):
+    """Mean and std of the selected windows exactly like np.sum and np.std do\n
+    **args:**\n
+    windows = sliding window view whose last axis is the window (np)\n
+    where = boolean selection over the leading axes of windows (np)\n
+    """
+    index = np.nonzero(where)
+    mean = np.empty(len(index[0]))
+    std = np.empty(len(index[0]))
+    step = max(1, _PASS_SIZE // lookback_period)
+    for i in range(0, len(mean), step):
+        rows = np.asarray(windows[tuple(axis[i:i + step] for axis in index)], dtype=float)
+        mean[i:i + step] = np.sum(rows, axis=1) / lookback_period
+        std[i:i + step] = np.std(rows, axis=1)
+    return mean, std
+
+def _block_mean_std(blocks, lookback_period):
+    """Rolling mean/std inside a stack of blocks of shape (n_blocks, block + lookback_period, ...)\n
+    The values of each block are centred on their own pivot before the prefix sums are taken,
+    which keeps the cancellation error bound by the local price range instead of the price level.
+    Windows where the running sums are still ill-conditioned (e.g. a spike earlier in the block
+    dwarfs the window's own spread) fall back to an exact two-pass computation.\n
+    """
+    block = blocks.shape[1] - lookback_period
+
+    #Pivot = mean of the finite values of the block
+    finite = np.isfinite(blocks)
+    pivot = np.where(finite, blocks, 0).sum(axis=1, keepdims=True) / np.maximum(finite.sum(axis=1, keepdims=True), 1)
+
+    #NaN/inf are left out of the sums and counted separately so they only spoil their own windows
+    centred = np.where(finite, blocks - pivot, 0.0)
+    zero = np.zeros((blocks.shape[0], 1) + blocks.shape[2:])
+    sum1 = np.concatenate((zero, np.cumsum(centred, axis=1)), axis=1)
+    sum2 = np.concatenate((zero, np.cumsum(centred * centred, axis=1)), axis=1)
+    bad = np.concatenate((zero, np.cumsum(~finite, axis=1)), axis=1)
+    changes = np.concatenate((zero, np.cumsum(blocks[:, 1:] != blocks[:, :-1], axis=1)), axis=1)
+
+    #Window j of a block covers blocks[:, j:j+lookback_period]
+    win1 = (sum1[:, lookback_period:lookback_period + block] - sum1[:, :block]) / lookback_period
+    win2 = (sum2[:, lookback_period:lookback_period + block] - sum2[:, :block]) / lookback_period
+    invalid = bad[:, lookback_period:lookback_period + block] != bad[:, :block]
+    constant = changes[:, lookback_period - 1:lookback_period - 1 + block] == changes[:, :block]
+
+    mean = pivot + win1
+    var = win2 - win1 * win1
+    std = np.sqrt(np.maximum(var, 0.0))
+    if np.any(constant):
+        mean[constant], std[constant] = _constant_window_stats(blocks[:, :block][constant], lookback_period)
+
+    ill = (var <= _ILL_CONDITIONED * sum2[:, lookback_period:lookback_period + block] / lookback_period) & ~constant & ~invalid
+    if np.any(ill):
+        windows = sliding_window_view(blocks, lookback_period, axis=1)[:, :block]
+        mean[ill], std[ill] = _exact_window_stats(windows, ill, lookback_period)
+    mean[invalid] = np.nan
+    std[invalid] = np.nan
+
+    return mean, std
+
+def _rolling_mean_std(data:np, lookback_period, start, stop, progress=None):
+    """Rolling mean and population std of the windows data[i-lookback_period:i] for i in [start, stop)\n
+    Works along axis 0, so a 2 dimensional (time x series) array is handled column-wise.
+    Blocks are anchored at lookback_period and never depend on start/stop, so any sub-range
+    gives bit-for-bit the same values as the full range.\n
+    **args:**\n
+    data = 1 or 2 dimensional float numpy array, float32 data gives float32 results (np)\n
+    lookback_period = window length (int)\n
+    start, stop = range of window end indices to compute, start >= lookback_period (int)\n
+    progress = optional callback(done, total) called after every pass, may raise to cancel (callable)\n
+    """
+    tail = data.shape[1:]
+    mean = np.empty((max(stop - start, 0),) + tail, dtype=data.dtype)
+    std = np.empty((max(stop - start, 0),) + tail, dtype=data.dtype)
+    if stop <= start:
+        return mean, std
+
+    block = max(lookback_period, _BLOCK_SIZE)
+    first = lookback_period + ((start - lookback_period) // block) * block
+    #A pass covers about _PASS_SIZE points of all the series together
+    per_pass = max(1, _PASS_SIZE // (block * math.prod(tail)))
+
+    for pass_start in range(first, stop, block * per_pass):
+        pass_stop = min(pass_start + block * per_pass, stop)
+        n_blocks = -(-(pass_stop - pass_start) // block)
+
+        #Every block carries lookback_period points of history in front of it
+        #The sums always run in float64, only one pass is converted at a time
+        seg = np.asarray(data[pass_start - lookback_period:pass_start + n_blocks * block], dtype=float)
+        pad = n_blocks * block + lookback_period - len(seg)
+        if pad:
+            seg = np.concatenate((seg, np.full((pad,) + tail, np.nan)))
+        blocks = np.moveaxis(sliding_window_view(seg, block + lookback_period, axis=0)[::block], -1, 1)
+
+        blk_mean, blk_std = _block_mean_std(blocks, lookback_period)
+        blk_mean = blk_mean.reshape((-1,) + tail)
+        blk_std = blk_std.reshape((-1,) + tail)
+
+        lo = max(start, pass_start)
+        mean[lo - start:pass_stop - start] = blk_mean[lo - pass_start:pass_stop - pass_start]
+        std[lo - start:pass_stop - start] = blk_std[lo - pass_start:pass_stop - pass_start]
+
+        if progress is not None:
+            progress(pass_stop - start, stop - start)
+
+    return mean, std
+
+def _settle_ties(data, lookback_period, start, stop, upper_bound, lower_bound, std_multiplier):
+    """Recomputes the bounds of the points in [start, stop) that sit on a band within rounding error\n
+    Tick-rounded prices land exactly on a bound all the time, and the last bit of the rolling sums
+    decides their label. Those windows get the mean and std of np.sum and np.std, like the reference
+    loop, so they are labeled the same. Works along axis 0 and changes the bounds in place.\n
+    """
+    values = data[start:stop]
+    upper = upper_bound[start:stop]
+    lower = lower_bound[start:stop]
+    tolerance = _TIE_TOLERANCE * (np.abs(values) + (upper - lower))
+    near = (np.abs(values - upper) <= tolerance) | (np.abs(values - lower) <= tolerance)
+    if np.any(near):
+        windows = sliding_window_view(data, lookback_period, axis=0)[start - lookback_period:stop - lookback_period]
+        mean, std_now = _exact_window_stats(windows, near, lookback_period)
+        upper[near] = mean + std_now*std_multiplier
+        lower[near] = mean - std_now*std_multiplier
+
+def _label_from_stats(data, lookback_period, mean, std_now, std_multiplier, exact_ties=False):
+    """Bounds and rising-edge labels from the rolling statistics of _rolling_mean_std\n
+    Everything works along axis 0, so it serves calculations and batch_calculations alike.
+    With exact_ties the bounds are population std bands, settled with _settle_ties.\n
+    """
+    #Definition of upper and lower bounds of the buffer zone, in the dtype of data
+    upper_bound = np.zeros(data.shape, dtype=data.dtype)
+    lower_bound = np.zeros(data.shape, dtype=data.dtype)
+
+    #Definition of the label matrix (one byte per point)
+    outlier_index = np.zeros(data.shape, dtype=bool)
+
+    #Calculate bounds of buffer zone
+    upper_bound[lookback_period:] = mean + std_now*std_multiplier
+    lower_bound[lookback_period:] = mean - std_now*std_multiplier
+    if exact_ties:
+        _settle_ties(data, lookback_period, lookback_period, len(data), upper_bound, lower_bound, std_multiplier)
+
+    #Criteria for outlier labeling
+    outlier_index[lookback_period:] = (data[lookback_period:] >= upper_bound[lookback_period:]) | (data[lookback_period:] <= lower_bound[lookback_period:])
+
+    # 2. Keep only the rising edges (a flag whose previous point isn't flagged)
+    outlier_index[1:] &= ~outlier_index[:-1].copy()
+
+    return outlier_index, upper_bound, lower_bound
+
+#Candidate windows of the "auto" lookback
+AUTO_LOOKBACKS = (5, 7, 10, 14, 20, 30, 50, 75, 100, 150, 200)
+
+#Squared z-scores above this count as this much in the auto lookback score, so spikes don't pick the window
+_AUTO_Z2_CLIP = 9.0
+
+def _lookback_scores(data, candidates, edges):
+    """Mean one-step predictive score of every candidate window in every regime\n
+    For each point, the mean/std of the candidate window ending just before it predict the point;
+    the score is log(std) + min(z^2, clip)/2 (a Gaussian negative log-likelihood with clipped tails),
+    lower is better: too short windows give noisy, too narrow bands, too long ones lag the level.
+    All candidates are read from one table of prefix sums and scored on the same points.\n
+    **returns:**\n
+    scores (candidates x regimes, NaN where a regime has no scored point) (np)\n
+    """
+    n = len(data)
+    finite = np.isfinite(data)
+    centred = np.where(finite, data - (np.mean(data[finite]) if finite.any() else 0.0), 0.0)
+    sum1 = np.concatenate(([0.0], np.cumsum(centred)))
+    sum2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+    bad = np.concatenate(([0], np.cumsum(~finite)))
+    tiny = 1e-12 * max(sum2[-1] / max(n, 1), 1e-300)
+
+    first = max(candidates)
+    ends = np.arange(first, n)
+    regimes = np.searchsorted(edges, ends, side="right") - 1
+
+    scores = np.full((len(candidates), len(edges)), np.nan)
+    for k, lookback in enumerate(candidates):
+        mean = (sum1[ends] - sum1[ends - lookback]) / lookback
+        var = (sum2[ends] - sum2[ends - lookback]) / lookback - mean * mean
+        usable = (bad[ends] == bad[ends - lookback]) & finite[ends] & (var > tiny)
+
+        z2 = (centred[ends] - mean) ** 2 / np.where(usable, var, 1.0)
+        score = 0.5 * np.log(np.where(usable, var, 1.0)) + 0.5 * np.minimum(z2, _AUTO_Z2_CLIP)
+
+        total = np.bincount(regimes[usable], weights=score[usable], minlength=len(edges))
+        count = np.bincount(regimes[usable], minlength=len(edges))
+        scores[k] = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    return scores
+
+def select_lookback(data:np, candidates=AUTO_LOOKBACKS, regime_length=None):
+    """Picks the lookback of the "auto" mode from candidates, for the whole series or per regime\n
+    Candidates longer than a quarter of the series are skipped. A regime without any scored point
+    (e.g. the start of the series) takes the choice of the whole series.\n
+    **args:**\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    candidates = candidate windows (list of int)\n
+    regime_length = points per regime, one regime for the whole series if None (int)\n
+    **returns:**\n
+    lookback per regime (np int), start index of every regime (np int)\n
+    """
+    data = np.asarray(data, dtype=float).reshape(-1)
+    n = len(data)
+    edges = np.arange(0, max(n, 1), regime_length) if regime_length else np.array([0])
+
+    candidates = sorted(set(int(c) for c in candidates))
+    usable = [c for c in candidates if c <= n // 4]
+    if len(usable) < 2:
+        return np.full(len(edges), usable[0] if usable else candidates[0]), edges
+
+    scores = _lookback_scores(data, usable, edges)
+    overall = _lookback_scores(data, usable, np.array([0]))[:, 0]
+    fallback = usable[int(np.nanargmin(overall))] if np.isfinite(overall).any() else usable[0]
+
+    lookbacks = np.full(len(edges), fallback)
+    scored = np.isfinite(scores).any(axis=0)
+    lookbacks[scored] = np.array(usable)[np.nanargmin(scores[:, scored], axis=0)]
+    return lookbacks, edges
+
+def _regime_calculations(data, lookbacks, edges, std_multiplier, progress=None):
+    """calculations() with its own lookback in every regime [edges[r], edges[r+1])\n
+    The windows reach back into the previous regime, so only the bounds change at a regime edge.\n
+    """
+    n = len(data)
+    upper_bound = np.zeros(n, dtype=data.dtype)
+    lower_bound = np.zeros(n, dtype=data.dtype)
+    flags = np.zeros(n, dtype=bool)
+
+    stops = np.append(edges[1:], n)
+    for r, (start, stop, lookback) in enumerate(zip(edges, stops, lookbacks)):
+        first = max(start, lookback)
+        if first < stop:
+            mean, std_now = _rolling_mean_std(data, lookback, first, stop)
+            upper_bound[first:stop] = mean + std_now*std_multiplier
+            lower_bound[first:stop] = mean - std_now*std_multiplier
+            _settle_ties(data, lookback, first, stop, upper_bound, lower_bound, std_multiplier)
+            flags[first:stop] = (data[first:stop] >= upper_bound[first:stop]) | (data[first:stop] <= lower_bound[first:stop])
+        # A later regime shorter than its own lookback has no complete window at its start
+        if start > 0 and start < first:
+            upper_bound[start:first] = np.nan
+            lower_bound[start:first] = np.nan
+        if progress is not None:
+            progress(r + 1, len(edges))
+
+    #Warm-up of the first regime, which may end before its lookback is complete
+    head = lookbacks[0]
+    upper_bound[0:min(head, stops[0])] = np.sum(data[:head])/head
+    lower_bound[0:min(head, stops[0])] = np.sum(data[:head])/head
+
+    #Rising edges over the whole series, so a run crossing a regime edge is counted once
+    flags[1:] &= ~flags[:-1].copy()
+
+    return flags, upper_bound, lower_bound
+
+def calculations(data:np, lookback_period=14, std_multiplier=2, progress=None, mask=None, dtype=np.float64, regime_length=None):
     """Labeling of dataset as outliers and normal values where 0 are normal values and 1 are outliers\n
     **args:**\n
     data = 1 dimensional numpy array of time series data (np)\n
-    lookback_period = number of previous datapoints with which the std calculation is made (int)\n
+    lookback_period = number of previous datapoints with which the std calculation is made, or "auto" to pick it with select_lookback (int/str)\n
     std_multiplier = Multiplication value of std. The higher it is the less sensitive the outliers get (float/int)\n
+    progress = optional callback(done, total), may raise to cancel the run (callable)\n
+    mask = optional validity mask (see validity_mask), the detection then skips the invalid points (np)\n
+    dtype = np.float32 halves the memory of the bounds, the rolling sums still run in float64 (dtype)\n
+    regime_length = with "auto", pick a lookback for every regime_length points instead of one for the series (int)\n
     """
-    #Definition of upper and lower bounds of the buffer zone
-    upper_bound = np.zeros(len(data))
-    lower_bound = np.zeros(len(data))
+    if mask is not None:
+        return _masked(calculations, data, mask, lookback_period=lookback_period, std_multiplier=std_multiplier, progress=progress, dtype=dtype, regime_length=regime_length)
+
+    data = np.asarray(data, dtype=dtype).reshape(-1)
+
+    if lookback_period == "auto":
+        lookbacks, edges = select_lookback(data, regime_length=regime_length)
+        if len(lookbacks) > 1:
+            outlier_index, upper_bound, lower_bound = _regime_calculations(data, lookbacks, edges, std_multiplier, progress)
+            return outlier_index, upper_bound, lower_bound, True
+        lookback_period = int(lookbacks[0])
 
-    #Definition of the label matrix
-    outlier_index = np.zeros(len(data))
+    #Rolling statistics of the previous lookback_period points, for every point at once
+    mean, std_now = _rolling_mean_std(data, lookback_period, lookback_period, len(data), progress)
+
+    outlier_index, upper_bound, lower_bound = _label_from_stats(data, lookback_period, mean, std_now, std_multiplier, exact_ties=True)
 
     upper_bound[0:lookback_period] = np.sum(data[:lookback_period])/lookback_period
     lower_bound[0:lookback_period] = np.sum(data[:lookback_period])/lookback_period
-    
-    #Iterative process for calculations
-    for i in range(lookback_period,len(data)):
 
-        #Calculate standard deviation for current point
-        std_now = np.std(data[i-lookback_period:i])
+    boundaries = True
+
+    return outlier_index, upper_bound, lower_bound, boundaries
+
+def stack_series(series):
+    """Stacks named 1 dimensional series of possibly different lengths into one (time x series) matrix\n
+    Shorter series are padded with NaN at the end. Columns follow the order of the dict.\n
+    **args:**\n
+    series = dict of name -> 1 dimensional numpy array (dict)\n
+    **returns:**\n
+    matrix (np), names (list), lengths (np)\n
+    """
+    names = list(series)
+    columns = [np.asarray(series[name], dtype=float).reshape(-1) for name in names]
+    lengths = np.array([len(col) for col in columns], dtype=int)
+
+    matrix = np.full((lengths.max(initial=0), len(columns)), np.nan)
+    for k, col in enumerate(columns):
+        matrix[:len(col), k] = col
 
-        #Calculate bounds of buffer zone
-        upper_bound[i] = (np.sum(data[i-lookback_period:i])/lookback_period) + std_now*std_multiplier
-        lower_bound[i] = (np.sum(data[i-lookback_period:i])/lookback_period) - std_now*std_multiplier
+    return matrix, names, lengths
 
-        #Criteria for outlier labeling
-        if data[i] >= upper_bound[i] or data[i] <= lower_bound[i]:
-            outlier_index[i] = 1
+def _as_matrix(data, dtype=np.float64):
+    """2 dimensional (time x series) float matrix and per-column lengths for the batch functions"""
+    if isinstance(data, dict):
+        matrix, _, lengths = stack_series(data)
+        return matrix.astype(dtype, copy=False), lengths
 
-    diff = np.diff(outlier_index, prepend=0)
+    matrix = np.asarray(data, dtype=dtype)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+    return matrix, np.full(matrix.shape[1], matrix.shape[0])
 
-    # 2. Keep only where the difference is exactly 1 (the rising edge)
-    outlier_index = (diff == 1)
+def batch_calculations(data, lookback_period=14, std_multiplier=2, dtype=np.float64):
+    """calculations() for many series at once, column by column in one vectorized pass\n
+    **args:**\n
+    data = 2 dimensional (time x series) numpy array, or dict of name -> 1 dimensional series (np/dict)\n
+    lookback_period = number of previous datapoints with which the std calculation is made (int)\n
+    std_multiplier = Multiplication value of std. The higher it is the less sensitive the outliers get (float/int)\n
+    dtype = dtype of the data and bounds, see calculations() (dtype)\n
+    With lookback_period="auto" every series gets its own lookback (select_lookback), and the series
+    sharing a lookback are computed together.\n
+    **returns:**\n
+    Same as calculations() with (time x series) arrays. Past the end of a shorter series the bounds are NaN
+    and the labels are 0.\n
+    """
+    data, lengths = _as_matrix(data, dtype)
+
+    if lookback_period == "auto":
+        chosen = np.array([select_lookback(data[:length, k])[0][0] for k, length in enumerate(lengths)], dtype=int)
+        outlier_index = np.zeros(data.shape, dtype=bool)
+        upper_bound = np.empty(data.shape, dtype=data.dtype)
+        lower_bound = np.empty(data.shape, dtype=data.dtype)
+        for lookback in np.unique(chosen):
+            columns = np.flatnonzero(chosen == lookback)
+            labels, upper, lower, _ = batch_calculations(data[:, columns], int(lookback), std_multiplier, dtype)
+            # Padding of the shorter series is restored below
+            outlier_index[:, columns], upper_bound[:, columns], lower_bound[:, columns] = labels, upper, lower
+        padding = np.arange(data.shape[0])[:, None] >= lengths[None, :]
+        outlier_index[padding] = False
+        upper_bound[padding] = np.nan
+        lower_bound[padding] = np.nan
+        return outlier_index, upper_bound, lower_bound, True
+    n_rows = data.shape[0]
+    padding = np.arange(n_rows)[:, None] >= lengths[None, :]
+
+    #Rolling statistics of every column at once
+    mean, std_now = _rolling_mean_std(data, lookback_period, lookback_period, n_rows)
+
+    outlier_index, upper_bound, lower_bound = _label_from_stats(data, lookback_period, mean, std_now, std_multiplier, exact_ties=True)
+
+    head = np.sum(np.where(padding[:lookback_period], 0.0, data[:lookback_period].astype(float)), axis=0)/lookback_period
+    upper_bound[0:lookback_period] = head
+    lower_bound[0:lookback_period] = head
+
+    upper_bound[padding] = np.nan
+    lower_bound[padding] = np.nan
 
     boundaries = True
 
     return outlier_index, upper_bound, lower_bound, boundaries
 
-def clean_data(data:np,keep_zeros):
+def validity_mask(data:np, keep_zeros=False):
+    """Rows of data that survive cleaning, computed in one vectorized pass without copying the data\n
+    A row is invalid if it holds a NaN, or a 0 when keep_zeros is False.\n
+    **args:**\n
+    data = 1 or 2 dimensional numpy array (np)\n
+    keep_zeros = keep rows containing 0 (bool)\n
+    **returns:**\n
+    mask, True for the valid rows (np)\n
+    counts, dict with the number of "nan", "zero" and "invalid" rows (dict)\n
+    """
+    data = np.asarray(data)
+    values = data.reshape(len(data), -1)
+
+    nan_rows = np.isnan(values).any(axis=1)
+    mask = ~nan_rows
+    counts = {"nan": int(np.count_nonzero(nan_rows)), "zero": 0}
+
+    #Rows with a NaN are only counted as NaN rows
+    if keep_zeros==False:
+        zero_rows = (values == 0).any(axis=1) & mask
+        mask &= ~zero_rows
+        counts["zero"] = int(np.count_nonzero(zero_rows))
 
-    #Conversion to pandas DataFrame
-    my_data = pd.DataFrame(data)
+    counts["invalid"] = counts["nan"] + counts["zero"]
 
-    my_data_len_one = len(my_data)
+    return mask, counts
 
-    #Check for NaN
-    my_data_len = len(my_data)
-    my_data = my_data.dropna()
-    print(f"Deleted data from NaN values: {my_data_len-len(my_data)}\n")
+def clean_data(data:np, keep_zeros=False, in_place=False):
+    """Removes the rows holding NaN (and 0 unless keep_zeros) from data\n
+    **args:**\n
+    data = 1 or 2 dimensional numpy array (np)\n
+    keep_zeros = keep rows containing 0 (bool)\n
+    in_place = compact the valid rows at the start of data itself and return a view of them (bool)\n
+    **returns:**\n
+    cleaned data (np), number of removed rows (int)\n
+    """
+    data = np.asarray(data)
 
-    #Check for 0
+    mask, counts = validity_mask(data, keep_zeros=keep_zeros)
+    print(f"Deleted data from NaN values: {counts['nan']}\n")
     if keep_zeros==False:
-        my_data_len = len(my_data)
-        no_zeros_mask = (my_data != 0).all(axis=1)
-        my_data = my_data[no_zeros_mask]
-        print(f"Deleted data from 0 values: {my_data_len-len(my_data)}\n")
+        print(f"Deleted data from 0 values: {counts['zero']}\n")
 
-    return my_data.to_numpy(), my_data_len_one-my_data_len
+    if counts["invalid"] == 0:
+        return data, 0
 
+    if in_place:
+        n_valid = len(data) - counts["invalid"]
+        data[:n_valid] = data[mask]
+        return data[:n_valid], counts["invalid"]
 
-def kalman_filters(data:np, outlier_threshold, measurement_noise=1.0):
+    return data[mask], counts["invalid"]
 
-    x_est = data[0]
-    cov = 1.0
+def _masked(detector, data, mask, **params):
+    """Runs detector on the valid points of data only and spreads its arrays back to the full length\n
+    Invalid points get label 0 and NaN bounds. The windows (and the Kalman recursion) run over the
+    previous valid points, as if the invalid ones had been deleted, so the valid points are gathered
+    into one compact copy; without invalid points the data is used as is.\n
+    """
+    data = np.asarray(data).reshape(-1)
+    mask = np.asarray(mask, dtype=bool).reshape(-1)
+    if mask.all():
+        return detector(data, **params)
 
-    process_noise = measurement_noise/10
+    result = detector(data[mask], **params)
+
+    spread = []
+    for i, values in enumerate(result):
+        if isinstance(values, np.ndarray):
+            full = np.zeros(len(data), dtype=values.dtype) if i == 0 else np.full(len(data), np.nan, dtype=values.dtype)
+            full[mask] = values
+            values = full
+        spread.append(values)
 
-    outlier_index = np.zeros(len(data))
+    return tuple(spread)
 
+def _kalman_kernel(data, outlier_threshold, measurement_noise, x_est, cov, outlier_index):
+    """Predict/update/outlier-gating recursion of kalman_filters over data, writing 1 into
+    outlier_index for every outlier. Returns the final (x_est, cov) so a run can be continued.\n
+    Plain scalar code so numba can compile it; the pure Python path feeds it lists of floats.\n
+    """
+    process_noise = measurement_noise/10
 
     for z in range(len(data)):
         x_pred = x_est
@@ -80,8 +491,8 @@ def kalman_filters(data:np, outlier_threshold, measurement_noise=1.0):
         dif = data[z] - x_pred
         dif_cov = cov_pred + measurement_noise
 
-        std = np.sqrt(dif_cov)
-        z_score = np.abs(dif/std)
+        std = math.sqrt(dif_cov)
+        z_score = abs(dif/std)
 
         if z_score >= outlier_threshold:
             outlier_index[z] = 1
@@ -96,6 +507,476 @@ def kalman_filters(data:np, outlier_threshold, measurement_noise=1.0):
         x_est = x_new
         cov = cov_new
 
+    return x_est, cov
+
+#Compiled backend for the Kalman recursion, selected at import when numba is installed
+_kalman_kernel_jit = _PENDING if _HAVE_NUMBA else None
+KALMAN_BACKEND = "numba" if _HAVE_NUMBA else "python"
+
+def _run_kalman(data, outlier_threshold, measurement_noise, x_est, cov, outlier_index):
+    """Runs the Kalman recursion on the best available backend and returns the final (x_est, cov)"""
+    if _kalman_kernel_jit is _PENDING:
+        _load_jit()
+    if _kalman_kernel_jit is not None:
+        return _kalman_kernel_jit(data, float(outlier_threshold), float(measurement_noise), float(x_est), float(cov), outlier_index)
+
+    flags = [0] * len(data)
+    x_est, cov = _kalman_kernel(data.tolist(), float(outlier_threshold), float(measurement_noise), float(x_est), float(cov), flags)
+    outlier_index[np.flatnonzero(flags)] = 1
+    return x_est, cov
+
+def _kalman_input(data):
+    """Contiguous 1 dimensional float data for the recursion, float32 is used as is (no float64 copy)"""
+    data = np.asarray(data).reshape(-1)
+    if data.dtype != np.float32:
+        data = data.astype(float, copy=False)
+    return np.ascontiguousarray(data)
+
+def kalman_filters(data:np, outlier_threshold, measurement_noise=1.0, progress=None, mask=None):
+    """Labeling of dataset as outliers and normal values with a scalar Kalman filter\n
+    **args:**\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    outlier_threshold = z-score of the innovation from which a point is an outlier (float)\n
+    measurement_noise = variance of the measurement noise, the process noise is a tenth of it (float/int)\n
+    progress = optional callback(done, total), may raise to cancel the run (callable)\n
+    mask = optional validity mask (see validity_mask), the detection then skips the invalid points (np)\n
+    **returns:**\n
+    0/1 labels (np bool), boundaries\n
+    """
+    if mask is not None:
+        return _masked(kalman_filters, data, mask, outlier_threshold=outlier_threshold, measurement_noise=measurement_noise, progress=progress)
+
+    data = _kalman_input(data)
+
+    #0/1 labels, one byte per point, written as uint8 by the kernels and returned as bool like every detector
+    outlier_index = np.zeros(len(data), dtype=np.uint8)
+
+    if len(data) > 0 and progress is None:
+        _run_kalman(data, outlier_threshold, measurement_noise, data[0], 1.0, outlier_index)
+
+    elif len(data) > 0:
+        #Same recursion in passes, carrying the filter state over, to report progress in between
+        x_est, cov = float(data[0]), 1.0
+        for start in range(0, len(data), _PASS_SIZE):
+            stop = min(start + _PASS_SIZE, len(data))
+            x_est, cov = _run_kalman(data[start:stop], outlier_threshold, measurement_noise, x_est, cov, outlier_index[start:stop])
+            progress(stop, len(data))
+
     boundaries = False
 
-    return outlier_index,  boundaries
\ No newline at end of file
+    return outlier_index.view(bool),  boundaries
+
+def _kalman_lockstep(data, mask, outlier_threshold, measurement_noise, outlier_index):
+    """Kalman recursion of all the columns of data at once, one vectorized step per row\n
+    Same arithmetic as _kalman_kernel, so every column gets the labels kalman_filters() gives for its
+    points in mask. A point outside mask leaves the state of its series as it was.\n
+    **args:**\n
+    data = 2 dimensional (time x series) numpy array (np)\n
+    mask = points to process, same shape as data (np bool)\n
+    outlier_index = (time x series) output, 1 is written for every outlier (np)\n
+    """
+    process_noise = measurement_noise/10
+    n_rows, n_series = data.shape
+
+    #State of every series, x_est is taken from its first point in mask
+    x_est = data[mask.argmax(axis=0), np.arange(n_series)].astype(float)
+    cov = np.ones(n_series)
+
+    for t in range(n_rows):
+        active = mask[t]
+        cov_pred = cov + process_noise
+
+        dif = data[t] - x_est
+        dif_cov = cov_pred + measurement_noise
+
+        z_score = np.abs(dif/np.sqrt(dif_cov))
+        outlier = z_score >= outlier_threshold
+
+        #Normal points update the state, outliers only keep the prediction
+        update = ~outlier & active
+        kalman_gain = cov_pred / dif_cov
+        x_est = np.where(update, x_est + kalman_gain * dif, x_est)
+        cov = np.where(update, (1 - kalman_gain) * cov_pred, np.where(active, cov_pred, cov))
+
+        outlier_index[t] = outlier & active
+
+def _kalman_batch_kernel(data, mask, outlier_threshold, measurement_noise, x_est, cov, outlier_index):
+    """_kalman_kernel for every column of a (time x series) matrix, all advanced in the same pass
+    over the rows. Points outside mask leave the state of their series as it was.\n
+    Plain scalar code so numba can compile it, _kalman_lockstep is the NumPy version.\n
+    """
+    process_noise = measurement_noise/10
+    n_rows, n_series = data.shape
+
+    for t in range(n_rows):
+        for k in range(n_series):
+            if not mask[t, k]:
+                continue
+
+            cov_pred = cov[k] + process_noise
+
+            dif = data[t, k] - x_est[k]
+            dif_cov = cov_pred + measurement_noise
+
+            std = math.sqrt(dif_cov)
+            z_score = abs(dif/std)
+
+            if z_score >= outlier_threshold:
+                outlier_index[t, k] = 1
+                cov[k] = cov_pred
+
+            else:
+                kalman_gain = cov_pred / dif_cov
+                x_est[k] = x_est[k] + kalman_gain * dif
+                cov[k] = (1 - kalman_gain) * cov_pred
+
+_kalman_batch_jit = _PENDING if _HAVE_NUMBA else None
+
+#Without numba, fewer series than this are filtered one by one, the lockstep steps cost more than they share
+_LOCKSTEP_MIN_SERIES = 32
+
+def _run_kalman_batch(data, mask, outlier_threshold, measurement_noise, outlier_index):
+    """Runs the Kalman recursion of all the columns of data on the best available backend"""
+    if _kalman_batch_jit is _PENDING:
+        _load_jit()
+    if _kalman_batch_jit is not None:
+        x_est = np.ascontiguousarray(data[mask.argmax(axis=0), np.arange(data.shape[1])], dtype=float)
+        _kalman_batch_jit(data, mask, float(outlier_threshold), float(measurement_noise), x_est, np.ones(data.shape[1]), outlier_index)
+
+    elif data.shape[1] >= _LOCKSTEP_MIN_SERIES:
+        _kalman_lockstep(data, mask, outlier_threshold, measurement_noise, outlier_index)
+
+    else:
+        for k in range(data.shape[1]):
+            rows = np.flatnonzero(mask[:, k])
+            if len(rows) > 0:
+                column = np.ascontiguousarray(data[rows, k])
+                labels = np.zeros(len(rows), dtype=np.uint8)
+                _run_kalman(column, outlier_threshold, measurement_noise, column[0], 1.0, labels)
+                outlier_index[rows, k] = labels
+
+def batch_kalman_filters(data, outlier_threshold, measurement_noise=1.0, mask=None):
+    """kalman_filters() for many series at once, advanced together in time\n
+    The filters of all the series advance together, one step per time point (compiled with numba,
+    else one vectorized NumPy step over all the series), so the cost is one loop over time instead
+    of one per series.\n
+    **args:**\n
+    data = 2 dimensional (time x series) numpy array, or dict of name -> 1 dimensional series (np/dict)\n
+    outlier_threshold = z-score of the innovation from which a point is an outlier (float)\n
+    measurement_noise = variance of the measurement noise, the process noise is a tenth of it (float/int)\n
+    mask = optional (time x series) validity mask, each series then skips its invalid points (np)\n
+    **returns:**\n
+    (time x series) bool outlier_index and boundaries, labels past the end of a shorter series are 0\n
+    """
+    data, lengths = _as_matrix(data)
+
+    #Ragged series end at their length
+    valid = np.arange(data.shape[0])[:, None] < lengths[None, :]
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool).reshape(data.shape)
+
+    outlier_index = np.zeros(data.shape, dtype=np.uint8)
+    if data.size > 0:
+        _run_kalman_batch(np.ascontiguousarray(data), valid, outlier_threshold, measurement_noise, outlier_index)
+
+    boundaries = False
+
+    return outlier_index.view(bool), boundaries
+
+#Scale of the MAD that makes it a consistent estimate of the std for normal data
+MAD_SCALE = 1.4826
+
+def _skiplist_level(seed, max_levels):
+    """Level of a new skiplist node (1 + number of trailing heads of a coin) from an xorshift seed"""
+    seed ^= (seed << 13) & 0xFFFFFFFF
+    seed ^= seed >> 17
+    seed ^= (seed << 5) & 0xFFFFFFFF
+    level = 1
+    bits = seed
+    while level < max_levels and bits & 1:
+        level += 1
+        bits >>= 1
+    return seed, level
+
+def _skiplist_insert(value, values, nxt, width, levels, free, n_free, chain, steps_at, max_levels, seed):
+    """Inserts value into the indexable skiplist kept in flat arrays, returns (n_free, seed)\n
+    Node 0 is the head, node 1 the +inf sentinel, nxt/width are indexed level * capacity + node.\n
+    """
+    capacity = len(values)
+    node = 0
+    for level in range(max_levels - 1, -1, -1):
+        steps_at[level] = 0
+        while values[nxt[level * capacity + node]] <= value:
+            steps_at[level] += width[level * capacity + node]
+            node = nxt[level * capacity + node]
+        chain[level] = node
+
+    seed, depth = _skiplist_level(seed, max_levels)
+    n_free -= 1
+    new = free[n_free]
+    values[new] = value
+    levels[new] = depth
+
+    steps = 0
+    for level in range(depth):
+        prev = chain[level]
+        nxt[level * capacity + new] = nxt[level * capacity + prev]
+        nxt[level * capacity + prev] = new
+        width[level * capacity + new] = width[level * capacity + prev] - steps
+        width[level * capacity + prev] = steps + 1
+        steps += steps_at[level]
+    for level in range(depth, max_levels):
+        width[level * capacity + chain[level]] += 1
+
+    return n_free, seed
+
+def _skiplist_remove(value, values, nxt, width, levels, free, n_free, chain, max_levels):
+    """Removes one node holding value from the skiplist, returns n_free"""
+    capacity = len(values)
+    node = 0
+    for level in range(max_levels - 1, -1, -1):
+        while values[nxt[level * capacity + node]] < value:
+            node = nxt[level * capacity + node]
+        chain[level] = node
+
+    old = nxt[chain[0]]
+    for level in range(levels[old]):
+        prev = chain[level]
+        width[level * capacity + prev] += width[level * capacity + old] - 1
+        nxt[level * capacity + prev] = nxt[level * capacity + old]
+    for level in range(levels[old], max_levels):
+        width[level * capacity + chain[level]] -= 1
+
+    free[n_free] = old
+    return n_free + 1
+
+def _skiplist_get(i, values, nxt, width, max_levels):
+    """i-th smallest value (from 0) of the skiplist in O(log w)"""
+    capacity = len(values)
+    node = 0
+    i += 1
+    for level in range(max_levels - 1, -1, -1):
+        while width[level * capacity + node] <= i:
+            i -= width[level * capacity + node]
+            node = nxt[level * capacity + node]
+    return values[node]
+
+def _deviation_kth(k, median, half, size, values, nxt, width, max_levels):
+    """k-th smallest |x - median| of the window, from two sorted sequences of the skiplist:
+    below = median - s[half-1-j] and above = s[half+j] - median, both ascending\n
+    Binary search over the split, each step reads the skiplist by index, so O(log^2 w).\n
+    """
+    lo = max(0, k + 1 - (size - half))
+    hi = min(k + 1, half)
+    while lo < hi:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        below = median - _skiplist_get(half - 1 - i, values, nxt, width, max_levels)
+        above = _skiplist_get(half + j - 1, values, nxt, width, max_levels) - median
+        if below < above:
+            lo = i + 1
+        else:
+            hi = i
+
+    j = k + 1 - lo
+    result = -math.inf
+    if lo > 0:
+        result = median - _skiplist_get(half - lo, values, nxt, width, max_levels)
+    if j > 0:
+        result = max(result, _skiplist_get(half + j - 1, values, nxt, width, max_levels) - median)
+    return result
+
+def _rolling_median_mad_kernel(data, lookback_period, median_out, mad_out):
+    """Rolling median and MAD of the windows data[i-lookback_period:i], written to median_out[i-lookback_period]\n
+    The window is kept sorted in an indexable skiplist (O(log w) insert/remove/index), the median is
+    read by index and the MAD is the k-th element of the two sorted halves of deviations around it,
+    found in O(log^2 w). So a point costs O(log^2 w) instead of the O(w log w) of sorting every window.
+    Windows holding NaN/inf get NaN, like the STD method. Plain scalar code so numba can compile it.\n
+    """
+    max_levels = 1
+    while (1 << max_levels) < lookback_period + 1:
+        max_levels += 1
+    max_levels += 1
+
+    capacity = lookback_period + 2
+    values = np.empty(capacity)
+    values[0] = -math.inf
+    values[1] = math.inf
+    nxt = np.ones(max_levels * capacity, dtype=np.int64)
+    width = np.ones(max_levels * capacity, dtype=np.int64)
+    levels = np.zeros(capacity, dtype=np.int64)
+    free = np.arange(capacity - 1, 1, -1)
+    n_free = capacity - 2
+    chain = np.zeros(max_levels, dtype=np.int64)
+    steps_at = np.zeros(max_levels, dtype=np.int64)
+    seed = 2463534242
+
+    size = 0
+    bad = 0
+    half = lookback_period // 2
+    for i in range(len(data)):
+        if i >= lookback_period:
+            if bad > 0:
+                median_out[i - lookback_period] = math.nan
+                mad_out[i - lookback_period] = math.nan
+            else:
+                if lookback_period % 2 == 1:
+                    median = _skiplist_get(half, values, nxt, width, max_levels)
+                    mad = _deviation_kth(half, median, half, size, values, nxt, width, max_levels)
+                else:
+                    median = (_skiplist_get(half - 1, values, nxt, width, max_levels) + _skiplist_get(half, values, nxt, width, max_levels)) / 2
+                    mad = (_deviation_kth(half - 1, median, half, size, values, nxt, width, max_levels)
+                           + _deviation_kth(half, median, half, size, values, nxt, width, max_levels)) / 2
+                median_out[i - lookback_period] = median
+                mad_out[i - lookback_period] = mad
+
+            old = data[i - lookback_period]
+            if math.isfinite(old):
+                n_free = _skiplist_remove(old, values, nxt, width, levels, free, n_free, chain, max_levels)
+                size -= 1
+            else:
+                bad -= 1
+
+        value = data[i]
+        if math.isfinite(value):
+            n_free, seed = _skiplist_insert(value, values, nxt, width, levels, free, n_free, chain, steps_at, max_levels, seed)
+            size += 1
+        else:
+            bad += 1
+
+_rolling_median_mad_jit = _PENDING if _HAVE_NUMBA else None
+MEDIAN_BACKEND = "skiplist" if _HAVE_NUMBA else "numpy"
+
+def _load_jit():
+    """Imports numba and wraps the kernels, once per process\n
+    The skiplist helpers are replaced by their compiled versions first, so the median kernel calls
+    them compiled. The machine code itself is built (or read from numba's cache) on the first call.\n
+    """
+    global _kalman_kernel_jit, _kalman_batch_jit, _rolling_median_mad_jit
+    global _skiplist_level, _skiplist_insert, _skiplist_remove, _skiplist_get, _deviation_kth
+
+    with _jit_lock:
+        if _PENDING not in (_kalman_kernel_jit, _kalman_batch_jit, _rolling_median_mad_jit):
+            return
+        try:
+            from numba import njit
+        except ImportError:
+            _kalman_kernel_jit = _kalman_batch_jit = _rolling_median_mad_jit = None
+            return
+
+        if not hasattr(_skiplist_level, "py_func"):
+            _skiplist_level = njit(cache=True)(_skiplist_level)
+            _skiplist_insert = njit(cache=True)(_skiplist_insert)
+            _skiplist_remove = njit(cache=True)(_skiplist_remove)
+            _skiplist_get = njit(cache=True)(_skiplist_get)
+            _deviation_kth = njit(cache=True)(_deviation_kth)
+        if _kalman_kernel_jit is _PENDING:
+            _kalman_kernel_jit = njit(cache=True)(_kalman_kernel)
+        if _kalman_batch_jit is _PENDING:
+            _kalman_batch_jit = njit(cache=True)(_kalman_batch_kernel)
+        if _rolling_median_mad_jit is _PENDING:
+            _rolling_median_mad_jit = njit(cache=True)(_rolling_median_mad_kernel)
+
+def _rolling_median_mad_numpy(data, lookback_period, median_out, mad_out):
+    """Same values as the skiplist kernel with np.median over sliding windows, in memory bounded passes\n
+    O(n*w) work, but in C: the fallback when numba isn't installed.\n
+    """
+    windows = sliding_window_view(data, lookback_period)[:len(data) - lookback_period]
+    step = max(1, _PASS_SIZE // lookback_period)
+    for start in range(0, len(windows), step):
+        rows = windows[start:start + step]
+        median = np.median(rows, axis=1)
+        median_out[start:start + step] = median
+        mad_out[start:start + step] = np.median(np.abs(rows - median[:, None]), axis=1)
+
+def _rolling_median_mad(data, lookback_period, progress=None):
+    """Rolling median and MAD of the previous lookback_period points, for the window ends [lookback_period, n)\n
+    Computed in passes of about _PASS_SIZE window ends, progress(done, total) is called after each.\n
+    """
+    n = max(len(data) - lookback_period, 0)
+    median = np.empty(n)
+    mad = np.empty(n)
+    if n == 0:
+        return median, mad
+
+    data = np.ascontiguousarray(data, dtype=float)
+    if _rolling_median_mad_jit is _PENDING:
+        _load_jit()
+    kernel = _rolling_median_mad_jit if _rolling_median_mad_jit is not None else _rolling_median_mad_numpy
+
+    #Every pass starts from its own lookback_period points of history, the values don't depend on the passes
+    step = max(_PASS_SIZE, lookback_period)
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        kernel(data[start:stop + lookback_period], lookback_period, median[start:stop], mad[start:stop])
+        if progress is not None:
+            progress(stop, n)
+    return median, mad
+
+def rolling_mad(data:np, lookback_period=14, mad_multiplier=3, progress=None, mask=None, dtype=np.float64):
+    """Robust labeling of dataset as outliers and normal values with the rolling median and MAD\n
+    Same rules as calculations(), with the median in place of the mean and MAD_SCALE * MAD in place
+    of the std, so a spike doesn't widen the bounds of the windows that follow it.\n
+    **args:**\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    lookback_period = number of previous datapoints of the median/MAD (int)\n
+    mad_multiplier = Multiplication value of the scaled MAD. The higher it is the less sensitive the outliers get (float/int)\n
+    progress = optional callback(done, total) (callable)\n
+    mask = optional validity mask (see validity_mask), the detection then skips the invalid points (np)\n
+    dtype = dtype of the bounds (dtype)\n
+    """
+    if mask is not None:
+        return _masked(rolling_mad, data, mask, lookback_period=lookback_period, mad_multiplier=mad_multiplier, progress=progress, dtype=dtype)
+
+    data = np.asarray(data, dtype=dtype).reshape(-1)
+
+    median, mad = _rolling_median_mad(data, lookback_period, progress)
+
+    outlier_index, upper_bound, lower_bound = _label_from_stats(data, lookback_period, median, MAD_SCALE * mad, mad_multiplier)
+
+    upper_bound[0:lookback_period] = np.median(data[:lookback_period]) if len(data) else 0
+    lower_bound[0:lookback_period] = upper_bound[0:lookback_period]
+
+    if progress is not None:
+        progress(1, 1)
+
+    boundaries = True
+
+    return outlier_index, upper_bound, lower_bound, boundaries
+
+def batch_rolling_mad(data, lookback_period=14, mad_multiplier=3):
+    """rolling_mad() for many series\n
+    **args:**\n
+    data = 2 dimensional (time x series) numpy array, or dict of name -> 1 dimensional series (np/dict)\n
+    lookback_period, mad_multiplier = see rolling_mad() (int, float)\n
+    **returns:**\n
+    Same as rolling_mad() with (time x series) arrays. Past the end of a shorter series the bounds are NaN
+    and the labels are 0.\n
+    """
+    data, lengths = _as_matrix(data)
+
+    outlier_index = np.zeros(data.shape, dtype=bool)
+    upper_bound = np.full(data.shape, np.nan)
+    lower_bound = np.full(data.shape, np.nan)
+
+    for k, length in enumerate(lengths):
+        labels, upper, lower, _ = rolling_mad(data[:length, k], lookback_period, mad_multiplier)
+        outlier_index[:length, k] = labels
+        upper_bound[:length, k] = upper
+        lower_bound[:length, k] = lower
+
+    boundaries = True
+
+    return outlier_index, upper_bound, lower_bound, boundaries
+
+def pack_labels(labels):
+    """Bit-packs 0/1 labels along axis 0 (8 labels per byte), for keeping many label series resident\n
+    **returns:**\n
+    packed labels (np uint8), original length (int)\n
+    """
+    labels = np.asarray(labels)
+    return np.packbits(labels != 0, axis=0), len(labels)
+
+def unpack_labels(packed, length):
+    """Inverse of pack_labels, gives boolean labels"""
+    return np.unpackbits(packed, axis=0, count=length).astype(bool)
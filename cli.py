@@ -0,0 +1,234 @@
+"""Headless command line runner of the outlier detectors, without any GUI or plotting imports
+
+Examples:
+    python cli.py btc-usd.npy prices.csv --algorithm std --lookback 14 --multiplier 2.5
+    python cli.py AAPL TSLA --algorithm kalman --measurement-noise 50 --threshold 3 --format parquet
+    python cli.py BTC-USD --interval 1h --timeframe 4h 1d 1w
+    python cli.py ticks.csv --timeframe 1h --drill-down
+    python cli.py AAPL TSLA --events-db events.db
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import calcs
+import datasource
+import detectors
+import events
+import instrument
+import loaders
+import resample
+
+FORMATS = ("csv", "parquet", "npy")
+
+
+def load_input(name, offline=False, dtype=np.float64, interval="1d", with_times=False):
+    """Prices of a file path, or of a ticker through the local download cache\n
+    With with_times, returns (times, prices), times being None for files without a time column.\n
+    """
+    if os.path.exists(name):
+        prices, _ = loaders.load_prices(name)
+        times = loaders.load_times(name) if with_times else None
+    else:
+        times, prices = datasource.fetch_prices(name, interval=interval, cache=datasource.SeriesCache(), offline=offline)
+
+    prices = np.asarray(prices, dtype=dtype).reshape(-1)
+    return (times, prices) if with_times else prices
+
+def detector_params(options):
+    """Parameters of the selected detector from the command line options (None where not given)"""
+    detector = detectors.get(options.algorithm)
+    return {parameter.name: getattr(options, _dest(parameter.option)) for parameter in detector.parameters}
+
+def _dest(option):
+    return option.lstrip("-").replace("-", "_")
+
+def detect(prices, valid_mask, options):
+    """Runs the selected detector on the valid points\n
+    **returns:**\n
+    labels, upper bound, lower bound (None without bounds) (np), values chosen for the "auto" parameters (dict)\n
+    """
+    params = detector_params(options)
+    result = detectors.get(options.algorithm).run(prices, mask=valid_mask, backend=options.backend, **params)
+    chosen = {name: result.params[name] for name, value in params.items() if value == "auto"}
+    return result.labels, result.upper, result.lower, chosen
+
+def write_output(path, prices, labels, upper, lower, output_format, times=None):
+    """Writes (time,) price, label and (if any) bounds columns as CSV, Parquet or .npy"""
+    columns = {} if times is None else {"time": times}
+    columns["price"] = prices
+    columns["label"] = np.asarray(labels, dtype=np.uint8)
+    if upper is not None:
+        columns["upper"] = upper
+        columns["lower"] = lower
+
+    if output_format == "npy":
+        np.save(path, np.column_stack(list(columns.values())).astype(prices.dtype))
+        return
+
+    import pandas as pd
+    df = pd.DataFrame(columns)
+    if output_format == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index_label="index")
+
+def store_events(name, options, prices, labels, upper, lower, times=None, timeframe=None):
+    """Adds the outliers of one result to the --events-db store, series id = file stem or ticker"""
+    if not options.events_db:
+        return
+    series_id = os.path.splitext(os.path.basename(name))[0]
+    detector = options.algorithm if timeframe is None else f"{options.algorithm}_{timeframe}"
+    with instrument.stage("events", input=name, path=options.events_db) as stage, events.EventStore(options.events_db) as store:
+        stage.count(items=store.add(series_id, events.extract_events(labels, prices, upper, lower, times), detector=detector))
+
+def run_timeframes(name, times, prices, options):
+    """Detection on the close of every requested timeframe, or drill-down to the ticks with --drill-down\n
+    **returns:**\n
+    list of (output path, number of outliers, values chosen for the "auto" parameters)\n
+    """
+    if times is None:
+        raise ValueError("no time column to resample by")
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    frames = resample.TimeframeCache(times, prices)
+    with instrument.stage("resample", input=name, timeframes=options.timeframe, items=len(prices)):
+        frames.build(options.timeframe)
+
+    written = []
+    for timeframe in options.timeframe:
+        path = os.path.join(options.output_dir, f"{stem}_{options.algorithm}_{timeframe}.{options.format}")
+        with instrument.stage("detect", input=name, algorithm=options.algorithm, timeframe=timeframe, drill_down=options.drill_down):
+            if options.drill_down:
+                params = detectors.get("std").validate(detector_params(options))
+                lookback = coarse_lookback = params["lookback_period"]
+                chosen = {}
+                # "auto" picks one window for the bars and another one for the ticks
+                if lookback == "auto":
+                    lookback = int(calcs.select_lookback(frames.prices)[0][0])
+                    coarse_lookback = int(calcs.select_lookback(frames.bars(timeframe)["close"])[0][0])
+                    chosen = {"lookback_period": lookback, "coarse_lookback": coarse_lookback}
+                labels, _ = resample.drill_down(frames, timeframe, lookback, params["std_multiplier"], coarse_lookback=coarse_lookback)
+                output = (prices, labels, None, None, options.format, times)
+            else:
+                bars = frames.bars(timeframe)
+                close = bars["close"].astype(prices.dtype)
+                labels, upper, lower, chosen = detect(close, np.ones(len(close), dtype=bool), options)
+                output = (close, labels, upper, lower, options.format, bars["time"])
+
+        with instrument.stage("write", input=name, path=path, format=options.format):
+            write_output(path, *output)
+        store_events(name, options, output[0], output[1], output[2], output[3], output[5], timeframe)
+        written.append((path, int(np.count_nonzero(output[1])), chosen))
+
+    return written
+
+def run_input(name, options):
+    """Load -> clean -> detect -> write for one input\n
+    **returns:**\n
+    list of (output path, number of outliers, values chosen for the "auto" parameters), one per timeframe\n
+    """
+    with instrument.stage("load", input=name) as stage:
+        times, prices = load_input(name, offline=options.offline, dtype=np.float32 if options.float32 else np.float64,
+                                   interval=options.interval, with_times=True)
+        stage.count(items=len(prices), bytes=prices.nbytes)
+
+    if options.timeframe:
+        return run_timeframes(name, times, prices, options)
+
+    # Rows with NaN (and zeros) stay in the output, with label 0 and NaN bounds
+    with instrument.stage("clean", input=name, keep_zeros=options.keep_zeros) as stage:
+        valid_mask, counts = calcs.validity_mask(prices, keep_zeros=options.keep_zeros)
+        stage.count(**counts)
+
+    with instrument.stage("detect", input=name, algorithm=options.algorithm, items=len(prices)):
+        labels, upper, lower, chosen = detect(prices, valid_mask, options)
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    path = os.path.join(options.output_dir, f"{stem}_{options.algorithm}.{options.format}")
+    with instrument.stage("write", input=name, path=path, format=options.format):
+        write_output(path, prices, labels, upper, lower, options.format)
+    store_events(name, options, prices, labels, upper, lower, times)
+
+    return [(path, int(np.count_nonzero(labels)), chosen)]
+
+def add_detector_options(parser, available=None):
+    """One option per detector parameter, the detector's own default applies when it isn't given"""
+    options = {}
+    for detector in available or detectors.available():
+        for parameter in detector.parameters:
+            options.setdefault(parameter.option, parameter)
+    for option, parameter in options.items():
+        parser.add_argument(option, type=parameter.parse, default=None, help=parameter.help)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Outlier detection on price series without the GUI")
+    parser.add_argument("inputs", nargs="+", help="data files (.npy, .csv, .xlsx, .xls) or ticker symbols")
+    parser.add_argument("--algorithm", choices=[detector.key for detector in detectors.available()], default="std")
+    parser.add_argument("--backend", help="implementation of the detector, its default one if not given")
+
+    add_detector_options(parser)
+
+    parser.add_argument("--interval", default="1d", help="bar interval downloaded for tickers (yfinance interval)")
+    parser.add_argument("--timeframe", nargs="+", choices=list(resample.TIMEFRAMES), default=[], help="resample to OHLC bars and detect on their close")
+    parser.add_argument("--drill-down", action="store_true", help="STD: re-check only the flagged bars at full resolution")
+    parser.add_argument("--keep-zeros", action="store_true", help="keep zero prices instead of removing them")
+    parser.add_argument("--float32", action="store_true", help="keep prices and bounds in float32 (half the memory)")
+    parser.add_argument("--offline", action="store_true", help="only use cached downloads for tickers")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--events-db", help="also store the outliers in this SQLite file (query it with events.py)")
+    parser.add_argument("--jobs", type=int, default=None, help="parallel processes, all cores by default")
+    parser.add_argument("--trace", help="write stage timings as JSON lines to this file ('-' for stderr)")
+    parser.add_argument("--profile", nargs="*", choices=("cprofile", "tracemalloc"), default=[], help="add profiles to the trace")
+    return parser
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+
+    detector = detectors.get(options.algorithm)
+    try:
+        detector.validate(detector_params(options))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if options.backend is not None and options.backend not in detector.backends:
+        print(f"Backends of {detector.key}: {', '.join(detector.backends)}", file=sys.stderr)
+        return 2
+    if options.drill_down and (options.algorithm != "std" or not options.timeframe):
+        print("--drill-down needs --algorithm std and a --timeframe", file=sys.stderr)
+        return 2
+
+    os.makedirs(options.output_dir, exist_ok=True)
+
+    # Passed through the environment so the worker processes trace as well
+    if options.trace:
+        os.environ["WARNINGSE_TRACE"] = options.trace
+        os.environ["WARNINGSE_PROFILE"] = ",".join(options.profile)
+        instrument.enable(options.trace, options.profile)
+
+    # Tickers are downloaded together first (grouped, rate limited), the workers then find them in the cache
+    tickers = [name for name in options.inputs if not os.path.exists(name)]
+    if tickers and not options.offline:
+        with instrument.stage("download", tickers=len(tickers)) as stage:
+            _, errors = datasource.download_many(tickers, interval=options.interval, cache=datasource.SeriesCache())
+            stage.count(failed=len(errors))
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=options.jobs) as pool:
+        futures = {name: pool.submit(run_input, name, options) for name in options.inputs}
+        for name, future in futures.items():
+            try:
+                for path, outliers, chosen in future.result():
+                    auto = f" (auto {', '.join(f'{key}={value}' for key, value in chosen.items())})" if chosen else ""
+                    print(f"{name}: {outliers} outliers -> {path}{auto}")
+            except Exception as e:
+                print(f"{name}: failed ({e})", file=sys.stderr)
+                failed += 1
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+
+#Default location of the local series cache
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".warningSE", "cache")
+
+def _frame_to_arrays(df):
+    """(times in POSIX seconds, close prices) of a yfinance frame of one ticker"""
+    import pandas as pd
+
+    if df.empty:
+        return np.array([], dtype=np.int64), np.array([], dtype=float)
+
+    # Ensure we have a price column
+    if 'Close' not in df.columns:
+        prices = df.iloc[:, 0].to_numpy(dtype=float).reshape(-1)
+    else:
+        prices = df['Close'].to_numpy(dtype=float).reshape(-1)
+
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    times = index.asi8 // 10**9
+
+    return times.astype(np.int64), prices
+
+def new_session():
+    """HTTP session for yfinance requests, shared by the requests of one download so they reuse connections"""
+    try:
+        # yfinance >= 0.2.54 only accepts curl_cffi sessions
+        from curl_cffi import requests
+        return requests.Session(impersonate="chrome")
+    except ImportError:
+        import requests
+        return requests.Session()
+
+
+class YahooSource:
+    """Price source backed by yfinance, imported on first use\n
+    Any object with the same fetch() method can be used instead, e.g. a local fake in tests.
+    fetch_many() is optional, download_many() falls back to one fetch() per ticker without it.\n
+    **args:**\n
+    session = HTTP session passed to every yfinance request, None uses the session yfinance shares between calls\n
+    """
+
+    def __init__(self, session=None):
+        self.session = session
+
+    def _options(self):
+        options = {"progress": False, "auto_adjust": True}
+        if self.session is not None:
+            options["session"] = self.session
+        return options
+
+    def fetch(self, ticker, interval="1d", start=None, period="1y"):
+        """Downloads bars of one ticker\n
+        **args:**\n
+        ticker = ticker symbol (str)\n
+        interval = yfinance bar interval (str)\n
+        start = only bars from this POSIX time on, in seconds (float/None)\n
+        period = yfinance period used when start is None (str)\n
+        **returns:**\n
+        times in POSIX seconds (np int64), close prices (np float64)\n
+        """
+        import pandas as pd
+        import yfinance as yf
+
+        if start is None:
+            df = yf.download(ticker, period=period, interval=interval, **self._options())
+        else:
+            df = yf.download(ticker, start=pd.Timestamp(start, unit="s", tz="UTC"), interval=interval, **self._options())
+
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+
+        return _frame_to_arrays(df)
+
+    def fetch_many(self, tickers, interval="1d", period="1y"):
+        """Downloads the full period of several tickers with a single yf.download request\n
+        **returns:**\n
+        dict of ticker -> (times, prices), tickers without data are left out\n
+        """
+        import pandas as pd
+        import yfinance as yf
+
+        df = yf.download(list(tickers), period=period, interval=interval, group_by="ticker", threads=False, **self._options())
+
+        results = {}
+        for ticker in tickers:
+            if isinstance(df.columns, pd.MultiIndex):
+                if ticker not in df.columns.get_level_values(0):
+                    continue
+                frame = df[ticker]
+            else:
+                frame = df
+            # The tickers share one index, the rows of the other tickers' bars are NaN here
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                results[ticker] = _frame_to_arrays(frame)
+
+        return results
+
+
+class SeriesCache:
+    """Local on-disk cache of downloaded series, one .npz file (times + close) per ticker and interval\n
+    **args:**\n
+    directory = folder of the cache files (str)\n
+    ttl = seconds after which an entry is refreshed (float)\n
+    max_entries = number of entries kept, the least recently used ones are evicted (int)\n
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=3600, max_entries=256):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.directory, f"{ticker.upper()}_{interval}.npz")
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _touch(self, key, fetched=None):
+        """Records an access (and optionally a refresh) and evicts the least recently used entries"""
+        index = self._read_index()
+        entry = index.get(key, {})
+        entry["used"] = time.time()
+        if fetched is not None:
+            entry["fetched"] = fetched
+        index[key] = entry
+
+        while len(index) > self.max_entries:
+            oldest = min(index, key=lambda name: index[name].get("used", 0))
+            del index[oldest]
+            try:
+                os.remove(os.path.join(self.directory, oldest + ".npz"))
+            except OSError:
+                pass
+
+        self._write_index(index)
+
+    def get(self, ticker, interval):
+        """Cached (times, prices) or None"""
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as cached:
+            times, prices = cached["times"], cached["prices"]
+        self._touch(os.path.basename(path)[:-4])
+        return times, prices
+
+    def is_fresh(self, ticker, interval):
+        """True if the entry was refreshed less than ttl seconds ago"""
+        entry = self._read_index().get(os.path.basename(self._path(ticker, interval))[:-4])
+        return entry is not None and time.time() - entry.get("fetched", 0) < self.ttl
+
+    def put(self, ticker, interval, times, prices):
+        """Stores (replaces) the series of a ticker"""
+        path = self._path(ticker, interval)
+        tmp_path = path[:-4] + ".tmp.npz"
+        np.savez(tmp_path, times=np.asarray(times, dtype=np.int64), prices=np.asarray(prices, dtype=float))
+        os.replace(tmp_path, path)
+        self._touch(os.path.basename(path)[:-4], fetched=time.time())
+
+
+def _append(times, prices, new_times, new_prices):
+    """Appends the new bars, the new values win where timestamps overlap"""
+    keep = times < new_times[0] if len(new_times) else np.ones(len(times), dtype=bool)
+    return np.concatenate((times[keep], new_times)), np.concatenate((prices[keep], new_prices))
+
+def fetch_prices(ticker, interval="1d", source=None, cache=None, offline=False, period="1y"):
+    """Prices of a ticker through the local cache\n
+    A fresh cache entry is returned as is. A stale one only fetches the bars from its last
+    timestamp on and appends them. Without a cache entry the full period is downloaded.\n
+    **args:**\n
+    ticker = ticker symbol (str)\n
+    interval = bar interval (str)\n
+    source = object with a fetch() method like YahooSource (default YahooSource())\n
+    cache = SeriesCache, no caching if None\n
+    offline = only use the cache, never the source (bool)\n
+    period = period downloaded when nothing is cached (str)\n
+    **returns:**\n
+    times in POSIX seconds (np int64), close prices (np float64)\n
+    """
+    if source is None:
+        source = YahooSource()
+
+    cached = cache.get(ticker, interval) if cache is not None else None
+
+    if cached is not None and (offline or cache.is_fresh(ticker, interval)):
+        return cached
+    if offline:
+        raise LookupError(f"No cached data for {ticker} ({interval})")
+
+    if cached is not None and len(cached[0]) > 0:
+        times, prices = cached
+        # The last bar may still have been in progress, so it's fetched again
+        new_times, new_prices = source.fetch(ticker, interval=interval, start=int(times[-1]))
+        times, prices = _append(times, prices, np.asarray(new_times, dtype=np.int64), np.asarray(new_prices, dtype=float))
+    else:
+        times, prices = source.fetch(ticker, interval=interval, period=period)
+        times, prices = np.asarray(times, dtype=np.int64), np.asarray(prices, dtype=float)
+
+    if cache is not None and len(times) > 0:
+        cache.put(ticker, interval, times, prices)
+
+    return times, prices
+
+
+class RateLimiter:
+    """Token bucket shared by the download threads: at most burst requests at once, rate per second on average\n
+    **args:**\n
+    rate = requests per second (float)\n
+    burst = bucket size (int)\n
+    clock, sleep = time functions, replaceable in tests (callable)\n
+    """
+
+    def __init__(self, rate=5.0, burst=5, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent"""
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+def _with_retries(function, limiter, retries, backoff, sleep=time.sleep):
+    """Calls function after limiter.acquire(), retrying failures retries times with exponential backoff"""
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return function()
+        except Exception:
+            if attempt == retries:
+                raise
+            sleep(backoff * 2 ** attempt)
+
+def download_many(tickers, interval="1d", source=None, cache=None, max_workers=8, rate=5.0, retries=3,
+                  backoff=0.5, group_size=50, period="1y", progress=None):
+    """Downloads many tickers concurrently into the local cache\n
+    Fresh cache entries are used as is, stale ones only fetch their missing tail (one request per
+    ticker), and tickers without a cache entry are fetched together with source.fetch_many() in
+    groups of group_size when the source supports it. A group still failing after its retries is
+    fetched again one ticker at a time, so one bad ticker doesn't fail the others. Every request
+    goes through a shared rate limiter and is retried with exponential backoff. Yahoo requests all
+    share one HTTP session (new_session) for the call. Cache writes happen on the calling thread.\n
+    **args:**\n
+    tickers = ticker symbols, duplicates are dropped (list of str)\n
+    interval = bar interval (str)\n
+    source = object with fetch() (and optionally fetch_many()) like YahooSource (default YahooSource())\n
+    cache = SeriesCache, no caching if None\n
+    max_workers = concurrent requests (int)\n
+    rate = requests per second (float)\n
+    retries, backoff = retries per request and first backoff delay in seconds (int, float)\n
+    group_size = tickers per grouped request, 1 disables grouping (int)\n
+    period = period downloaded when nothing is cached (str)\n
+    progress = optional callback(done, total), may raise to cancel the remaining requests (callable)\n
+    **returns:**\n
+    dict of ticker -> (times, prices), dict of ticker -> exception of the failed tickers\n
+    """
+    # A YahooSource without its own session gets one for all the requests of this call, closed at the end
+    session = None
+    if source is None or (isinstance(source, YahooSource) and source.session is None):
+        session = new_session()
+        source = YahooSource(session=session)
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+
+    results = {}
+    errors = {}
+    stale = {}
+    missing = []
+    for ticker in tickers:
+        cached = cache.get(ticker, interval) if cache is not None else None
+        if cached is not None and cache.is_fresh(ticker, interval):
+            results[ticker] = cached
+        elif cached is not None and len(cached[0]) > 0:
+            stale[ticker] = cached
+        else:
+            missing.append(ticker)
+
+    limiter = RateLimiter(rate, burst=max_workers)
+
+    def fetch_tail(ticker):
+        # The last bar may still have been in progress, so it's fetched again
+        return {ticker: source.fetch(ticker, interval=interval, start=int(stale[ticker][0][-1]))}
+
+    def fetch_group(group):
+        if len(group) == 1 or not hasattr(source, "fetch_many"):
+            return {ticker: source.fetch(ticker, interval=interval, period=period) for ticker in group}
+        fetched = source.fetch_many(group, interval=interval, period=period)
+        return {ticker: fetched.get(ticker, (np.array([], dtype=np.int64), np.array([], dtype=float))) for ticker in group}
+
+    def submit(job, arg):
+        return pool.submit(_with_retries, lambda: job(arg), limiter, retries, backoff)
+
+    step = max(group_size, 1) if hasattr(source, "fetch_many") else 1
+    jobs = [([ticker], fetch_tail, ticker) for ticker in stale]
+    jobs += [(missing[i:i + step], fetch_group, missing[i:i + step]) for i in range(0, len(missing), step)]
+
+    done = len(results)
+    if progress is not None:
+        progress(done, len(tickers))
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        pending = {submit(job, arg): group for group, job, arg in jobs}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                group = pending.pop(future)
+                try:
+                    fetched = future.result()
+                except Exception as e:
+                    # A failed group is fetched again one ticker at a time
+                    if len(group) > 1:
+                        pending.update({submit(fetch_group, [ticker]): [ticker] for ticker in group})
+                        continue
+                    errors.update({ticker: e for ticker in group})
+                    # Without connection the cached copy of a stale ticker is still better than nothing
+                    results.update({ticker: stale[ticker] for ticker in group if ticker in stale})
+                    fetched = {}
+
+                for ticker, (times, prices) in fetched.items():
+                    times, prices = np.asarray(times, dtype=np.int64), np.asarray(prices, dtype=float)
+                    if ticker in stale:
+                        times, prices = _append(*stale[ticker], times, prices)
+                    if len(times) == 0:
+                        errors[ticker] = LookupError(f"No data for {ticker} ({interval})")
+                        continue
+                    if cache is not None:
+                        cache.put(ticker, interval, times, prices)
+                    results[ticker] = (times, prices)
+
+                done += len(group)
+                if progress is not None:
+                    progress(done, len(tickers))
+    finally:
+        # On cancellation the requests that haven't started are dropped
+        pool.shutdown(wait=True, cancel_futures=True)
+        if session is not None:
+            session.close()
+
+    return {ticker: results[ticker] for ticker in tickers if ticker in results}, errors
@@ -0,0 +1,303 @@
+"""Registry of the outlier detectors with their parameters and implementations
+
+The GUI, the CLI and the batch engines discover the detectors from here instead of knowing
+each algorithm by name:
+
+    detector = detectors.get("std")                    # key, or the GUI title "STD based"
+    params = detector.validate({"lookback_period": 14, "std_multiplier": 2.5})
+    result = detector.run(data, **params)              # DetectionResult
+    result.labels, result.upper, result.lower, result.elapsed
+
+Every detector declares its parameters (Parameter) and one or more backends, functions with the
+signature backend(data, progress=None, mask=None, **params) returning (labels, upper, lower),
+where upper/lower are None for detectors without bounds. A faster implementation of a detector
+is added with Detector.add_backend() and selected with run(..., backend=name); callers don't change.
+"""
+import time
+from dataclasses import dataclass, field
+import numpy as np
+import calcs
+import streaming
+
+
+@dataclass(frozen=True)
+class Parameter:
+    """One parameter of a detector\n
+    name = keyword argument of the backends (str)\n
+    label = short name shown in the GUI and in error messages (str)\n
+    kind = int or float (type)\n
+    default = default value (int/float)\n
+    minimum = smallest allowed value (int/float)\n
+    exclusive = True if minimum itself isn't allowed (bool)\n
+    option = command line option of the CLI (str)\n
+    help = description for the CLI (str)\n
+    auto = the value "auto" is accepted and lets the detector choose (bool)\n
+    """
+    name: str
+    label: str
+    kind: type
+    default: float
+    minimum: float = 0
+    exclusive: bool = False
+    option: str = ""
+    help: str = ""
+    auto: bool = False
+
+    def rule(self):
+        """Text of the constraint, e.g. 'Lookback > 0'"""
+        return f"{self.label} {'>' if self.exclusive else '>='} {self.minimum:g}" + (" or auto" if self.auto else "")
+
+    def parse(self, value):
+        """Value of the declared type, "auto" is kept as is where accepted\n
+        **raises:**\n
+        ValueError if value can't be converted\n
+        """
+        if self.auto and isinstance(value, str) and value.strip().lower() == "auto":
+            return "auto"
+        return self.kind(value)
+
+    def is_valid(self, value):
+        if value == "auto":
+            return self.auto
+        return value > self.minimum if self.exclusive else value >= self.minimum
+
+
+@dataclass
+class DetectionResult:
+    """Common result of every detector\n
+    labels = 0/1 labels, one per point (np)\n
+    upper, lower = bounds of the normal range, None if the detector has none (np/None)\n
+    detector = key of the detector (str)\n
+    backend = implementation that produced the result (str)\n
+    params = parameters of the run (dict)\n
+    elapsed = wall time of the run in seconds (float)\n
+    """
+    labels: np.ndarray
+    upper: np.ndarray = None
+    lower: np.ndarray = None
+    detector: str = ""
+    backend: str = ""
+    params: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def boundaries(self):
+        """True if the result has bounds to plot"""
+        return self.upper is not None
+
+
+@dataclass
+class Detector:
+    """A detection algorithm, its parameters and its implementations\n
+    key = short name used by the CLI (str)\n
+    title = name shown in the GUI (str)\n
+    parameters = parameters in the order of the GUI input fields (tuple of Parameter)\n
+    backends = name -> backend function, the first one is the default (dict)\n
+    batch = function(matrix, **params) -> (labels, upper, lower) for (time x series) data, or None (callable)\n
+    streaming = factory(**params) of a tick-by-tick detector with update()/update_many(), or None (callable)\n
+    resolve = function(values, **params) -> params with the "auto" values chosen for the valid values, or None (callable)\n
+    """
+    key: str
+    title: str
+    parameters: tuple
+    backends: dict
+    batch: object = None
+    streaming: object = None
+    resolve: object = None
+
+    @property
+    def default_backend(self):
+        return next(iter(self.backends))
+
+    def defaults(self):
+        return {parameter.name: parameter.default for parameter in self.parameters}
+
+    def add_backend(self, name, function, default=False):
+        """Adds (or replaces) an implementation, optionally making it the default"""
+        if default:
+            self.backends = {name: function, **{key: value for key, value in self.backends.items() if key != name}}
+        else:
+            self.backends[name] = function
+
+    def validate(self, params):
+        """Converts params to the declared types, fills in defaults and checks the minimums\n
+        **returns:**\n
+        dict of the parameters (dict)\n
+        **raises:**\n
+        ValueError with all the rules of the detector, e.g. 'Lookback > 0, Multiplier >= 0'\n
+        """
+        values = self.defaults()
+        unknown = set(params) - set(values)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.title}: {', '.join(sorted(unknown))}")
+
+        try:
+            for parameter in self.parameters:
+                if params.get(parameter.name) is not None:
+                    values[parameter.name] = parameter.parse(params[parameter.name])
+        except (TypeError, ValueError):
+            raise ValueError(", ".join(parameter.rule() for parameter in self.parameters))
+
+        if not all(parameter.is_valid(values[parameter.name]) for parameter in self.parameters):
+            raise ValueError(", ".join(parameter.rule() for parameter in self.parameters))
+
+        return values
+
+    def run(self, data, progress=None, mask=None, backend=None, **params):
+        """Validates params and runs one backend on a 1 dimensional series\n
+        "auto" values are chosen first, so every backend runs with them and the result's params show them.\n
+        **returns:**\n
+        DetectionResult\n
+        """
+        params = self.validate(params)
+        if self.resolve is not None and "auto" in params.values():
+            values = np.asarray(data).reshape(-1)
+            params = self.resolve(values if mask is None else values[np.asarray(mask, dtype=bool).reshape(-1)], **params)
+        backend = backend or self.default_backend
+        if backend not in self.backends:
+            raise ValueError(f"Unknown backend {backend} for {self.title}, available: {', '.join(self.backends)}")
+
+        start = time.perf_counter()
+        labels, upper, lower = self.backends[backend](data, progress=progress, mask=mask, **params)
+        return DetectionResult(labels, upper, lower, self.key, backend, params, time.perf_counter() - start)
+
+    def run_batch(self, data, **params):
+        """Runs the batch implementation on (time x series) data or a dict of series\n
+        **returns:**\n
+        DetectionResult with (time x series) arrays\n
+        """
+        if self.batch is None:
+            raise ValueError(f"{self.title} has no batch implementation")
+        params = self.validate(params)
+
+        start = time.perf_counter()
+        labels, upper, lower = self.batch(data, **params)
+        return DetectionResult(labels, upper, lower, self.key, "batch", params, time.perf_counter() - start)
+
+    def stream(self, **params):
+        """New tick-by-tick detector with the given parameters"""
+        if self.streaming is None:
+            raise ValueError(f"{self.title} has no streaming implementation")
+        params = self.validate(params)
+        if "auto" in params.values():
+            raise ValueError(f"{self.title} needs fixed parameters to stream, not auto")
+        return self.streaming(**params)
+
+
+_REGISTRY = {}
+
+def register(detector):
+    """Adds a detector, replacing one with the same key"""
+    _REGISTRY[detector.key] = detector
+    return detector
+
+def get(name):
+    """Detector by key ("std") or GUI title ("STD based")\n
+    **raises:**\n
+    KeyError if there is no such detector\n
+    """
+    if name in _REGISTRY:
+        return _REGISTRY[name]
+    for detector in _REGISTRY.values():
+        if detector.title == name:
+            return detector
+    raise KeyError(f"Unknown detector: {name}")
+
+def available():
+    """Registered detectors, in registration order"""
+    return list(_REGISTRY.values())
+
+
+def _bounded(function):
+    """Backend from a calcs function returning (labels, upper, lower, boundaries), float32 data keeps float32 bounds"""
+    def backend(data, progress=None, mask=None, **params):
+        dtype = np.float32 if getattr(data, "dtype", None) == np.float32 else np.float64
+        labels, upper, lower, _ = function(data, progress=progress, mask=mask, dtype=dtype, **params)
+        return labels, upper, lower
+    return backend
+
+def _parallel_std(data, progress=None, mask=None, **params):
+    # Imported on use, parallel itself uses the registry for its sweeps
+    import parallel
+    labels, upper, lower, _ = parallel.parallel_calculations(data, progress=progress, mask=mask, **params)
+    return labels, upper, lower
+
+def _kalman(data, progress=None, mask=None, **params):
+    labels, _ = calcs.kalman_filters(data, progress=progress, mask=mask, **params)
+    return labels, None, None
+
+def _streamed(factory):
+    """Backend feeding the whole series through a streaming detector, labels only"""
+    def backend(data, progress=None, mask=None, **params):
+        def labels_of(values, **params):
+            return (factory(**params).update_many(values),)
+
+        data = np.asarray(data, dtype=float).reshape(-1)
+        if mask is None:
+            (labels,) = labels_of(data, **params)
+        else:
+            (labels,) = calcs._masked(labels_of, data, mask, **params)
+        if progress is not None:
+            progress(1, 1)
+        return labels, None, None
+    return backend
+
+def _resolve_lookback(values, **params):
+    """Replaces an "auto" lookback by the window calcs.select_lookback picks for the series"""
+    if params.get("lookback_period") == "auto":
+        params["lookback_period"] = int(calcs.select_lookback(values)[0][0])
+    return params
+
+def _batch_bounded(function):
+    def batch(data, **params):
+        labels, upper, lower, _ = function(data, **params)
+        return labels, upper, lower
+    return batch
+
+def _batch_kalman(data, **params):
+    labels, _ = calcs.batch_kalman_filters(data, **params)
+    return labels, None, None
+
+
+register(Detector(
+    key="std",
+    title="STD based",
+    parameters=(
+        Parameter("lookback_period", "Lookback", int, 14, 0, True, "--lookback", "STD/MAD: lookback period (STD: or auto)", auto=True),
+        Parameter("std_multiplier", "Multiplier", float, 2.0, 0, False, "--multiplier", "STD/MAD: std (scaled MAD) multiplier"),
+    ),
+    backends={
+        "vectorized": _bounded(calcs.calculations),
+        "parallel": _parallel_std,
+        "streaming": _streamed(streaming.RollingStdDetector),
+    },
+    batch=_batch_bounded(calcs.batch_calculations),
+    streaming=streaming.RollingStdDetector,
+    resolve=_resolve_lookback,
+))
+
+register(Detector(
+    key="kalman",
+    title="Kalman filters",
+    parameters=(
+        Parameter("measurement_noise", "Noise", float, 1.0, 0, False, "--measurement-noise", "Kalman: measurement noise"),
+        Parameter("outlier_threshold", "Threshold", float, 3.0, 0, True, "--threshold", "Kalman: outlier threshold"),
+    ),
+    backends={
+        calcs.KALMAN_BACKEND: _kalman,
+        "streaming": _streamed(streaming.KalmanDetector),
+    },
+    batch=_batch_kalman,
+    streaming=streaming.KalmanDetector,
+))
+
+register(Detector(
+    key="mad",
+    title="Rolling MAD",
+    parameters=(
+        Parameter("lookback_period", "Lookback", int, 14, 0, True, "--lookback", "STD/MAD: lookback period"),
+        Parameter("mad_multiplier", "Multiplier", float, 3.0, 0, False, "--multiplier", "STD/MAD: std (scaled MAD) multiplier"),
+    ),
+    backends={calcs.MEDIAN_BACKEND: _bounded(calcs.rolling_mad)},
+    batch=_batch_bounded(calcs.batch_rolling_mad),
+))
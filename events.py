@@ -0,0 +1,177 @@
+"""Sparse outlier events and an on-disk SQLite store to query them
+
+Detectors return dense labels the length of the series, but outliers are rare. extract_events()
+keeps only the labeled points (position, time, value and score) and EventStore persists them
+with an index on (series_id, ts), so questions like "all alerts of these tickers last month" are
+indexed range queries instead of re-running or loading dense arrays:
+
+    store = EventStore("events.db")
+    store.add("AAPL", extract_events(labels, prices, upper, lower, times), detector="std")
+    found = store.query(["AAPL", "TSLA"], start=time.time() - 30 * 86400)
+
+Query from the command line:
+    python events.py events.db --series AAPL TSLA --start 2024-01-01 --end 2024-02-01
+"""
+import argparse
+import sqlite3
+import sys
+import numpy as np
+
+EVENT_FIELDS = ("series_id", "detector", "position", "ts", "value", "score")
+
+#Largest number of series ids bound in one IN (...) clause
+_IDS_PER_QUERY = 500
+
+
+def outlier_positions(labels):
+    """Positions of the labeled points, without building a comparison array first"""
+    return np.flatnonzero(np.asarray(labels).reshape(-1))
+
+def extract_events(labels, data, upper=None, lower=None, times=None):
+    """Sparse events of a detection result\n
+    **args:**\n
+    labels = 0/1 labels (np)\n
+    data = the series (np)\n
+    upper, lower = bounds of the result, None for detectors without bounds (np/None)\n
+    times = POSIX seconds of every point, the position is used as time if None (np/None)\n
+    **returns:**\n
+    dict of position (np int64), ts (np int64), value (np) and score (np): the signed distance
+    from the middle of the band in half band widths (|score| >= 1 outside the band), NaN without bounds\n
+    """
+    positions = outlier_positions(labels)
+    values = np.asarray(data, dtype=float).reshape(-1)[positions]
+    ts = positions if times is None else np.asarray(times, dtype=np.int64).reshape(-1)[positions]
+
+    if upper is None:
+        score = np.full(len(positions), np.nan)
+    else:
+        high = np.asarray(upper, dtype=float).reshape(-1)[positions]
+        low = np.asarray(lower, dtype=float).reshape(-1)[positions]
+        half = (high - low) / 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = np.where(half > 0, (values - (high + low) / 2) / half, np.copysign(np.inf, values - high))
+
+    return {"position": positions.astype(np.int64), "ts": ts.astype(np.int64), "value": values, "score": score}
+
+
+class EventStore:
+    """SQLite store of outlier events, indexed by (series_id, ts)\n
+    Several processes may write to the same file, SQLite serializes them.\n
+    **args:**\n
+    path = database file, ":memory:" for a temporary store (str)\n
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60)
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "series_id TEXT NOT NULL, detector TEXT NOT NULL, position INTEGER NOT NULL, "
+                "ts INTEGER NOT NULL, value REAL, score REAL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS events_series_ts ON events (series_id, ts)")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def add(self, series_id, events, detector="", replace=True):
+        """Stores the events of one series, replacing its earlier events of the same detector\n
+        **returns:**\n
+        number of stored events (int)\n
+        """
+        rows = zip(
+            (series_id for _ in range(len(events["position"]))),
+            (detector for _ in range(len(events["position"]))),
+            events["position"].tolist(),
+            events["ts"].tolist(),
+            events["value"].tolist(),
+            [None if np.isnan(score) else score for score in events["score"].tolist()],
+        )
+        with self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM events WHERE series_id = ? AND detector = ?", (series_id, detector))
+            self.connection.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(events["position"])
+
+    def query(self, series_ids=None, start=None, end=None, detector=None):
+        """Events of the given series (all if None) with start <= ts < end, ordered by series and time\n
+        **returns:**\n
+        dict of EVENT_FIELDS -> np arrays\n
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("ts >= ?")
+            params.append(int(start))
+        if end is not None:
+            conditions.append("ts < ?")
+            params.append(int(end))
+        if detector is not None:
+            conditions.append("detector = ?")
+            params.append(detector)
+
+        rows = []
+        groups = [None] if series_ids is None else [list(series_ids)[i:i + _IDS_PER_QUERY] for i in range(0, len(series_ids), _IDS_PER_QUERY)]
+        for group in groups:
+            where = list(conditions)
+            values = list(params)
+            if group is not None:
+                where.insert(0, f"series_id IN ({', '.join('?' * len(group))})")
+                values = group + values
+            sql = "SELECT " + ", ".join(EVENT_FIELDS) + " FROM events"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            rows += self.connection.execute(sql + " ORDER BY series_id, ts", values).fetchall()
+
+        columns = list(zip(*rows)) if rows else [()] * len(EVENT_FIELDS)
+        dtypes = (object, object, np.int64, np.int64, float, float)
+        return {
+            field: np.array([np.nan if v is None else v for v in column] if dtype is float else column, dtype=dtype)
+            for field, column, dtype in zip(EVENT_FIELDS, columns, dtypes)
+        }
+
+    def count(self, series_id=None):
+        """Number of stored events, of one series or of all"""
+        if series_id is None:
+            return self.connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return self.connection.execute("SELECT COUNT(*) FROM events WHERE series_id = ?", (series_id,)).fetchone()[0]
+
+
+def _timestamp(text):
+    """POSIX seconds of a date/time string, or of a plain number"""
+    try:
+        return int(float(text))
+    except ValueError:
+        import pandas as pd
+        return int(pd.Timestamp(text, tz="UTC").timestamp())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the outlier events stored with cli.py --events-db")
+    parser.add_argument("database")
+    parser.add_argument("--series", nargs="+", help="series ids (file names without extension, or tickers)")
+    parser.add_argument("--start", type=_timestamp, help="date/time or POSIX seconds (positions for series without times)")
+    parser.add_argument("--end", type=_timestamp)
+    parser.add_argument("--detector")
+    options = parser.parse_args(argv)
+
+    with EventStore(options.database) as store:
+        found = store.query(options.series, options.start, options.end, options.detector)
+
+    print(",".join(EVENT_FIELDS))
+    for row in zip(*(found[field] for field in EVENT_FIELDS)):
+        print(",".join(str(value) for value in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
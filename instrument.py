@@ -0,0 +1,145 @@
+"""Lightweight instrumentation of the load -> clean -> detect -> plot stages
+
+Every stage writes one JSON line with its wall/CPU time and counters such as items or bytes:
+
+    with instrument.stage("detect", algorithm="STD based") as s:
+        labels = ...
+        s.count(items=len(data))
+
+Switched on with the WARNINGSE_TRACE environment variable (a file path, or "-" for stderr) or
+instrument.enable(). WARNINGSE_PROFILE=cprofile,tracemalloc adds the top functions and/or the
+peak traced memory of every stage. When disabled, stage() returns a shared no-op object, so
+the calls can stay in the code.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+#Number of functions reported per stage with cprofile
+PROFILE_TOP = 15
+
+_sink = None
+_profile = frozenset()
+_profiling = False
+
+
+def enable(path="-", profile=()):
+    """Starts writing stage records to path ("-" = stderr), profile may contain cprofile and tracemalloc"""
+    global _sink, _profile
+    disable()
+    _sink = sys.stderr if path == "-" else open(path, "a", buffering=1)
+    _profile = frozenset(profile)
+
+def disable():
+    global _sink, _profile
+    if _sink is not None and _sink is not sys.stderr:
+        _sink.close()
+    _sink = None
+    _profile = frozenset()
+
+def enabled():
+    return _sink is not None
+
+def emit(record):
+    """Writes one record as a JSON line"""
+    if _sink is not None:
+        _sink.write(json.dumps(record, default=str) + "\n")
+
+def event(name, **fields):
+    """Single record without timing, e.g. the size of a download"""
+    if _sink is not None:
+        emit({"stage": name, "time": time.time(), "pid": os.getpid(), **fields})
+
+
+class _NullStage:
+    """What stage() returns while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, **fields):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.profiler = None
+        self.tracing = False
+
+    def count(self, **fields):
+        """Adds counters (items, bytes, ...) to the record of the stage"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        global _profiling
+        # Nested stages are timed, only the outermost one is profiled
+        if "cprofile" in _profile and not _profiling:
+            self.profiler = cProfile.Profile()
+            _profiling = True
+        if "tracemalloc" in _profile and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+
+        self.start = time.time()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        global _profiling
+        if self.profiler is not None:
+            self.profiler.disable()
+            _profiling = False
+
+        record = {
+            "stage": self.name,
+            "time": self.start,
+            "pid": os.getpid(),
+            "seconds": time.perf_counter() - self.wall,
+            "cpu_seconds": time.process_time() - self.cpu,
+            **self.fields,
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+
+        if self.tracing:
+            record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        if self.profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            record["profile"] = out.getvalue()
+
+        emit(record)
+        return False
+
+
+def stage(name, **fields):
+    """Context manager timing one stage, see the module docstring"""
+    if _sink is None:
+        return _NULL_STAGE
+    return _Stage(name, fields)
+
+def _configure_from_env():
+    path = os.environ.get("WARNINGSE_TRACE")
+    if path:
+        profile = [name.strip() for name in os.environ.get("WARNINGSE_PROFILE", "").split(",") if name.strip()]
+        enable(path, profile)
+
+_configure_from_env()
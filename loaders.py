@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+#Rows read per chunk when streaming CSV files
+CSV_CHUNK_SIZE = 1_000_000
+
+#Preferred price columns, in order
+PRICE_COLUMNS = ("Close", "Adj Close")
+
+#Columns holding the bar/tick times, in order
+TIME_COLUMNS = ("Datetime", "Date", "Timestamp", "Time")
+
+
+def _price_column(columns):
+    """Name of the price column: Close, then Adj Close, then the second column, else the first"""
+    for name in PRICE_COLUMNS:
+        if name in columns:
+            return name
+    if len(columns) > 1:
+        return columns[1]
+    return columns[0]
+
+def _coerce(values):
+    """Vectorized float conversion of one chunk of the price column\n
+    **returns:**\n
+    prices (np), mask of the non-numeric entries (np)\n
+    """
+    values = pd.Series(values)
+    prices = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    invalid = np.isnan(prices) & values.notna().to_numpy()
+
+    #Text such as "nan" is a missing value, not an invalid one
+    if invalid.any():
+        invalid[invalid] = values[invalid].astype(str).str.strip().str.lower() != "nan"
+
+    return prices, invalid
+
+def load_npy(file_path):
+    """Price column of a .npy file\n
+    Numeric arrays are memory-mapped and the column is returned as a zero-copy (read-only) view.
+    Arrays of Python objects can't be memory-mapped and are loaded and converted instead.\n
+    **returns:**\n
+    prices (np), row numbers of non-numeric values (np)\n
+    """
+    try:
+        data = np.load(file_path, mmap_mode="r")
+    except ValueError:
+        data = np.load(file_path, allow_pickle=True)
+
+    column = data[:, 1] if data.ndim > 1 and data.shape[1] > 1 else data.reshape(len(data), -1)[:, 0]
+
+    if column.dtype == np.float64:
+        return column, np.array([], dtype=int)
+    if column.dtype.kind in "iuf":
+        return column.astype(float), np.array([], dtype=int)
+
+    prices, invalid = _coerce(column)
+    return prices, np.flatnonzero(invalid)
+
+def load_csv(file_path, chunksize=CSV_CHUNK_SIZE):
+    """Price column of a CSV file, streamed in chunks so only one chunk of text is in memory at a time\n
+    **returns:**\n
+    prices (np), row numbers of non-numeric values (np)\n
+    """
+    column = _price_column(list(pd.read_csv(file_path, nrows=0).columns))
+
+    chunks = []
+    invalid_rows = []
+    offset = 0
+    for chunk in pd.read_csv(file_path, usecols=[column], chunksize=chunksize):
+        prices, invalid = _coerce(chunk[column])
+        chunks.append(prices)
+        invalid_rows.append(np.flatnonzero(invalid) + offset)
+        offset += len(prices)
+
+    if not chunks:
+        return np.array([], dtype=float), np.array([], dtype=int)
+
+    return np.concatenate(chunks), np.concatenate(invalid_rows)
+
+def load_excel(file_path):
+    """Price column of an Excel file\n
+    **returns:**\n
+    prices (np), row numbers of non-numeric values (np)\n
+    """
+    df = pd.read_excel(file_path)
+    prices, invalid = _coerce(df[_price_column(list(df.columns))])
+    return prices, np.flatnonzero(invalid)
+
+def _time_column(columns):
+    for name in TIME_COLUMNS:
+        if name in columns:
+            return name
+    return None
+
+def load_times(file_path):
+    """Times of the rows of a .csv, .xlsx or .xls file with a Datetime/Date/Timestamp/Time column\n
+    **returns:**\n
+    POSIX seconds (np int64), or None if the file has no time column (.npy files never have one)\n
+    """
+    if file_path.endswith(".csv"):
+        column = _time_column(list(pd.read_csv(file_path, nrows=0).columns))
+        values = pd.read_csv(file_path, usecols=[column])[column] if column else None
+    elif file_path.endswith(".xlsx") or file_path.endswith(".xls"):
+        df = pd.read_excel(file_path)
+        column = _time_column(list(df.columns))
+        values = df[column] if column else None
+    else:
+        values = None
+
+    if values is None:
+        return None
+
+    times = pd.to_datetime(values, utc=True, errors="coerce")
+    if times.isna().any():
+        raise ValueError(f"Invalid times in column {values.name} of {file_path}")
+    return ((times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+def load_prices(file_path):
+    """Price column of a .npy, .csv, .xlsx or .xls file\n
+    **args:**\n
+    file_path = path of the file (str)\n
+    **returns:**\n
+    prices as float numpy array, NaN where missing or non-numeric (np)\n
+    row numbers (from 0) of the non-numeric values (np)\n
+    """
+    if file_path.endswith(".npy"):
+        return load_npy(file_path)
+    if file_path.endswith(".csv"):
+        return load_csv(file_path)
+    if file_path.endswith(".xlsx") or file_path.endswith(".xls"):
+        return load_excel(file_path)
+
+    raise ValueError(f"Unsupported file format: {file_path}")
@@ -1,61 +1,146 @@
 import sys
 import os
 import numpy as np
-import pandas as pd
-import yfinance as yf
-from PyQt5 import QtWidgets, uic
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.figure import Figure
+from PyQt5 import QtCore, QtWidgets
 import calcs
+import datasource
+import detectors
+import events
+import instrument
+import memo
+import plotting
+# Generated from warningSE.ui, after editing the .ui file run: pyuic5 warningSE.ui -o ui_warningSE.py
+from ui_warningSE import Ui_Dialog
+
+# pandas (through loaders), yfinance (through datasource) and matplotlib are imported on first use,
+# the window is shown before any of them is loaded. Check the startup time with startup.py.
+
+class Cancelled(Exception):
+    """Raised inside a running task once the user pressed Cancel"""
+
+
+class TaskWorker(QtCore.QObject):
+    """Runs a function on a worker thread and posts progress and results back through signals\n
+    The function is called with a progress(done, total) keyword argument which raises Cancelled
+    once cancel() has been called, so long computations stop at their next progress report.\n
+    """
+
+    progress = QtCore.pyqtSignal(int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_requested = False
 
-# def resource_path(relative_path):
-#     """ Get absolute path to resource, works for dev and for PyInstaller """
-#     try:
-#         # PyInstaller creates a temp folder and stores path in _MEIPASS
-#         base_path = sys._MEIPASS
-#     except Exception:
-#         base_path = os.path.abspath(".")
-
-#     return os.path.join(base_path, relative_path)
+    def cancel(self):
+        self.cancel_requested = True
 
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        # In development, use the folder where main.py is located
-        base_path = os.path.dirname(os.path.abspath(__file__))
+    def report(self, done, total):
+        if self.cancel_requested:
+            raise Cancelled()
+        self.progress.emit(int(100 * done / max(total, 1)))
 
-    return os.path.join(base_path, relative_path)
+    def run(self):
+        try:
+            result = self.function(*self.args, progress=self.report, **self.kwargs)
+        except Cancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
 
-class WarningSEApp(QtWidgets.QDialog):
+        # Calls that can't be interrupted (e.g. a download) are discarded afterwards
+        if self.cancel_requested:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(result)
+
+
+def download_prices(tickers, cache, progress):
+    """Downloads all tickers concurrently through the local cache (see datasource.download_many)\n
+    **returns:**\n
+    tickers (list), dict of ticker -> prices, dict of ticker -> error message\n
+    """
+    print(f"--- Starting download for: {', '.join(tickers)} ---")
+
+    with instrument.stage("download", tickers=len(tickers)) as stage:
+        series, errors = datasource.download_many(tickers, interval="1d", cache=cache, progress=progress)
+        stage.count(items=sum(len(prices) for _, prices in series.values()), failed=len(errors))
+
+    for ticker, error in errors.items():
+        print(f"Download of {ticker} failed ({error})")
+
+    return tickers, {ticker: prices for ticker, (_, prices) in series.items()}, {ticker: str(error) for ticker, error in errors.items()}
+
+def read_prices(file_path, progress):
+    """Reads the price column of a file, see loaders.load_prices"""
+    import loaders
+
+    progress(0, 1)
+    with instrument.stage("load", path=file_path, bytes=os.path.getsize(file_path)) as stage:
+        result = loaders.load_prices(file_path)
+        stage.count(items=len(result[0]), invalid=len(result[1]))
+    progress(1, 1)
+    return result
+
+def run_detection(data_col, detector, params, keep_zeros, results, progress):
+    """Cleaning and outlier detection of one Execute click\n
+    The cleaning only builds a validity mask, the detectors skip the invalid points themselves.
+    Results are memoized in results (memo.ResultCache), so repeated clicks return at once.
+    The mask and labels are cached bit-packed (calcs.pack_labels), 8 points per byte.\n
+    **returns:**\n
+    validity mask (np), detectors.DetectionResult\n
+    """
+    with instrument.stage("memo", items=len(data_col)) as stage:
+        key = results.key(data_col, detector.key, keep_zeros=keep_zeros, **params)
+        cached = results.get(key)
+        stage.count(hit=cached is not None)
+    if cached is not None:
+        progress(1, 1)
+        packed_mask, packed_labels, length, upper, lower, backend, used_params = cached
+        valid_mask = calcs.unpack_labels(packed_mask, length)
+        labels = calcs.unpack_labels(packed_labels, length)
+        return valid_mask, detectors.DetectionResult(labels, upper, lower, detector.key, backend, used_params)
+
+    with instrument.stage("clean", items=len(data_col), keep_zeros=keep_zeros) as stage:
+        valid_mask, counts = calcs.validity_mask(data_col, keep_zeros=keep_zeros)
+        stage.count(**counts)
+
+    with instrument.stage("detect", algorithm=detector.key, items=len(data_col), **params):
+        result = detector.run(data_col, progress=progress, mask=valid_mask, **params)
+
+    packed_mask, length = calcs.pack_labels(valid_mask)
+    packed_labels, _ = calcs.pack_labels(result.labels)
+    results.put(key, (packed_mask, packed_labels, length, result.upper, result.lower, result.backend, result.params), items=len(data_col))
+    return valid_mask, result
+
+class WarningSEApp(QtWidgets.QDialog, Ui_Dialog):
 
     def __init__(self):
         super().__init__()
 
-        # --- UPDATED LINE BELOW ---
-        # Use resource_path to find the UI file inside the EXE
-        ui_file = resource_path('warningSE.ui')
-        uic.loadUi(ui_file, self)
-        # --------------------------
+        # Interface precompiled from warningSE.ui, nothing is parsed at runtime
+        self.setupUi(self)
 
-    # def __init__(self):
-    #     super().__init__()
-
-    #     # Load interface
-    #     uic.loadUi(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'warningSE.ui'), self)
-
-        self.comboBox.addItem("STD based")
-        self.comboBox.addItem("Kalman filters")
+        # Detectors come from the registry, the input labels follow the selected one
+        for detector in detectors.available():
+            self.comboBox.addItem(detector.title)
+        self.comboBox.currentTextChanged.connect(self.detector_changed)
 
         # 2. Set "STD based" as default (Index 0)
         self.comboBox.setCurrentIndex(0)
+        self.detector_changed(self.comboBox.currentText())
 
         # Disable buttons at the start
         self.btn_execute.setEnabled(False)
         self.btn_export.setEnabled(False)
+        self.btn_cancel.setEnabled(False)
 
         # BUTTON CONNECTIONS
         # Load CSV/NPY file
@@ -66,12 +151,26 @@ class WarningSEApp(QtWidgets.QDialog):
         self.btn_execute.clicked.connect(self.execute_script_main)
         # Export graph to image
         self.btn_export.clicked.connect(self.export_plot)
+        # Cancel the running task
+        self.btn_cancel.clicked.connect(self.cancel_task)
         # Checkbox
         self.zero_checkbox.toggled.connect(self.get_checkbox_value)
         
         # VARIABLES
         self.data = None
         self.labels = None
+        # Parameters of the last Execute, "auto" where the detector chooses
+        self.detection_params = {}
+
+        # Local cache of the Yahoo Finance downloads
+        self.series_cache = datasource.SeriesCache()
+
+        # Memoized detection results, large ones are also kept between sessions
+        self.result_cache = memo.ResultCache(directory=memo.RESULTS_DIR)
+
+        # Background task (download, file loading, detection)
+        self.worker = None
+        self.worker_thread = None
 
         # Plot variables
         self.figure = None
@@ -79,6 +178,18 @@ class WarningSEApp(QtWidgets.QDialog):
         self.toolbar = None
         self.original_data_col = None
         self.original_labels = None
+
+        # Plot artists, reused between runs (set_data instead of a new canvas)
+        self.ax = None
+        self.plot_series = []
+        self.outlier_positions = np.array([], dtype=int)
+        self.outlier_values = np.array([])
+
+        # Redraws are coalesced: resize events and zooms only restart this timer
+        self.redraw_timer = QtCore.QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(100)
+        self.redraw_timer.timeout.connect(self.refresh_plot)
          
 
         # Layout for the plot
@@ -93,6 +204,55 @@ class WarningSEApp(QtWidgets.QDialog):
 
         return keep_zeros
 
+    def set_busy(self, busy):
+        """Enables/disables the buttons while a background task runs"""
+        self.btn_generate_values.setEnabled(not busy)
+        self.csv_button_input.setEnabled(not busy)
+        self.btn_execute.setEnabled(not busy and self.data is not None)
+        self.btn_cancel.setEnabled(busy)
+        if busy:
+            self.progress_bar.setValue(0)
+
+    def start_task(self, on_finished, function, *args, **kwargs):
+        """Runs function(*args, **kwargs) on a worker thread, on_finished(result) runs back on the GUI thread"""
+        self.set_busy(True)
+
+        self.worker_thread = QtCore.QThread(self)
+        self.worker = TaskWorker(function, *args, **kwargs)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.finished.connect(self.task_done)
+        self.worker.failed.connect(self.task_done)
+        self.worker.cancelled.connect(self.task_done)
+        self.worker.finished.connect(on_finished)
+        self.worker.failed.connect(self.task_failed)
+        self.worker.cancelled.connect(self.task_cancelled)
+
+        self.worker_thread.start()
+
+    def task_done(self, *args):
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.worker_thread.deleteLater()
+        self.worker.deleteLater()
+        self.worker = None
+        self.worker_thread = None
+        self.set_busy(False)
+
+    def task_failed(self, message):
+        print(f"CRITICAL ERROR: {message}")
+        QtWidgets.QMessageBox.critical(self, "Error", f"Task failed: {message}")
+
+    def task_cancelled(self):
+        print("Task cancelled.")
+        self.progress_bar.setValue(0)
+
+    def cancel_task(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
     def download_data_from_yahoo(self):
         """Robust download method compatible with new yfinance versions"""
         
@@ -104,53 +264,42 @@ class WarningSEApp(QtWidgets.QDialog):
             QtWidgets.QMessageBox.warning(self, "Error", "Please enter a ticker symbol (e.g. AAPL)")
             return
         
-        tickers = tickers_text.replace(',', ' ').split()
-        unique_tickers = set(tickers)
+        tickers = list(dict.fromkeys(tickers_text.replace(',', ' ').split()))
         print(len(tickers))
-        count = len(unique_tickers)
-        if count > 1:
-            QtWidgets.QMessageBox.warning(self,"The amount of tickers is more than 1"f' :{len(tickers)}', f'Using: {tickers[0]}')
 
-        try:
-            print(f"--- Starting download for: {tickers[0]} ---")
+        # 2. Download on a worker thread, through the local cache: only the missing tail is fetched.
+        # All tickers land in the cache, the first one that has data is shown
+        self.start_task(self.download_finished, download_prices, tickers, self.series_cache)
 
-            # 2. Download
-            df = yf.download(tickers[0], period="1y", interval="1d", progress=False, auto_adjust=True)
+    def download_finished(self, result):
+        tickers, series, errors = result
 
-            print("Download completed by yfinance.")
-            print(f"Data dimensions: {df.shape}")
+        print("Download completed.")
 
-            if df.empty:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Error",
-                    f"No data found for {tickers[0]}. Check spelling or internet connection."
-                )
-                return
-
-            # 3. Clean data
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-
-            # Ensure we have a price column
-            if 'Close' not in df.columns:
-                print("Column 'Close' not found, using first available column.")
-                prices = df.iloc[:, 0].values.flatten()
-            else:
-                prices = df['Close'].values.flatten()
+        if not series:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Error",
+                f"No data found for {', '.join(tickers)}. Check spelling or internet connection."
+            )
+            return
 
-            # 4. Create structure for the algorithm
-            indices = np.arange(len(prices))
-            self.data = np.column_stack((indices, prices))
+        ticker = next(name for name in tickers if name in series)
+        prices = series[ticker]
+        print(f"Data dimensions: {prices.shape}")
 
-            print("Data processed successfully. Ready to run.")
+        # 4. Only the prices are kept, the index is the position in the array
+        self.data = np.asarray(prices, dtype=float).reshape(-1)
 
-            QtWidgets.QMessageBox.information(self, "Success", f"Downloaded {len(prices)} days for {tickers[0]}")
-            self.btn_execute.setEnabled(True)
+        print("Data processed successfully. Ready to run.")
 
-        except Exception as e:
-            print(f"CRITICAL ERROR: {e}")
-            QtWidgets.QMessageBox.critical(self, "Error", f"Failed to download: {str(e)}")
+        message = f"Downloaded {len(prices)} days for {ticker}"
+        if len(series) > 1:
+            message += f"\n\nAlso stored in the local cache: {', '.join(name for name in series if name != ticker)}"
+        if errors:
+            message += f"\n\nFailed: {', '.join(errors)}"
+        QtWidgets.QMessageBox.information(self, "Success", message)
+        self.btn_execute.setEnabled(True)
 
     def load_file(self):
         """Load files and show path in csv_txt_input"""
@@ -167,57 +316,29 @@ class WarningSEApp(QtWidgets.QDialog):
 
         self.csv_txt_input.setText(file_path)
 
-        try:
-            # -------------------------------------------------------
-            # CASE A: NumPy (.npy)
-            # -------------------------------------------------------
-            if file_path.endswith('.npy'):
-                self.data = np.load(file_path, allow_pickle=True)
-
-                # Attempt to extract price column
-                raw_prices = self.data[:, 1].astype(str)
-
-            # -------------------------------------------------------
-            # CASE B: CSV / Excel
-            # -------------------------------------------------------
-            else:
-                if file_path.endswith('.csv'):
-                    df = pd.read_csv(file_path)
-                elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-                    df = pd.read_excel(file_path)
-                else:
-                    QtWidgets.QMessageBox.warning(
-                        self,
-                        "Invalid Format",
-                        f"The selected file does not have the correct format. Please try again with another file"
-                    )
-                    self.data = None
-                    self.btn_execute.setEnabled(False)
-                
-                # Select price column
-                if 'Close' in df.columns:
-                    raw_prices = df['Close'].astype(str).values
-                elif 'Adj Close' in df.columns:
-                    raw_prices = df['Adj Close'].astype(str).values
-                elif len(df.columns) > 1:
-                    raw_prices = df.iloc[:, 1].astype(str).values
-                else:
-                    raw_prices = df.iloc[:, 0].astype(str).values
+        # -------------------------------------------------------
+        # STEP 1 — Read the price column and detect invalid (non-numeric) values
+        # -------------------------------------------------------
+        # .npy files are memory-mapped and CSVs are streamed in chunks,
+        # non-numeric values come back as NaN with their row numbers
+        if not file_path.endswith(('.npy', '.csv', '.xlsx', '.xls')):
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Invalid Format",
+                f"The selected file does not have the correct format. Please try again with another file"
+            )
+            self.data = None
+            self.btn_execute.setEnabled(False)
+            return
 
-            # -------------------------------------------------------
-            # STEP 1 — Detect invalid (non-numeric) values
-            # -------------------------------------------------------
-            invalid_indices = []
-            clean_prices = []
+        self.start_task(self.file_loaded, read_prices, file_path)
 
-            for i, val in enumerate(raw_prices):
-                try:
-                    clean_prices.append(float(val))
-                except ValueError:
-                    invalid_indices.append(i)
-                    clean_prices.append(np.nan)
+    def file_loaded(self, result):
+        """Handles invalid and missing values of a freshly read file, on the GUI thread"""
+        file_path = self.csv_txt_input.text()
 
-            clean_prices = np.array(clean_prices, dtype=float)
+        try:
+            clean_prices, invalid_indices = result
 
             # If invalid (text) values exist → ask user
             if len(invalid_indices) > 0:
@@ -226,7 +347,7 @@ class WarningSEApp(QtWidgets.QDialog):
                 msg.setIcon(QtWidgets.QMessageBox.Warning)
                 msg.setText(
                     "The file contains invalid (non-numeric) values in these rows:\n"
-                    f"{[i + 1 for i in invalid_indices]}\n\n"
+                    f"{(invalid_indices + 1).tolist()}\n\n"
                     "What would you like to do?"
                 )
 
@@ -255,7 +376,7 @@ class WarningSEApp(QtWidgets.QDialog):
             # -------------------------------------------------------
             # STEP 2 — Detect NaN values (after cleaning text)
             # -------------------------------------------------------
-            nan_rows = np.where(pd.isna(prices))[0]
+            nan_rows = np.where(np.isnan(prices))[0]
 
             if len(nan_rows) > 0:
                 msg = QtWidgets.QMessageBox(self)
@@ -289,10 +410,9 @@ class WarningSEApp(QtWidgets.QDialog):
                     prices = np.nan_to_num(prices, nan=0.0)
 
             # -------------------------------------------------------
-            # Step 3 — Build final numeric data structure
+            # Step 3 — Build final numeric data structure (prices only, the index is implicit)
             # -------------------------------------------------------
-            indices = np.arange(len(prices))
-            self.data = np.column_stack((indices, prices))
+            self.data = np.asarray(prices, dtype=float).reshape(-1)
 
             print(f"File loaded successfully: {file_path}")
             self.btn_execute.setEnabled(True)
@@ -301,262 +421,104 @@ class WarningSEApp(QtWidgets.QDialog):
             print(f"Error loading file: {e}")
             QtWidgets.QMessageBox.critical(self, "Error", f"Could not read file: {str(e)}")
 
-    def execute_script(self):
-        # Original logic intact
-
-        keep_zeros = self.get_checkbox_value()
-
-        if self.data is not None:
-            data_col = self.data[:, 1:2]
-
-            self.my_data,_ = calcs.clean_data(data = data_col, keep_zeros=keep_zeros)
-
-            try:
-                # Get text from input fields
-                lookbackField = int(self.loockback_txtField.text())
-                multiplierField = float(self.multiplier_txtField.text())
-
-            except ValueError:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Invalid Input",
-                    "Please enter valid numbers. Lookback must be an integer."
-                )
-                return
-
-            # Validate positive values
-            if lookbackField <= 0:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Invalid Lookback",
-                    "Lookback must be a positive integer."
-                )
-                return
-
-            if multiplierField < 0:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Invalid Multiplier",
-                    "Multiplier must be zero or positive."
-                )
-                return
-
-            # Call your calculation module
-            self.labels, self.upper, self.bottom, boundaries = calcs.calculations(
-                data=data_col,
-                lookback_period=lookbackField,
-                std_multiplier=multiplierField
-            )
-
-            # Clear previous graph
-            if self.canvas is not None:
-                for i in reversed(range(self.plot_view_result.layout().count())):
-                    widget_to_remove = self.plot_view_result.layout().itemAt(i).widget()
-                    if widget_to_remove is not None:
-                        widget_to_remove.setParent(None)
-                self.canvas = None
-                self.toolbar = None
-
-            # Create new plot
-            self.figure = Figure()
-            self.canvas = FigureCanvas(self.figure)
-            self.canvas.setSizePolicy(
-                QtWidgets.QSizePolicy.Expanding,
-                QtWidgets.QSizePolicy.Expanding
-            )
-            self.plot_view_result.layout().addWidget(self.canvas)
-
-            self.toolbar = NavigationToolbar(self.canvas, self)
-            self.plot_view_result.layout().addWidget(self.toolbar)
-
-            self.original_data_col = data_col
-            self.original_labels = self.labels
-
-            self.plot_data(self.original_data_col, self.original_labels, boundaries)
-            self.btn_export.setEnabled(True)
+    def detector_changed(self, title):
+        """Shows the parameter names of the selected detector next to the input fields"""
+        parameters = detectors.get(title).parameters
+        self.label_6.setText(f"{parameters[0].label}: ")
+        self.label_7.setText(f"{parameters[1].label}:")
 
     def execute_script_main(self):
         keep_zeros = self.get_checkbox_value()
 
         if self.data is not None:
-            data_col = self.data[:, 1:2]
-            self.my_data, _ = calcs.clean_data(data=data_col, keep_zeros=keep_zeros)
+            data_col = self.data
 
             # 1. Get the selected algorithm
-            selected_algo = self.comboBox.currentText()
+            detector = detectors.get(self.comboBox.currentText())
 
             try:
                 # Get text from input fields (Shared inputs)
-                # We treat loockback_txtField as Input 1 and multiplier_txtField as Input 2
-                input1 = int(self.loockback_txtField.text())
-                input2 = float(self.multiplier_txtField.text())
+                # loockback_txtField is the first parameter of the detector and multiplier_txtField the second
+                texts = (self.loockback_txtField.text(), self.multiplier_txtField.text())
+                params = {parameter.name: parameter.parse(text) for parameter, text in zip(detector.parameters, texts)}
 
             except ValueError:
                 QtWidgets.QMessageBox.warning(self, "Invalid Input", "Please enter valid numbers.")
                 return
 
-            # 2. Branch Logic based on ComboBox
-            if selected_algo == "STD based":
-                # Validation for STD inputs
-                if input1 <= 0 or input2 < 0:
-                    QtWidgets.QMessageBox.warning(self, "Invalid Input", "Lookback > 0, Multiplier >= 0")
-                    return
-
-                # Call STD calculation
-                # Returns 4 values: labels, upper, bottom, boundaries
-                self.labels, self.upper, self.bottom, boundaries = calcs.calculations(
-                    data=data_col,
-                    lookback_period=input1,
-                    std_multiplier=input2
-                )
-
-            elif selected_algo == "Kalman filters":
-                # Validation for Kalman inputs (mapped based on your execute_kalman_script logic)
-                # input1 = measurement_noise, input2 = outlier_threshold
-                if input1 < 0 or input2 <= 0:
-                    QtWidgets.QMessageBox.warning(self, "Invalid Input", "Noise >= 0, Threshold > 0")
-                    return
+            # 2. Validation against the parameter rules of the detector
+            try:
+                params = detector.validate(params)
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "Invalid Input", str(e))
+                return
 
-                # Call Kalman calculation
-                # Returns only 2 values: labels, boundaries (See calcs.py)
-                self.labels, boundaries = calcs.kalman_filters(
-                    data=data_col,
-                    outlier_threshold=input2,
-                    measurement_noise=input1
-                )
-                
-                # Kalman doesn't return bands in your calcs.py, so we set them to None
-                self.upper = None
-                self.bottom = None
-
-            # 3. Graphing Logic (Shared)
-            # Clear previous graph
-            if self.canvas is not None:
-                for i in reversed(range(self.plot_view_result.layout().count())):
-                    widget_to_remove = self.plot_view_result.layout().itemAt(i).widget()
-                    if widget_to_remove is not None:
-                        widget_to_remove.setParent(None)
-                self.canvas = None
-                self.toolbar = None
-
-            # Create new plot
-            self.figure = Figure()
-            self.canvas = FigureCanvas(self.figure)
-            self.canvas.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
-            self.plot_view_result.layout().addWidget(self.canvas)
-
-            self.toolbar = NavigationToolbar(self.canvas, self)
-            self.plot_view_result.layout().addWidget(self.toolbar)
-
-            self.original_data_col = data_col
-            self.original_labels = self.labels
-
-            # Plot data (Works for both because boundaries=False for Kalman)
-            self.plot_data(self.original_data_col, self.original_labels, boundaries)
-            self.btn_export.setEnabled(True)
-
-    def execute_kalman_script(self):
-        # Original logic intact
+            # Cleaning and detection run on a worker thread
+            self.detection_params = params
+            self.start_task(self.detection_finished, run_detection, data_col, detector, params, keep_zeros, self.result_cache)
 
-        keep_zeros = self.get_checkbox_value()
+    def detection_finished(self, result):
+        # Detectors without bands (Kalman) have upper/lower None
+        self.valid_mask, detection = result
+        self.labels, self.upper, self.bottom = detection.labels, detection.upper, detection.lower
 
-        if self.data is not None:
-            data_col = self.data[:, 1:2]
+        # Values chosen by "auto" are reported, the input field keeps "auto" for the next run
+        for parameter in detectors.get(detection.detector).parameters:
+            if self.detection_params.get(parameter.name) == "auto":
+                print(f"Auto {parameter.label.lower()}: {detection.params[parameter.name]}")
 
-            self.my_data,_ = calcs.clean_data(data = data_col, keep_zeros=keep_zeros)
+        # Points left out by the cleaning are shown as gaps
+        data_col = np.where(self.valid_mask, self.data, np.nan)
 
-            try:
-                # Get text from input fields
-                meas_noise = int(self.loockback_txtField.text())
-                outl_thresh = float(self.multiplier_txtField.text())
+        # 3. Graphing Logic (Shared)
+        # The canvas is created on the first run and reused afterwards
+        self.ensure_canvas()
 
-            except ValueError:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Invalid Input",
-                    "Please enter valid numbers. Lookback must be an integer."
-                )
-                return
+        self.original_data_col = data_col
+        self.original_labels = self.labels
 
-            # Validate positive values
-            if outl_thresh <= 0:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Invalid Outlier Threshold",
-                    "Outlier Threshold must be a positive integer."
-                )
-                return
+        # Plot data (Works for all detectors because boundaries=False without bands)
+        with instrument.stage("plot", items=len(data_col), elapsed=detection.elapsed, backend=detection.backend):
+            self.plot_data(self.original_data_col, self.original_labels, detection.boundaries)
+        self.btn_export.setEnabled(True)
 
-            if meas_noise < 0:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Invalid Multiplier",
-                    "Multiplier must be zero or positive."
-                )
-                return
-
-            # Call your calculation module
-            self.labels, self.upper, self.bottom, boundaries = calcs.kalman_filters(
-                data=data_col,
-                outlier_threshold=outl_thresh, 
-                measurement_noise=meas_noise
-            )
-
-            # Clear previous graph
-            if self.canvas is not None:
-                for i in reversed(range(self.plot_view_result.layout().count())):
-                    widget_to_remove = self.plot_view_result.layout().itemAt(i).widget()
-                    if widget_to_remove is not None:
-                        widget_to_remove.setParent(None)
-                self.canvas = None
-                self.toolbar = None
-
-            # Create new plot
-            self.figure = Figure()
-            self.canvas = FigureCanvas(self.figure)
-            self.canvas.setSizePolicy(
-                QtWidgets.QSizePolicy.Expanding,
-                QtWidgets.QSizePolicy.Expanding
-            )
-            self.plot_view_result.layout().addWidget(self.canvas)
+    def ensure_canvas(self):
+        """Creates the figure, canvas and toolbar once, later runs reuse them"""
+        if self.canvas is not None:
+            return
 
-            self.toolbar = NavigationToolbar(self.canvas, self)
-            self.plot_view_result.layout().addWidget(self.toolbar)
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.figure import Figure
 
-            self.original_data_col = data_col
-            self.original_labels = self.labels
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        self.plot_view_result.layout().addWidget(self.canvas)
 
-            self.plot_data(self.original_data_col, self.original_labels, boundaries)
-            self.btn_export.setEnabled(True)
+        self.toolbar = NavigationToolbar(self.canvas, self)
+        self.plot_view_result.layout().addWidget(self.toolbar)
 
-    def plot_data(self, data_col, labels, boundaries):
-        """Helper function to plot the financial line chart with outlier alerts"""
+    def create_axes(self):
+        """Axes and empty line artists, filled later with set_data"""
         self.figure.clear()
         ax = self.figure.add_subplot(111)
 
-        x_data = np.arange(len(data_col))
-
-        # 1. PLOT PRICE LINE (Trend)
-        ax.plot(x_data, data_col, color='#1f77b4', linewidth=1.5, label='Price History', alpha=0.8)
-
-        # Plot boundaries
-        if boundaries == True:
-            ax.plot(x_data,self.upper, color='#32CD32', linewidth=1, label='Upper boundary', alpha=0.4)
-            ax.plot(x_data,self.bottom, color='#e10000', linewidth=1, label='Bottom boundary', alpha=0.4)
-        
-        # 2. PLOT ONLY OUTLIERS (Red Points)
-        outlier_mask = labels.flatten() == 1
-
-        if np.any(outlier_mask):
-            ax.scatter(
-                x_data[outlier_mask],
-                data_col[outlier_mask],
-                color='red',
-                s=60,
-                edgecolor='black',
-                label='Anomaly / Outlier',
-                zorder=5
-            )
+        # 1. PRICE LINE (Trend) and boundaries
+        self.price_line, = ax.plot([], [], color='#1f77b4', linewidth=1.5, label='Price History', alpha=0.8)
+        self.upper_line, = ax.plot([], [], color='#32CD32', linewidth=1, label='Upper boundary', alpha=0.4)
+        self.bottom_line, = ax.plot([], [], color='#e10000', linewidth=1, label='Bottom boundary', alpha=0.4)
+
+        # 2. OUTLIERS (Red Points)
+        self.outlier_points = ax.scatter(
+            [],
+            [],
+            color='red',
+            s=60,
+            edgecolor='black',
+            label='Anomaly / Outlier',
+            zorder=5
+        )
 
         # 3. FINANCIAL STYLING
         ax.set_title("Price Evolution & Anomaly Detection")
@@ -565,8 +527,67 @@ class WarningSEApp(QtWidgets.QDialog):
 
         ax.grid(True, which='major', linestyle='--', linewidth=0.5, color='grey', alpha=0.5)
 
-        ax.legend()
-        self.canvas.draw()
+        # Zooming/panning recomputes the level of detail of the visible range
+        ax.callbacks.connect('xlim_changed', self.schedule_redraw)
+        self.ax = ax
+
+    def plot_data(self, data_col, labels, boundaries):
+        """Helper function to plot the financial line chart with outlier alerts\n
+        Lines only get a min/max decimated copy of the visible range (see plotting.minmax_decimate).
+        """
+        if self.ax is None or self.ax.figure is not self.figure:
+            self.create_axes()
+        ax = self.ax
+
+        data_col = np.asarray(data_col).reshape(-1)
+
+        # Full resolution series behind each line
+        self.plot_series = [(self.price_line, data_col)]
+        handles = [self.price_line]
+
+        # Plot boundaries
+        if boundaries == True:
+            self.plot_series += [(self.upper_line, self.upper), (self.bottom_line, self.bottom)]
+            handles += [self.upper_line, self.bottom_line]
+        else:
+            self.upper_line.set_data([], [])
+            self.bottom_line.set_data([], [])
+        self.upper_line.set_visible(boundaries == True)
+        self.bottom_line.set_visible(boundaries == True)
+
+        # Outliers are few, all of them in the visible range are drawn
+        self.outlier_positions = events.outlier_positions(labels)
+        self.outlier_values = data_col[self.outlier_positions]
+        if len(self.outlier_positions) > 0:
+            handles.append(self.outlier_points)
+
+        self.update_lines(0, len(data_col))
+        ax.relim()
+        ax.autoscale_view()
+
+        ax.legend(handles=handles)
+        self.canvas.draw_idle()
+
+    def update_lines(self, start, stop):
+        for line, values in self.plot_series:
+            x, y = plotting.minmax_decimate(values, start, stop)
+            line.set_data(x, y)
+
+        first, last = np.searchsorted(self.outlier_positions, [start, stop])
+        self.outlier_points.set_offsets(np.column_stack((self.outlier_positions[first:last], self.outlier_values[first:last])))
+
+    def schedule_redraw(self, *args):
+        self.redraw_timer.start()
+
+    def refresh_plot(self):
+        """Recomputes the decimated lines for the visible range (plus one screen on both sides for panning)"""
+        if self.ax is None or not self.plot_series:
+            return
+
+        x_min, x_max = self.ax.get_xlim()
+        span = x_max - x_min
+        self.update_lines(int(np.floor(x_min - span)), int(np.ceil(x_max + span)) + 1)
+        self.canvas.draw_idle()
 
     def export_plot(self):
         if self.figure is not None:
@@ -579,11 +600,14 @@ class WarningSEApp(QtWidgets.QDialog):
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.canvas is not None:
-            self.canvas.draw()
+            self.schedule_redraw()
 
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     window = WarningSEApp()
     window.show()
+    # startup.py times the start up to the shown window
+    if os.environ.get("WARNINGSE_STARTUP_EXIT"):
+        QtCore.QTimer.singleShot(0, app.quit)
     sys.exit(app.exec_())
\ No newline at end of file
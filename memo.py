@@ -0,0 +1,198 @@
+"""Memoization of detection results, keyed by a fingerprint of the input and the parameters
+
+    cache = ResultCache()
+    key = cache.key(data, "STD based", lookback=14, multiplier=2.0)
+    result = cache.get(key)
+    if result is None:
+        result = cache.put(key, calcs.calculations(data, 14, 2.0))
+
+Results are tuples of numpy arrays and plain values (bool, int, float, None). The arrays are
+stored read-only and handed out as is, so a hit costs nothing. The memory used by the arrays is
+bounded, the least recently used results are evicted first. With a directory, results of large
+inputs are also written to disk (one .npz per key) and found again in the next session.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+#Default location of the results persisted between sessions
+RESULTS_DIR = os.path.join(os.path.expanduser("~"), ".warningSE", "results")
+
+#Layout of the cached results, part of every key so results persisted by an older layout are never
+#read back. Bump it whenever the tuple a caller caches changes
+CACHE_FORMAT = 1
+
+
+#Bytes hashed per chunk of a non-contiguous array (e.g. a column view of a memory-mapped .npy)
+_HASH_CHUNK = 1 << 22
+
+def fingerprint(data):
+    """Fast hash (blake2b) of the buffer, dtype and shape of an array\n
+    Strided views are hashed in contiguous chunks of rows, never copied whole.\n
+    """
+    data = np.asarray(data)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{data.dtype.str}{data.shape}".encode())
+    if data.flags.c_contiguous or data.ndim == 0:
+        digest.update(memoryview(np.ascontiguousarray(data)).cast("B"))
+    else:
+        rows = max(1, _HASH_CHUNK // max(data[:1].nbytes, 1))
+        for start in range(0, len(data), rows):
+            digest.update(memoryview(np.ascontiguousarray(data[start:start + rows])).cast("B"))
+    return digest.hexdigest()
+
+def _result_bytes(result):
+    return sum(item.nbytes for item in result if isinstance(item, np.ndarray))
+
+def _freeze(result):
+    """Tuple with read-only arrays, so callers can't change a cached result in place"""
+    frozen = []
+    for item in result:
+        if isinstance(item, np.ndarray):
+            item = item.copy() if item.flags.writeable and not item.flags.owndata else item
+            item.setflags(write=False)
+        frozen.append(item)
+    return tuple(frozen)
+
+
+class ResultCache:
+    """Thread safe LRU cache of detection results\n
+    **args:**\n
+    max_bytes = memory used by the cached arrays before the least recently used are evicted (int)\n
+    directory = folder of the persisted results, nothing is written to disk if None (str/None)\n
+    persist_min_items = only results of inputs with at least this many items are persisted (int)\n
+    max_disk_bytes = size of the folder before the least recently used files are removed (int)\n
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, directory=None, persist_min_items=1_000_000, max_disk_bytes=2 * 2**30):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.persist_min_items = persist_min_items
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, data, algorithm, **params):
+        """Key of a result: fingerprint of the input, CACHE_FORMAT, algorithm name and parameters"""
+        params = json.dumps(params, sort_keys=True, default=str)
+        return f"{fingerprint(data)}-{hashlib.blake2b(f'{CACHE_FORMAT}|{algorithm}|{params}'.encode(), digest_size=8).hexdigest()}"
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key):
+        """Cached result or None, looked up in memory first and then on disk"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        result = self._load(key)
+        if result is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._store(key, result)
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, result, items=None):
+        """Caches a result (tuple) and returns it with read-only arrays\n
+        items = size of the input, decides if the result is persisted (int/None = never)\n
+        """
+        result = _freeze(result)
+        self._store(key, result)
+        if self.directory is not None and items is not None and items >= self.persist_min_items:
+            self._save(key, result)
+        return result
+
+    def clear(self):
+        """Empties the memory part of the cache, persisted results stay"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key, result):
+        size = _result_bytes(result)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= _result_bytes(self._entries.pop(key))
+            # A result larger than the whole budget is not kept in memory
+            if size > self.max_bytes:
+                return
+            self._entries[key] = result
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _result_bytes(evicted)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _save(self, key, result):
+        """Writes the arrays as item_<i> and the other values as JSON in a 'values' entry"""
+        arrays = {}
+        values = {}
+        for i, item in enumerate(result):
+            if isinstance(item, np.ndarray):
+                arrays[f"item_{i}"] = item
+            else:
+                values[str(i)] = item.item() if isinstance(item, np.generic) else item
+
+        path = self._path(key)
+        tmp_path = path[:-4] + ".tmp.npz"
+        np.savez(tmp_path, values=np.array(json.dumps({"length": len(result), "values": values})), **arrays)
+        os.replace(tmp_path, path)
+        self._trim_disk()
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as stored:
+                meta = json.loads(str(stored["values"]))
+                result = tuple(
+                    stored[f"item_{i}"] if f"item_{i}" in stored.files else meta["values"].get(str(i))
+                    for i in range(meta["length"])
+                )
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # The modification time is the last use for the disk LRU
+        os.utime(path, (time.time(), time.time()))
+        return _freeze(result)
+
+    def _trim_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,433 @@
+"""Live monitoring: ticks from streaming sources through the incremental detectors, alerts to sinks
+
+Everything runs on one asyncio loop. Sources put micro-batches of ticks into a bounded queue, one
+consumer feeds them tick by tick to a streaming detector per symbol (see streaming.py) and every
+alert is handed to the sinks. Each sink has its own bounded queue and task, so a slow sink
+(e.g. a webhook) drops its oldest alerts instead of holding up the detection:
+
+    monitor = Monitor("std", {"lookback_period": 14, "std_multiplier": 2}, sinks=[LogSink()])
+    stats = asyncio.run(monitor.run([replay(prices, "BTC-USD", rate=2000)]))
+
+Sources: replay() of an array or a .npy/.csv file at a given speed, tail() of a growing text file
+and connect() to a TCP feed. The line format of the last two is "symbol,price[,time]".
+
+Examples:
+    python monitor.py --replay btc-usd.npy --rate 500
+    python monitor.py --replay btc-usd.npy --copies 500 --rate 0 --algorithm kalman --threshold 3
+    python monitor.py --tail ticks.csv --connect localhost:9000 --webhook http://localhost:8080/alerts
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+import numpy as np
+import detectors
+import instrument
+
+#Ticks per micro-batch of the replay at full speed, and seconds between batches otherwise
+REPLAY_BATCH = 1024
+REPLAY_INTERVAL = 0.01
+
+#Latencies kept for the percentiles of the stats
+LATENCY_WINDOW = 100_000
+
+
+@dataclass
+class Alert:
+    """A tick that starts a new outlier\n
+    symbol = series of the tick (str)\n
+    time = time of the tick, POSIX seconds or position (float)\n
+    price = price of the tick (float)\n
+    upper, lower = bounds the tick was outside of, None for detectors without bounds (float/None)\n
+    latency = seconds from the arrival of the tick to the alert (float)\n
+    """
+    symbol: str
+    time: float
+    price: float
+    upper: float = None
+    lower: float = None
+    latency: float = 0.0
+
+
+class MonitorStats:
+    """Throughput and end-to-end latency of a monitoring run"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.ticks = 0
+        self.alerts = 0
+        self.dropped = 0
+        self.symbols = 0
+        self._latencies = np.zeros(LATENCY_WINDOW)
+        self._count = 0
+
+    def record_latency(self, latency):
+        self._latencies[self._count % LATENCY_WINDOW] = latency
+        self._count += 1
+
+    def report(self):
+        """dict of ticks, alerts, dropped alerts, symbols, ticks per second and the percentiles in ms
+        of the latency from the arrival of a micro-batch to the end of its detection\n
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        latencies = self._latencies[:min(self._count, LATENCY_WINDOW)] * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            "ticks": self.ticks,
+            "alerts": self.alerts,
+            "dropped": self.dropped,
+            "symbols": self.symbols,
+            "elapsed": elapsed,
+            "ticks_per_second": self.ticks / elapsed,
+            "latency_p50_ms": float(p50),
+            "latency_p99_ms": float(p99),
+            "latency_max_ms": float(latencies.max()) if len(latencies) else 0.0,
+        }
+
+
+# Sinks: objects with an async (or plain) send(alert)
+
+class LogSink:
+    """Writes every alert as one line to a stream (stdout by default)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def send(self, alert):
+        bounds = "" if alert.upper is None else f" outside [{alert.lower:.6g}, {alert.upper:.6g}]"
+        print(f"ALERT {alert.symbol} t={alert.time:g} price={alert.price:.6g}{bounds} ({alert.latency * 1000:.1f} ms)",
+              file=self.stream or sys.stdout)
+
+class CallbackSink:
+    """Calls function(alert), a plain function or a coroutine function"""
+
+    def __init__(self, function):
+        self.function = function
+
+    async def send(self, alert):
+        result = self.function(alert)
+        if inspect.isawaitable(result):
+            await result
+
+class WebhookSink:
+    """POSTs every alert as JSON to url\n
+    The request runs on a worker thread. post(url, body) can replace the HTTP call, e.g. in tests.\n
+    """
+
+    def __init__(self, url, timeout=5.0, post=None):
+        self.url = url
+        self.timeout = timeout
+        self.post = post or self._post
+
+    def _post(self, url, body):
+        import urllib.request
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, alert):
+        await asyncio.to_thread(self.post, self.url, json.dumps(asdict(alert)).encode())
+
+
+# Sources: async iterators of micro-batches, lists of (symbol, time, price)
+
+def _load_series(path):
+    import loaders
+    prices, _ = loaders.load_prices(path)
+    return prices, loaders.load_times(path)
+
+async def replay(data, symbol=None, rate=1000.0, times=None, copies=1):
+    """Replays a series at rate ticks per second (0 = as fast as possible)\n
+    **args:**\n
+    data = prices (np) or path of a .npy/.csv/.xlsx file (str)\n
+    symbol = series name, the file name without extension by default (str)\n
+    rate = ticks per second of every copy (float)\n
+    times = tick times, the positions if None (np/None)\n
+    copies = replays the series as this many symbols "symbol#i" together, for load tests (int)\n
+    """
+    if isinstance(data, str):
+        symbol = symbol or os.path.splitext(os.path.basename(data))[0]
+        data, file_times = _load_series(data)
+        times = file_times if times is None else times
+    prices = np.asarray(data, dtype=float).reshape(-1).tolist()
+    times = list(range(len(prices))) if times is None else np.asarray(times).reshape(-1).tolist()
+    symbols = [symbol] if copies == 1 else [f"{symbol}#{i}" for i in range(copies)]
+
+    position = 0
+    start = time.monotonic()
+    while position < len(prices):
+        if rate:
+            # Ticks due by now, on an absolute schedule so sleeping late doesn't slow the replay down
+            await asyncio.sleep(REPLAY_INTERVAL)
+            due = min(int((time.monotonic() - start) * rate), len(prices))
+        else:
+            await asyncio.sleep(0)
+            due = min(position + max(REPLAY_BATCH // len(symbols), 1), len(prices))
+        if due > position:
+            yield [(name, times[i], prices[i]) for i in range(position, due) for name in symbols]
+            position = due
+
+def parse_line(line, default_symbol=None):
+    """(symbol, time, price) of a "symbol,price[,time]" line, or of a bare "price" with default_symbol\n
+    **returns:**\n
+    tuple, or None for empty, header or unparseable lines\n
+    """
+    fields = [field.strip() for field in line.strip().split(",")]
+    try:
+        if len(fields) == 1 and default_symbol is not None:
+            return default_symbol, time.time(), float(fields[0])
+        if len(fields) >= 2:
+            return fields[0], float(fields[2]) if len(fields) > 2 else time.time(), float(fields[1])
+    except ValueError:
+        return None
+    return None
+
+def _parse_lines(lines, default_symbol=None):
+    return [tick for tick in (parse_line(line.decode(errors="replace"), default_symbol) for line in lines) if tick is not None]
+
+async def connect(host, port, symbol=None):
+    """Ticks of a TCP feed sending one "symbol,price[,time]" line per tick, until it closes\n
+    Every read becomes one micro-batch, so a burst of ticks is processed together.\n
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        pending = b""
+        while True:
+            chunk = await reader.read(1 << 16)
+            if not chunk:
+                break
+            # A line is only complete once its newline arrived
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            batch = _parse_lines(lines, symbol)
+            if batch:
+                yield batch
+        if pending:
+            batch = _parse_lines([pending], symbol)
+            if batch:
+                yield batch
+    finally:
+        writer.close()
+
+async def tail(path, symbol=None, poll=0.05, from_start=False):
+    """Ticks appended to a text file, "symbol,price[,time]" or bare prices (symbol = file name)\n
+    Runs until cancelled, the file is polled every poll seconds when nothing new was written.\n
+    """
+    symbol = symbol or os.path.splitext(os.path.basename(path))[0]
+    with open(path, "rb") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        pending = b""
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                await asyncio.sleep(poll)
+                continue
+            # A line is only complete once its newline was written
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            batch = _parse_lines(lines, symbol)
+            if batch:
+                yield batch
+
+
+class Monitor:
+    """Feeds ticks of several sources through one streaming detector per symbol\n
+    **args:**\n
+    detector = key or title of a registered detector with a streaming implementation (str)\n
+    params = parameters of the detector, its defaults where missing (dict)\n
+    sinks = alert sinks (list)\n
+    queue_size = micro-batches buffered between the sources and the detection, sources wait when full (int)\n
+    sink_queue_size = alerts buffered per sink, the oldest are dropped when full (int)\n
+    stats_interval = seconds between stats reports to on_stats / the trace, 0 for none (float)\n
+    on_stats = optional callback(report dict) (callable)\n
+    flush_timeout = seconds the sinks get to deliver the queued alerts at the end (float)\n
+    """
+
+    def __init__(self, detector="std", params=None, sinks=(), queue_size=64, sink_queue_size=10_000,
+                 stats_interval=0.0, on_stats=None, flush_timeout=5.0):
+        self.detector = detectors.get(detector)
+        self.params = self.detector.validate(params or {})
+        # Raises for detectors without a streaming implementation
+        self.detector.stream(**self.params)
+
+        self.sinks = list(sinks)
+        self.queue_size = queue_size
+        self.sink_queue_size = sink_queue_size
+        self.stats_interval = stats_interval
+        self.on_stats = on_stats
+        self.flush_timeout = flush_timeout
+        self.states = {}
+        self.stats = MonitorStats()
+
+    def process(self, batch, received):
+        """Runs one micro-batch through the detectors\n
+        **returns:**\n
+        list of Alert\n
+        """
+        alerts = []
+        states = self.states
+        for symbol, tick_time, price in batch:
+            state = states.get(symbol)
+            if state is None:
+                state = states[symbol] = self.detector.stream(**self.params)
+                self.stats.symbols += 1
+            if state.update(price):
+                alerts.append(Alert(symbol, tick_time, price, getattr(state, "upper", None), getattr(state, "lower", None)))
+
+        self.stats.ticks += len(batch)
+        now = time.monotonic()
+        for alert in alerts:
+            alert.latency = now - received
+        self.stats.alerts += len(alerts)
+        self.stats.record_latency(now - received)
+        return alerts
+
+    async def _deliver(self, sink, queue):
+        while True:
+            alert = await queue.get()
+            try:
+                result = sink.send(alert)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"Sink {type(sink).__name__} failed: {e}", file=sys.stderr)
+            finally:
+                queue.task_done()
+
+    def _publish(self, alert, queues):
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+                queue.task_done()
+                self.stats.dropped += 1
+            queue.put_nowait(alert)
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            report = self.stats.report()
+            instrument.event("monitor", **report)
+            if self.on_stats is not None:
+                self.on_stats(report)
+
+    async def run(self, sources, duration=None):
+        """Monitors until every source is exhausted (or duration seconds passed), then flushes the sinks\n
+        **returns:**\n
+        final stats report (dict)\n
+        """
+        self.stats.started = time.monotonic()
+        ticks = asyncio.Queue(maxsize=self.queue_size)
+        done = object()
+
+        async def pump(source):
+            try:
+                async for batch in source:
+                    await ticks.put((batch, time.monotonic()))
+            except Exception as e:
+                print(f"Source failed: {e}", file=sys.stderr)
+            await ticks.put((done, None))
+
+        sink_queues = [asyncio.Queue(maxsize=self.sink_queue_size) for _ in self.sinks]
+        workers = [asyncio.create_task(self._deliver(sink, queue)) for sink, queue in zip(self.sinks, sink_queues)]
+        if self.stats_interval:
+            workers.append(asyncio.create_task(self._report()))
+        pumps = [asyncio.create_task(pump(source)) for source in sources]
+
+        async def consume():
+            remaining = len(pumps)
+            while remaining:
+                batch, received = await ticks.get()
+                if batch is done:
+                    remaining -= 1
+                    continue
+                for alert in self.process(batch, received):
+                    self._publish(alert, sink_queues)
+                # Lets the sinks run between batches
+                await asyncio.sleep(0)
+
+        try:
+            await asyncio.wait_for(consume(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for task in pumps:
+                task.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+
+        # Alerts still queued get flush_timeout seconds to reach the sinks
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in sink_queues)), self.flush_timeout)
+        except asyncio.TimeoutError:
+            self.stats.dropped += sum(queue.qsize() for queue in sink_queues)
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        report = self.stats.report()
+        instrument.event("monitor", **report)
+        return report
+
+
+def build_parser():
+    import cli
+
+    parser = argparse.ArgumentParser(description="Live outlier monitoring of tick streams")
+    parser.add_argument("--replay", nargs="+", default=[], help="files (.npy, .csv, .xlsx) replayed as tick streams")
+    parser.add_argument("--rate", type=float, default=1000.0, help="replayed ticks per second and series, 0 = as fast as possible")
+    parser.add_argument("--copies", type=int, default=1, help="replay every file as this many symbols (load test)")
+    parser.add_argument("--tail", nargs="+", default=[], help="text files followed for appended ticks")
+    parser.add_argument("--connect", nargs="+", default=[], help="HOST:PORT of TCP feeds sending symbol,price[,time] lines")
+    parser.add_argument("--algorithm", choices=[detector.key for detector in detectors.available() if detector.streaming], default="std")
+    cli.add_detector_options(parser, [detector for detector in detectors.available() if detector.streaming])
+    parser.add_argument("--webhook", help="also POST every alert as JSON to this URL")
+    parser.add_argument("--quiet", action="store_true", help="don't print the alerts")
+    parser.add_argument("--stats-every", type=float, default=5.0, help="seconds between stats lines, 0 for none")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--trace", help="write the stats as JSON lines to this file ('-' for stderr)")
+    return parser
+
+def main(argv=None):
+    import cli
+
+    options = build_parser().parse_args(argv)
+    if not (options.replay or options.tail or options.connect):
+        print("Nothing to monitor: give --replay, --tail or --connect", file=sys.stderr)
+        return 2
+    if options.trace:
+        instrument.enable(options.trace)
+
+    sinks = [] if options.quiet else [LogSink()]
+    if options.webhook:
+        sinks.append(WebhookSink(options.webhook))
+    report_line = lambda report: print(
+        f"{report['ticks']} ticks ({report['ticks_per_second']:.0f}/s), {report['symbols']} symbols, {report['alerts']} alerts"
+        f" ({report['dropped']} dropped), latency p50 {report['latency_p50_ms']:.2f} ms p99 {report['latency_p99_ms']:.2f} ms",
+        file=sys.stderr)
+
+    try:
+        monitor = Monitor(options.algorithm, cli.detector_params(options), sinks, stats_interval=options.stats_every, on_stats=report_line)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    sources = [replay(path, rate=options.rate, copies=options.copies) for path in options.replay]
+    sources += [tail(path) for path in options.tail]
+    for address in options.connect:
+        host, _, port = address.rpartition(":")
+        sources.append(connect(host or "localhost", int(port)))
+
+    try:
+        report = asyncio.run(monitor.run(sources, options.duration))
+    except KeyboardInterrupt:
+        report = monitor.stats.report()
+    report_line(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
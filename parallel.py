@@ -0,0 +1,269 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import calcs
+import detectors
+
+
+def _share_array(data):
+    """Copies data once into a new shared memory block\n
+    **returns:**\n
+    shared memory (SharedMemory), spec to attach from a worker (tuple)\n
+    """
+    data = np.ascontiguousarray(data, dtype=float)
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[...] = data
+    return shm, (shm.name, data.shape, data.dtype.str)
+
+def _share_or_map(data):
+    """Like _share_array, but a contiguous 1 dimensional float64 np.memmap is passed by file name instead of copied\n
+    **returns:**\n
+    shared memory to release, or None (SharedMemory/None), spec for _attach (tuple)\n
+    """
+    if isinstance(data, np.memmap) and data.filename and data.ndim == 1 and data.dtype == np.float64 and data.flags.c_contiguous:
+        base = data
+        while isinstance(base.base, np.memmap):
+            base = base.base
+        offset = base.offset + (data.__array_interface__["data"][0] - base.__array_interface__["data"][0])
+        return None, ("file", data.filename, offset, data.shape, data.dtype.str)
+    return _share_array(data)
+
+def _create_shared(shape, dtype):
+    """New zeroed shared memory array that the workers can write into"""
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    array[...] = 0
+    return shm, array, (shm.name, tuple(shape), dtype.str)
+
+
+class _Mapped:
+    """Stand-in for SharedMemory of a memory-mapped file, nothing to close"""
+
+    def close(self):
+        pass
+
+
+def _attach(spec, writeable=False):
+    """View of a shared array from the spec of _share_array, _share_or_map or _create_shared"""
+    if spec[0] == "file":
+        _, filename, offset, shape, dtype = spec
+        return _Mapped(), np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    data.flags.writeable = writeable
+    return shm, data
+
+def _std_task(spec, lookback_period, multipliers):
+    """Outlier counts of one lookback for every multiplier, the rolling statistics are computed once"""
+    shm, data = _attach(spec)
+    try:
+        mean, std_now = calcs._rolling_mean_std(data, lookback_period, lookback_period, len(data))
+        counts = []
+        for multiplier in multipliers:
+            labels, _, _ = calcs._label_from_stats(data, lookback_period, mean, std_now, multiplier)
+            counts.append(int(np.count_nonzero(labels)))
+        del data, mean, std_now
+    finally:
+        shm.close()
+    return counts
+
+def _detector_task(spec, key, params):
+    """Outlier count of one parameter set of a registered detector"""
+    shm, data = _attach(spec)
+    try:
+        labels = detectors.get(key).run(data, **params).labels
+        del data
+    finally:
+        shm.close()
+    return int(np.count_nonzero(labels))
+
+def _run_sweep(data, submit_all, max_workers):
+    """Shares data, runs the tasks submitted by submit_all(pool, spec) and releases the shared memory"""
+    shm, spec = _share_array(np.asarray(data, dtype=float).reshape(-1))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            futures = submit_all(pool, spec)
+            return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+def std_sweep(data:np, lookback_periods, std_multipliers, max_workers=None):
+    """Grid search of calcs.calculations over lookback_periods x std_multipliers on all CPU cores\n
+    The series is shared with the workers through shared memory and every worker handles one
+    lookback, reusing its rolling mean/std for all multipliers since only the band width changes.\n
+    **args:**\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    lookback_periods = lookback values to try (list of int)\n
+    std_multipliers = multiplier values to try (list of float)\n
+    max_workers = number of processes, all cores by default (int)\n
+    **returns:**\n
+    DataFrame with lookback_period, std_multiplier, outliers and outlier_rate per parameter set\n
+    """
+    lookback_periods = [int(lookback) for lookback in lookback_periods]
+    std_multipliers = list(std_multipliers)
+
+    counts = _run_sweep(
+        data,
+        lambda pool, spec: [pool.submit(_std_task, spec, lookback, std_multipliers) for lookback in lookback_periods],
+        max_workers,
+    )
+
+    rows = []
+    for lookback, lookback_counts in zip(lookback_periods, counts):
+        for multiplier, count in zip(std_multipliers, lookback_counts):
+            rows.append({"lookback_period": lookback, "std_multiplier": multiplier, "outliers": count})
+
+    results = pd.DataFrame(rows, columns=["lookback_period", "std_multiplier", "outliers"])
+    results["outlier_rate"] = results["outliers"] / max(len(np.asarray(data).reshape(-1)), 1)
+    return results
+
+def sweep(detector, data:np, max_workers=None, **grid):
+    """Grid search of any registered detector on all CPU cores\n
+    **args:**\n
+    detector = key or title of the detector, see detectors.available() (str)\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    max_workers = number of processes, all cores by default (int)\n
+    grid = parameter name -> values to try, parameters left out keep their default (lists)\n
+    **returns:**\n
+    DataFrame with one column per grid parameter, outliers and outlier_rate per parameter set\n
+    """
+    detector = detectors.get(detector)
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    for params in combinations:
+        detector.validate(params)
+
+    counts = _run_sweep(
+        data,
+        lambda pool, spec: [pool.submit(_detector_task, spec, detector.key, params) for params in combinations],
+        max_workers,
+    )
+
+    results = pd.DataFrame([{**params, "outliers": count} for params, count in zip(combinations, counts)], columns=names + ["outliers"])
+    results["outlier_rate"] = results["outliers"] / max(len(np.asarray(data).reshape(-1)), 1)
+    return results
+
+def kalman_sweep(data:np, measurement_noises, outlier_thresholds, max_workers=None):
+    """Grid search of calcs.kalman_filters over measurement_noises x outlier_thresholds on all CPU cores\n
+    **args:**\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    measurement_noises = measurement noise values to try (list of float)\n
+    outlier_thresholds = outlier threshold values to try (list of float)\n
+    max_workers = number of processes, all cores by default (int)\n
+    **returns:**\n
+    DataFrame with measurement_noise, outlier_threshold, outliers and outlier_rate per parameter set\n
+    """
+    return sweep("kalman", data, max_workers, measurement_noise=list(measurement_noises), outlier_threshold=list(outlier_thresholds))
+
+
+#Smallest chunk of parallel_calculations, shorter series are computed serially
+MIN_CHUNK = 1 << 18
+
+def _chunk_task(spec, out_specs, lookback_period, std_multiplier, start, stop):
+    """Bounds and raw (not yet deduplicated) outlier flags of the window ends [start, stop)\n
+    The windows reach lookback_period points back into the previous chunk (the halo), straight
+    from the shared input, and the rolling engine gives the same values for any sub-range.\n
+    """
+    shm, data = _attach(spec)
+    outputs = [_attach(out_spec, writeable=True) for out_spec in out_specs]
+    try:
+        (_, upper_bound), (_, lower_bound), (_, flags) = outputs
+        mean, std_now = calcs._rolling_mean_std(data, lookback_period, start, stop)
+        upper_bound[start:stop] = mean + std_now*std_multiplier
+        lower_bound[start:stop] = mean - std_now*std_multiplier
+        flags[start:stop] = (data[start:stop] >= upper_bound[start:stop]) | (data[start:stop] <= lower_bound[start:stop])
+        del data, mean, std_now, upper_bound, lower_bound, flags
+    finally:
+        shm.close()
+        for out_shm, _ in outputs:
+            out_shm.close()
+    return stop - start
+
+def chunk_edges(n, lookback_period, chunks):
+    """Chunk boundaries of the window ends [lookback_period, n), aligned to the blocks of the rolling engine"""
+    if n <= lookback_period:
+        return np.array([lookback_period, lookback_period])
+    block = max(lookback_period, calcs._BLOCK_SIZE)
+    n_blocks = -(-(n - lookback_period) // block)
+    per_chunk = -(-n_blocks // max(chunks, 1))
+    edges = lookback_period + np.arange(0, n_blocks + per_chunk, per_chunk) * block
+    edges = np.minimum(edges, n)
+    return np.unique(edges)
+
+def parallel_calculations(data:np, lookback_period=14, std_multiplier=2, progress=None, mask=None, max_workers=None, chunks=None):
+    """calculations() of one long series split in chunks across a process pool, with the same result\n
+    The series is shared with the workers through shared memory (or by file name if it is a
+    memory-mapped .npy column), every chunk reads its lookback_period points of halo from it, and the
+    workers write bounds and raw flags into shared output arrays. The rising edges are taken once
+    over the stitched flags, so a run crossing a chunk seam is labeled like in the serial result.\n
+    **args:**\n
+    data = 1 dimensional numpy array of time series data (np)\n
+    lookback_period, std_multiplier = see calcs.calculations ("auto" picks one lookback for the series)\n
+    progress = optional callback(done, total) after every chunk, may raise to cancel (callable)\n
+    mask = optional validity mask, see calcs.validity_mask (np)\n
+    max_workers = number of processes, all cores by default (int)\n
+    chunks = number of chunks, 4 per process by default (int)\n
+    **returns:**\n
+    Same as calcs.calculations()\n
+    """
+    if mask is not None:
+        return calcs._masked(parallel_calculations, data, mask, lookback_period=lookback_period, std_multiplier=std_multiplier,
+                             progress=progress, max_workers=max_workers, chunks=chunks)
+
+    if not isinstance(data, np.memmap) or data.dtype != np.float64:
+        data = np.asarray(data, dtype=float)
+    data = data.reshape(-1)
+    if lookback_period == "auto":
+        lookback_period = int(calcs.select_lookback(data)[0][0])
+
+    max_workers = max_workers or os.cpu_count()
+    edges = chunk_edges(len(data), lookback_period, chunks or 4 * max_workers)
+    if len(data) < 2 * MIN_CHUNK or len(edges) <= 2:
+        return calcs.calculations(data, lookback_period, std_multiplier, progress=progress)
+
+    shm, spec = _share_or_map(data)
+    outputs = [_create_shared(data.shape, float), _create_shared(data.shape, float), _create_shared(data.shape, bool)]
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_chunk_task, spec, [out_spec for _, _, out_spec in outputs], lookback_period, std_multiplier, start, stop)
+                for start, stop in zip(edges[:-1], edges[1:])
+            ]
+            done = 0
+            try:
+                for future in as_completed(futures):
+                    done += future.result()
+                    if progress is not None:
+                        progress(done, len(data) - lookback_period)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        upper_bound, lower_bound, flags = (array.copy() for _, array, _ in outputs)
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        for out_shm, array, _ in outputs:
+            del array
+            out_shm.close()
+            out_shm.unlink()
+
+    upper_bound[0:lookback_period] = np.sum(data[:lookback_period])/lookback_period
+    lower_bound[0:lookback_period] = np.sum(data[:lookback_period])/lookback_period
+
+    #Rising edges over the stitched flags, as in the serial run
+    outlier_index = flags
+    outlier_index[1:] &= ~flags[:-1].copy()
+
+    boundaries = True
+
+    return outlier_index, upper_bound, lower_bound, boundaries
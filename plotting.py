@@ -0,0 +1,44 @@
+import numpy as np
+
+#Number of min/max buckets drawn across the visible range (about one per horizontal pixel)
+LOD_BUCKETS = 2000
+
+
+def minmax_decimate(y, start=0, stop=None, buckets=LOD_BUCKETS):
+    """Level-of-detail reduction of y[start:stop] for line plots\n
+    The range is split in buckets and only the minimum and maximum of every bucket are kept (in
+    their original order), so spikes stay visible however far the plot is zoomed out.\n
+    **args:**\n
+    y = 1 dimensional numpy array (np)\n
+    start, stop = visible index range (int)\n
+    buckets = number of buckets (int)\n
+    **returns:**\n
+    x positions (np int), y values (np)\n
+    """
+    y = np.asarray(y).reshape(-1)
+    stop = len(y) if stop is None else min(stop, len(y))
+    start = max(start, 0)
+    if stop <= start:
+        return np.array([], dtype=int), np.array([], dtype=float)
+
+    segment = y[start:stop]
+    if len(segment) <= 2 * buckets:
+        return np.arange(start, stop), segment
+
+    #Pad with the last value so the segment reshapes into equally sized buckets
+    size = -(-len(segment) // buckets)
+    padded = np.empty(size * buckets, dtype=float)
+    padded[:len(segment)] = segment
+    padded[len(segment):] = segment[-1]
+    rows = padded.reshape(buckets, size)
+
+    #NaN must never be picked as minimum/maximum, all-NaN buckets fall back to their first point (a gap)
+    nan = np.isnan(rows)
+    low = np.argmin(np.where(nan, np.inf, rows), axis=1)
+    high = np.argmax(np.where(nan, -np.inf, rows), axis=1)
+
+    offsets = np.arange(buckets) * size
+    index = np.sort(np.concatenate((offsets + low, offsets + high)))
+    index = np.unique(np.minimum(index, len(segment) - 1))
+
+    return index + start, segment[index]
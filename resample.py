@@ -0,0 +1,179 @@
+"""Multi-timeframe OHLC resampling of tick/bar data, with a per-timeframe cache
+
+    frames = TimeframeCache(times, prices)
+    hourly = frames.bars("1h")        # dict of time, open, high, low, close, count, start
+    weekly = frames.bars("1w")        # built from the daily bars, not from the raw ticks again
+
+Bars are aggregated with np.*.reduceat over the sorted ticks, so every timeframe is one
+vectorized pass. Several timeframes requested together are built finest first and each
+coarser one is aggregated from the previous one whenever the buckets nest (1h -> 1d -> 1w).
+drill_down() runs the STD detection on coarse bars and only re-runs it at full resolution
+inside the flagged bars.
+"""
+import numpy as np
+import calcs
+
+#Bar length in seconds and bucket offset of every timeframe (weeks start on Monday, the epoch is a Thursday)
+TIMEFRAMES = {
+    "1m": (60, 0),
+    "5m": (300, 0),
+    "15m": (900, 0),
+    "1h": (3600, 0),
+    "4h": (14400, 0),
+    "1d": (86400, 0),
+    "1w": (604800, 3 * 86400),
+}
+
+BAR_FIELDS = ("time", "open", "high", "low", "close", "count", "start")
+
+
+def _bucket_keys(times, timeframe):
+    seconds, offset = TIMEFRAMES[timeframe]
+    return (times + offset) // seconds
+
+def _aggregate(keys, bars):
+    """Merges consecutive bars (or ticks) with the same bucket key into one bar"""
+    if len(keys) == 0:
+        return {field: values[:0] for field, values in bars.items()}
+
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    ends = np.append(starts[1:], len(keys)) - 1
+
+    return {
+        "time": bars["time"][starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "count": np.add.reduceat(bars["count"], starts),
+        "start": bars["start"][starts],
+    }
+
+def _nests(finer, coarser):
+    """True if every bucket of finer lies inside one bucket of coarser"""
+    fine_seconds, fine_offset = TIMEFRAMES[finer]
+    coarse_seconds, coarse_offset = TIMEFRAMES[coarser]
+    return coarse_seconds % fine_seconds == 0 and (coarse_offset - fine_offset) % fine_seconds == 0
+
+def ohlc(times, prices, timeframe):
+    """OHLC bars of sorted ticks without NaN\n
+    **args:**\n
+    times = tick times in POSIX seconds, ascending (np int64)\n
+    prices = tick prices (np)\n
+    timeframe = key of TIMEFRAMES (str)\n
+    **returns:**\n
+    dict of time (bucket start), open, high, low, close, count and start (index of the first tick) arrays\n
+    """
+    times = np.asarray(times, dtype=np.int64)
+    prices = np.asarray(prices, dtype=float)
+    ticks = {
+        "time": times,
+        "open": prices,
+        "high": prices,
+        "low": prices,
+        "close": prices,
+        "count": np.ones(len(prices), dtype=np.int64),
+        "start": np.arange(len(prices)),
+    }
+    bars = _aggregate(_bucket_keys(times, timeframe), ticks)
+    seconds, offset = TIMEFRAMES[timeframe]
+    bars["time"] = _bucket_keys(bars["time"], timeframe) * seconds - offset
+    return bars
+
+
+class TimeframeCache:
+    """Raw ticks of one series and the bars of every timeframe built from them so far\n
+    NaN/inf prices are left out and unsorted ticks are sorted once, when the cache is created.\n
+    **args:**\n
+    times = tick times in POSIX seconds (np int64)\n
+    prices = tick prices (np)\n
+    """
+
+    def __init__(self, times, prices):
+        times = np.asarray(times, dtype=np.int64).reshape(-1)
+        prices = np.asarray(prices, dtype=float).reshape(-1)
+
+        #Position of every kept tick in the original arrays
+        self.index = np.flatnonzero(np.isfinite(prices))
+        if np.any(np.diff(times[self.index]) < 0):
+            self.index = self.index[np.argsort(times[self.index], kind="stable")]
+
+        self.length = len(prices)
+        self.times = times[self.index]
+        self.prices = prices[self.index]
+        self._bars = {}
+
+    def __contains__(self, timeframe):
+        return timeframe in self._bars
+
+    def bars(self, timeframe):
+        """Bars of one timeframe, built on first use"""
+        if timeframe not in self._bars:
+            self.build([timeframe])
+        return self._bars[timeframe]
+
+    def build(self, timeframes):
+        """Builds the missing timeframes in one pass each, coarser ones from the finest nesting timeframe"""
+        for timeframe in sorted(set(timeframes), key=lambda name: TIMEFRAMES[name][0]):
+            if timeframe in self._bars:
+                continue
+
+            finer = [name for name in self._bars if TIMEFRAMES[name][0] < TIMEFRAMES[timeframe][0] and _nests(name, timeframe)]
+            if finer:
+                source = self._bars[max(finer, key=lambda name: TIMEFRAMES[name][0])]
+                bars = _aggregate(_bucket_keys(source["time"], timeframe), source)
+                seconds, offset = TIMEFRAMES[timeframe]
+                bars["time"] = _bucket_keys(bars["time"], timeframe) * seconds - offset
+            else:
+                bars = ohlc(self.times, self.prices, timeframe)
+
+            self._bars[timeframe] = bars
+
+        return {name: self._bars[name] for name in timeframes}
+
+    def tick_ranges(self, timeframe, bar_indices):
+        """(start, stop) positions in the kept ticks of the given bars"""
+        bars = self.bars(timeframe)
+        stops = np.append(bars["start"][1:], len(self.prices))
+        bar_indices = np.asarray(bar_indices, dtype=int)
+        return bars["start"][bar_indices], stops[bar_indices]
+
+
+def drill_down(cache, timeframe, lookback_period=14, std_multiplier=2, coarse_lookback=None):
+    """STD detection at the timeframe first, then at full resolution inside the flagged bars only\n
+    Every run of consecutive flagged bars is re-checked with lookback_period + 1 ticks of history in
+    front of it, so its tick labels are the ones a full-resolution run would give.\n
+    **args:**\n
+    cache = TimeframeCache of the series (TimeframeCache)\n
+    timeframe = coarse timeframe, key of TIMEFRAMES (str)\n
+    lookback_period, std_multiplier = parameters of the full resolution run (int, float)\n
+    coarse_lookback = lookback of the coarse run, lookback_period if None (int)\n
+    **returns:**\n
+    tick labels over the original arrays, 0 outside the flagged bars (np bool)\n
+    indices of the flagged bars, every bar outside the coarse bounds (np int)\n
+    """
+    bars = cache.bars(timeframe)
+    coarse_lookback = coarse_lookback or lookback_period
+    _, upper, lower, _ = calcs.calculations(bars["close"], coarse_lookback, std_multiplier)
+
+    #Every bar outside the bounds, not only the first of a run like the labels
+    outside = (bars["close"] >= upper) | (bars["close"] <= lower)
+    outside[:coarse_lookback] = False
+    flagged = np.flatnonzero(outside)
+
+    labels = np.zeros(cache.length, dtype=bool)
+    if len(flagged) == 0:
+        return labels, flagged
+
+    #Consecutive flagged bars are checked as one region
+    first = flagged[np.concatenate(([True], np.diff(flagged) > 1))]
+    last = flagged[np.append(np.diff(flagged) > 1, True)]
+    starts, _ = cache.tick_ranges(timeframe, first)
+    _, stops = cache.tick_ranges(timeframe, last)
+
+    for start, stop in zip(starts, stops):
+        context = max(start - lookback_period - 1, 0)
+        region, _, _, _ = calcs.calculations(cache.prices[context:stop], lookback_period, std_multiplier)
+        labels[cache.index[start:stop]] = region[start - context:]
+
+    return labels, flagged
@@ -0,0 +1,111 @@
+"""Startup time of the GUI against a time budget, for the source and the frozen (PyInstaller) build
+
+The program is started with WARNINGSE_STARTUP_EXIT=1, so it quits as soon as its window is shown,
+and the wall time from launch to exit is compared with the budget. The source build runs under
+python -X importtime and its slowest top level imports are listed; a frozen build is only timed,
+unless it writes the same report to stderr.
+
+Examples:
+    python startup.py --output startup.json
+    python startup.py --executable dist/main/main --budget 3
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+#Seconds from launch to the first shown window
+STARTUP_BUDGET = 1.0
+
+#Modules that must not be imported before the window is shown
+DEFERRED_MODULES = ("pandas", "matplotlib", "yfinance", "numba")
+
+
+def parse_importtime(stderr):
+    """Imports of a -X importtime report\n
+    **returns:**\n
+    list of (module, cumulative seconds, nesting level), in report order\n
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            # Nested imports are indented by two spaces per level under the module importing them
+            level = (len(name) - len(name.lstrip()) - 1) // 2
+            imports.append((name.strip(), int(cumulative) / 1e6, level))
+    return imports
+
+def command_of(executable=None):
+    """Command line of the frozen executable, or of main.py under -X importtime"""
+    if executable:
+        return [executable]
+    return [sys.executable, "-X", "importtime", os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+
+def measure(command, repeat=3, timeout=60):
+    """Starts the program repeat times and times each start until its window is shown\n
+    **returns:**\n
+    wall times in seconds (list), imports of the last run (see parse_importtime)\n
+    """
+    env = dict(os.environ, WARNINGSE_STARTUP_EXIT="1")
+    # Without a display the window is rendered offscreen
+    if sys.platform.startswith("linux") and not (env.get("DISPLAY") or env.get("WAYLAND_DISPLAY")):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    walls = []
+    imports = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(command, env=env, capture_output=True, text=True, timeout=timeout)
+        walls.append(time.perf_counter() - start)
+        if process.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}: {process.stderr[-2000:]}")
+        imports = parse_importtime(process.stderr)
+    return walls, imports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time of the GUI against a budget")
+    parser.add_argument("--executable", help="frozen build to time instead of main.py")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="allowed seconds to the shown window (median of the runs)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    options = parser.parse_args(argv)
+
+    command = command_of(options.executable)
+    walls, imports = measure(command, options.repeat)
+    median = statistics.median(walls)
+
+    loaded = sorted({name.split(".")[0] for name, _, _ in imports} & set(DEFERRED_MODULES))
+    slowest = sorted(((name, seconds) for name, seconds, level in imports if level == 0), key=lambda item: item[1], reverse=True)
+    for name, seconds in slowest[:options.top]:
+        print(f"{seconds * 1000:8.1f} ms  {name}")
+    print(f"startup: {median:.3f} s median of {', '.join(f'{wall:.3f}' for wall in walls)} (budget {options.budget:.3f} s)")
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump({
+                "meta": {"python": platform.python_version(), "platform": platform.platform(), "command": command},
+                "walls": walls,
+                "median": median,
+                "budget": options.budget,
+                "imports": slowest[:options.top],
+            }, f, indent=1)
+
+    failed = False
+    if loaded:
+        print(f"OVER BUDGET: imported before the window was shown: {', '.join(loaded)}", file=sys.stderr)
+        failed = True
+    if median > options.budget:
+        print(f"OVER BUDGET: {median:.3f} s > {options.budget:.3f} s", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
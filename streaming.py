@@ -0,0 +1,187 @@
+import math
+import numpy as np
+import calcs
+
+#Unit roundoff of float64, for the error bound of the running statistics
+_EPS = float(np.finfo(float).eps)
+
+
+class RollingStdDetector:
+    """Streaming counterpart of calcs.calculations with O(1) work per tick\n
+    Keeps the last lookback_period ticks in a ring buffer together with their running mean and
+    sum of squared deviations (sliding Welford update). Both are recomputed exactly from the buffer
+    every time it wraps around, so rounding drift can't build up, and a tick sitting on a band gets the
+    bounds of np.sum/np.std so ties are labeled like calcs.calculations. Like calcs.calculations, the bounds
+    are NaN only while a NaN/inf tick is in the window; the statistics are recomputed once it left.\n
+    **args:**\n
+    lookback_period = number of previous datapoints with which the std calculation is made (int)\n
+    std_multiplier = Multiplication value of std. The higher it is the less sensitive the outliers get (float/int)\n
+    """
+
+    def __init__(self, lookback_period=14, std_multiplier=2):
+        self.lookback_period = int(lookback_period)
+        self.std_multiplier = std_multiplier
+
+        # Ring buffer with the previous lookback_period ticks
+        self.buffer = np.zeros(self.lookback_period)
+        self.position = 0
+        self.count = 0
+
+        # Number of NaN/inf ticks in the buffer
+        self.bad = 0
+
+        # Running statistics of the buffer
+        self.mean = 0.0
+        self.m2 = 0.0
+
+        # Bound of the rounding error gathered in m2 since the last exact recomputation
+        self.m2_error = 0.0
+
+        # Last raw outlier decision, for the rising edge
+        self.previous_outlier = False
+
+        # Bounds used for the last tick (None until the buffer is full)
+        self.upper = None
+        self.lower = None
+
+    def _resync(self):
+        self.mean = float(np.mean(self.buffer))
+        self.m2 = float(np.sum((self.buffer - self.mean) ** 2))
+        self.m2_error = 0.0
+
+    def update(self, value):
+        """Feeds one tick and returns True if it starts a new outlier"""
+        value = float(value)
+
+        # Warm-up: fill the buffer, no decision yet
+        if self.count < self.lookback_period:
+            self.buffer[self.count] = value
+            self.bad += not math.isfinite(value)
+            self.count += 1
+            if self.count == self.lookback_period and self.bad == 0:
+                self._resync()
+            return False
+
+        # Bounds of the buffer zone from the previous lookback_period ticks
+        if self.bad:
+            self.upper = self.lower = math.nan
+        else:
+            std_now = math.sqrt(max(self.m2 / self.lookback_period, 0.0))
+            self.upper = self.mean + std_now * self.std_multiplier
+            self.lower = self.mean - std_now * self.std_multiplier
+
+            # A tick on a band within rounding error gets the exact np.sum/np.std bounds of calcs.calculations.
+            # The error of m2 grows through the square root, so on a nearly flat window it dominates
+            tolerance = calcs._TIE_TOLERANCE * (abs(value) + (self.upper - self.lower))
+            tolerance += self.std_multiplier * math.sqrt(self.m2_error / self.lookback_period)
+            if abs(value - self.upper) <= tolerance or abs(value - self.lower) <= tolerance:
+                window = np.concatenate((self.buffer[self.position:], self.buffer[:self.position]))
+                mean = float(np.sum(window)) / self.lookback_period
+                std_now = float(np.std(window))
+                self.upper = mean + std_now * self.std_multiplier
+                self.lower = mean - std_now * self.std_multiplier
+
+        outlier = value >= self.upper or value <= self.lower
+        rising_edge = outlier and not self.previous_outlier
+        self.previous_outlier = outlier
+
+        # Slide the window: replace the oldest tick by the new one
+        old = self.buffer[self.position]
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.lookback_period
+        self.count += 1
+        self.bad += (not math.isfinite(value)) - (not math.isfinite(old))
+
+        # The running statistics wait while a NaN/inf is in the window and restart exactly once it left
+        if self.bad:
+            return rising_edge
+        if self.position == 0 or not math.isfinite(old):
+            self._resync()
+        else:
+            delta = value - old
+            new_mean = self.mean + delta / self.lookback_period
+            self.m2 += delta * (value - new_mean + old - self.mean)
+            self.m2_error += 4 * _EPS * abs(delta) * (abs(value) + abs(old) + abs(new_mean))
+            self.mean = new_mean
+
+        return rising_edge
+
+    def update_many(self, values):
+        """Feeds a micro-batch of ticks and returns their labels as a boolean array"""
+        values = np.asarray(values, dtype=float).reshape(-1)
+        return np.array([self.update(value) for value in values.tolist()], dtype=bool)
+
+    def snapshot(self):
+        """Copy of the full state, enough to resume without replaying the history"""
+        state = dict(self.__dict__)
+        state["buffer"] = self.buffer.copy()
+        return state
+
+    @classmethod
+    def restore(cls, state):
+        """Rebuilds a detector from snapshot()"""
+        detector = cls.__new__(cls)
+        detector.__dict__.update(state)
+        detector.buffer = np.array(state["buffer"], dtype=float)
+        if "bad" not in state:
+            detector.bad = int(np.count_nonzero(~np.isfinite(detector.buffer[:detector.count])))
+        if "m2_error" not in state and detector.count >= detector.lookback_period and not detector.bad:
+            detector._resync()
+        detector.__dict__.setdefault("m2_error", 0.0)
+        return detector
+
+
+class KalmanDetector:
+    """Streaming counterpart of calcs.kalman_filters that carries x_est/cov between calls\n
+    Gives the same labels as calcs.kalman_filters on the concatenation of everything fed to it.\n
+    **args:**\n
+    outlier_threshold = z-score of the innovation from which a point is an outlier (float)\n
+    measurement_noise = variance of the measurement noise, the process noise is a tenth of it (float/int)\n
+    """
+
+    def __init__(self, outlier_threshold, measurement_noise=1.0):
+        self.outlier_threshold = float(outlier_threshold)
+        self.measurement_noise = float(measurement_noise)
+
+        # Filter state, x_est is taken from the first tick
+        self.x_est = None
+        self.cov = 1.0
+        self.count = 0
+
+    def update(self, value):
+        """Feeds one tick and returns True if it is an outlier"""
+        value = float(value)
+        if self.x_est is None:
+            self.x_est = value
+
+        flags = [0]
+        self.x_est, self.cov = calcs._kalman_kernel([value], self.outlier_threshold, self.measurement_noise, self.x_est, self.cov, flags)
+        self.count += 1
+
+        return flags[0] == 1
+
+    def update_many(self, values):
+        """Feeds a micro-batch of ticks and returns their labels as a boolean array"""
+        values = np.ascontiguousarray(values, dtype=float).reshape(-1)
+        labels = np.zeros(len(values), dtype=np.uint8)
+        if len(values) == 0:
+            return labels.astype(bool)
+        if self.x_est is None:
+            self.x_est = float(values[0])
+
+        self.x_est, self.cov = calcs._run_kalman(values, self.outlier_threshold, self.measurement_noise, self.x_est, self.cov, labels)
+        self.x_est, self.cov = float(self.x_est), float(self.cov)
+        self.count += len(values)
+
+        return labels == 1
+
+    def snapshot(self):
+        """Copy of the full state, enough to resume without replaying the history"""
+        return dict(self.__dict__)
+
+    @classmethod
+    def restore(cls, state):
+        """Rebuilds a detector from snapshot()"""
+        detector = cls.__new__(cls)
+        detector.__dict__.update(state)
+        return detector
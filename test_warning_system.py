@@ -42,3 +42,961 @@ def test_sensitivity_parameter():
 
     assert strict_count >= 1
     assert loose_count <= strict_count
+
+
+def reference_calculations(data, lookback_period, std_multiplier):
+    # Straight loop version of calcs.calculations, kept as the labeling reference
+    upper = np.zeros(len(data))
+    lower = np.zeros(len(data))
+    labels = np.zeros(len(data))
+    upper[:lookback_period] = np.sum(data[:lookback_period]) / lookback_period
+    lower[:lookback_period] = np.sum(data[:lookback_period]) / lookback_period
+    for i in range(lookback_period, len(data)):
+        std_now = np.std(data[i - lookback_period:i])
+        mean_now = np.sum(data[i - lookback_period:i]) / lookback_period
+        upper[i] = mean_now + std_now * std_multiplier
+        lower[i] = mean_now - std_now * std_multiplier
+        if data[i] >= upper[i] or data[i] <= lower[i]:
+            labels[i] = 1
+    return np.diff(labels, prepend=0) == 1, upper, lower
+
+
+def test_vectorized_matches_reference_loop():
+    rng = np.random.default_rng(0)
+    data = 30000 + np.cumsum(rng.normal(0, 50, 3000))
+    data[rng.integers(0, len(data), 20)] += 2000
+    data[200:260] = data[200]
+
+    for lookback, multiplier in [(1, 2), (3, 1), (14, 2), (100, 2.5)]:
+        labels, upper, lower, _ = calcs.calculations(data, lookback, multiplier)
+        ref_labels, ref_upper, ref_lower = reference_calculations(data, lookback, multiplier)
+
+        assert np.array_equal(labels, ref_labels)
+        assert np.allclose(upper, ref_upper, rtol=1e-12)
+        assert np.allclose(lower, ref_lower, rtol=1e-12)
+
+
+def test_vectorized_stable_on_high_magnitude_series():
+    rng = np.random.default_rng(1)
+    data = 1e9 + np.cumsum(rng.normal(0, 0.01, 5000))
+    data[::97] = 0
+
+    labels, upper, _, _ = calcs.calculations(data, 14, 2)
+    ref_labels, ref_upper, _ = reference_calculations(data, 14, 2)
+
+    assert np.array_equal(labels, ref_labels)
+    assert np.max(np.abs(upper - ref_upper)) < 1e-5
+
+
+def reference_kalman(data, outlier_threshold, measurement_noise):
+    # Straight loop version of calcs.kalman_filters, kept as the labeling reference
+    x_est, cov = data[0], 1.0
+    process_noise = measurement_noise / 10
+    labels = np.zeros(len(data))
+    for z in range(len(data)):
+        cov_pred = cov + process_noise
+        dif = data[z] - x_est
+        dif_cov = cov_pred + measurement_noise
+        if np.abs(dif / np.sqrt(dif_cov)) >= outlier_threshold:
+            labels[z] = 1
+            cov = cov_pred
+        else:
+            gain = cov_pred / dif_cov
+            x_est = x_est + gain * dif
+            cov = (1 - gain) * cov_pred
+    return labels
+
+
+def test_kalman_backends_match_reference(monkeypatch):
+    rng = np.random.default_rng(2)
+    data = 100 + np.cumsum(rng.normal(0, 1, 2000))
+    data[rng.integers(0, len(data), 30)] += 25
+    expected = reference_kalman(data, 3.0, 50)
+
+    labels, boundaries = calcs.kalman_filters(data, outlier_threshold=3.0, measurement_noise=50)
+    assert np.array_equal(labels, expected)
+    assert boundaries is False
+
+    monkeypatch.setattr(calcs, "_kalman_kernel_jit", None)
+    labels, _ = calcs.kalman_filters(data.reshape(-1, 1), outlier_threshold=3.0, measurement_noise=50)
+    assert np.array_equal(labels, expected)
+
+
+def test_rounded_prices_on_a_band_match_reference_loop():
+    # Tick-rounded prices sit exactly on a bound all the time, the last bit decides the label
+    rng = np.random.default_rng(0)
+    walk = 100 + np.cumsum(rng.normal(0, 0.05, (2000, 3)), axis=0)
+
+    for decimals, lookback, multiplier in [(1, 5, 3), (1, 5, 2), (2, 5, 3), (1, 14, 2)]:
+        data = np.round(walk, decimals)
+        batch_labels, batch_upper, _, _ = calcs.batch_calculations(data, lookback, multiplier)
+        for k in range(data.shape[1]):
+            labels, upper, lower, _ = calcs.calculations(data[:, k], lookback, multiplier)
+            ref_labels, ref_upper, ref_lower = reference_calculations(data[:, k], lookback, multiplier)
+            assert np.array_equal(labels, ref_labels)
+            assert np.array_equal(batch_labels[:, k], ref_labels)
+            assert np.allclose(upper, ref_upper, rtol=1e-12) and np.allclose(lower, ref_lower, rtol=1e-12)
+
+    # The per-regime bounds of the auto lookback settle ties the same way
+    data = np.round(walk[:, 0], 1)
+    _, upper, lower, _ = calcs.calculations(data, "auto", 3, regime_length=500)
+    lookbacks, edges = calcs.select_lookback(data, regime_length=500)
+    for start, stop, lookback in zip(edges, np.append(edges[1:], len(data)), lookbacks):
+        _, ref_upper, ref_lower = reference_calculations(data, lookback, 3)
+        part = slice(max(start, lookback), stop)
+        assert np.array_equal(data[part] >= upper[part], data[part] >= ref_upper[part])
+        assert np.array_equal(data[part] <= lower[part], data[part] <= ref_lower[part])
+
+
+def test_batch_matches_single_series():
+    rng = np.random.default_rng(3)
+    series = {
+        "AAA": 100 + np.cumsum(rng.normal(0, 1, 500)),
+        "BBB": 50 + np.cumsum(rng.normal(0, 2, 320)),
+        "CCC": 10 + np.cumsum(rng.normal(0, 1, 8)),
+    }
+
+    labels, upper, lower, boundaries = calcs.batch_calculations(series, lookback_period=14, std_multiplier=2)
+    kalman_labels, _ = calcs.batch_kalman_filters(series, outlier_threshold=2.0, measurement_noise=1)
+
+    assert labels.shape == (500, 3)
+    assert boundaries is True
+    for k, values in enumerate(series.values()):
+        single = calcs.calculations(values, lookback_period=14, std_multiplier=2)
+        n = len(values)
+        assert np.array_equal(labels[:n, k], single[0])
+        assert np.allclose(upper[:n, k], single[1])
+        assert np.allclose(lower[:n, k], single[2])
+        assert not labels[n:, k].any()
+        assert np.isnan(upper[n:, k]).all()
+
+        single_kalman, _ = calcs.kalman_filters(values, outlier_threshold=2.0, measurement_noise=1)
+        assert np.array_equal(kalman_labels[:n, k], single_kalman)
+
+
+def test_streaming_detectors_resume_from_pickle():
+    import pickle
+    import streaming
+
+    rng = np.random.default_rng(4)
+    data = 100 + np.cumsum(rng.normal(0, 1, 3000))
+    data[rng.integers(0, len(data), 40)] += 15
+
+    std_detector = streaming.RollingStdDetector(lookback_period=20, std_multiplier=2)
+    kalman_detector = streaming.KalmanDetector(outlier_threshold=2.5, measurement_noise=1)
+
+    std_labels = [std_detector.update(value) for value in data[:1000]]
+    kalman_labels = list(kalman_detector.update_many(data[:1000]))
+
+    # Simulate a restart of the process
+    std_detector = pickle.loads(pickle.dumps(std_detector))
+    kalman_detector = streaming.KalmanDetector.restore(kalman_detector.snapshot())
+
+    std_labels += list(std_detector.update_many(data[1000:]))
+    kalman_labels += [kalman_detector.update(value) for value in data[1000:]]
+
+    expected_std, _, _, _ = calcs.calculations(data, lookback_period=20, std_multiplier=2)
+    expected_kalman, _ = calcs.kalman_filters(data, outlier_threshold=2.5, measurement_noise=1)
+
+    assert np.array_equal(np.array(std_labels), expected_std)
+    assert np.array_equal(np.array(kalman_labels), expected_kalman == 1)
+
+    # NaN ticks only blank the bounds while they are in the window, like the batch engine
+    for seed in range(30):
+        rng = np.random.default_rng(seed)
+        data = 100 + np.cumsum(rng.normal(0, 1, 400))
+        data[rng.integers(0, len(data), 2)] = np.nan
+        expected, _, _, _ = calcs.calculations(data, lookback_period=14, std_multiplier=2)
+        assert np.array_equal(streaming.RollingStdDetector(14, 2).update_many(data), expected)
+
+    # Tick-rounded prices on a band are labeled like the np.sum/np.std reference loop
+    for decimals, lookback, multiplier in [(1, 5, 3), (1, 5, 2), (2, 5, 3), (0, 7, 2)]:
+        data = np.round(100 + np.cumsum(np.random.default_rng(decimals).normal(0, 0.05, 2000)), decimals)
+        expected, _, _ = reference_calculations(data, lookback, multiplier)
+        detector = streaming.RollingStdDetector(lookback, multiplier)
+        labels = list(detector.update_many(data[:700]))
+        labels += list(pickle.loads(pickle.dumps(detector)).update_many(data[700:]))
+        assert np.array_equal(np.array(labels), expected)
+
+
+def test_parameter_sweep_matches_single_runs():
+    import parallel
+
+    rng = np.random.default_rng(5)
+    data = 100 + np.cumsum(rng.normal(0, 1, 1500))
+
+    results = parallel.std_sweep(data, [5, 20], [1.5, 3], max_workers=2)
+    kalman_results = parallel.kalman_sweep(data, [1, 10], [2.0], max_workers=2)
+
+    assert len(results) == 4
+    for row in results.itertuples():
+        labels, _, _, _ = calcs.calculations(data, row.lookback_period, row.std_multiplier)
+        assert row.outliers == np.count_nonzero(labels)
+        assert row.outlier_rate == row.outliers / len(data)
+
+    for row in kalman_results.itertuples():
+        labels, _ = calcs.kalman_filters(data, row.outlier_threshold, row.measurement_noise)
+        assert row.outliers == np.count_nonzero(labels)
+
+
+def test_loaders_coerce_prices_without_python_loop(tmp_path):
+    import loaders
+
+    csv_path = tmp_path / "prices.csv"
+    csv_path.write_text("Date,Close\n2024-01-01,10.5\n2024-01-02,abc\n2024-01-03,\n2024-01-04,12\n")
+    prices, invalid_rows = loaders.load_csv(str(csv_path), chunksize=2)
+
+    assert np.array_equal(invalid_rows, [1])
+    assert prices[0] == 10.5 and prices[3] == 12
+    assert np.isnan(prices[1:3]).all()
+
+    npy_path = tmp_path / "prices.npy"
+    np.save(npy_path, np.column_stack((np.arange(5.0), np.linspace(1, 2, 5))))
+    prices, invalid_rows = loaders.load_prices(str(npy_path))
+
+    assert isinstance(prices.base, np.memmap) or isinstance(prices, np.memmap)
+    assert np.allclose(prices, np.linspace(1, 2, 5))
+    assert len(invalid_rows) == 0
+
+    prices, invalid_rows = loaders.load_prices("btc-usd.npy")
+    assert len(prices) == 3974 and len(invalid_rows) == 0
+
+
+class FakeSource:
+    # Local stand-in for Yahoo Finance: one bar per day, recording every request
+    def __init__(self, n_days):
+        self.times = 1_700_000_000 + 86400 * np.arange(n_days, dtype=np.int64)
+        self.prices = np.linspace(100, 200, n_days)
+        self.available = n_days // 2
+        self.requests = []
+
+    def fetch(self, ticker, interval="1d", start=None, period="1y"):
+        self.requests.append((ticker, start))
+        keep = np.arange(len(self.times)) < self.available
+        if start is not None:
+            keep &= self.times >= start
+        return self.times[keep], self.prices[keep]
+
+
+def test_series_cache_fetches_only_missing_tail(tmp_path):
+    import datasource
+
+    source = FakeSource(10)
+    cache = datasource.SeriesCache(str(tmp_path), ttl=0)
+
+    times, prices = datasource.fetch_prices("AAA", source=source, cache=cache)
+    assert len(prices) == 5
+
+    source.available = 10
+    times, prices = datasource.fetch_prices("AAA", source=source, cache=cache)
+    assert np.array_equal(prices, source.prices)
+    assert np.array_equal(times, source.times)
+    assert source.requests[-1] == ("AAA", int(source.times[4]))
+
+    # Offline mode answers from the cache alone
+    times, prices = datasource.fetch_prices("AAA", source=None, cache=cache, offline=True)
+    assert len(prices) == 10
+
+    cache = datasource.SeriesCache(str(tmp_path), ttl=3600, max_entries=1)
+    datasource.fetch_prices("BBB", source=source, cache=cache)
+    assert cache.get("AAA", "1d") is None
+
+
+def test_cli_writes_labels_without_gui_modules(tmp_path):
+    import subprocess
+    import sys
+
+    script = (
+        "import sys, cli\n"
+        f"code = cli.main(['btc-usd.npy', '--lookback', '20', '--output-dir', {str(tmp_path)!r}, '--jobs', '1'])\n"
+        "assert not any(name.startswith(('PyQt5', 'matplotlib', 'yfinance')) for name in sys.modules)\n"
+        "sys.exit(code)\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+
+    import pandas as pd
+    df = pd.read_csv(tmp_path / "btc-usd_std.csv")
+    expected, _, _, _ = calcs.calculations(df["price"].to_numpy(), 20, 2.0)
+    assert np.array_equal(df["label"].to_numpy() == 1, expected)
+
+
+def test_minmax_decimation_keeps_spikes():
+    import plotting
+
+    y = np.sin(np.linspace(0, 50, 1_000_000))
+    y[123_457] = 10
+    y[654_321] = -10
+    y[500_000] = np.nan
+
+    x_lod, y_lod = plotting.minmax_decimate(y, buckets=1000)
+
+    assert len(x_lod) <= 2000
+    assert np.all(np.diff(x_lod) > 0)
+    assert 123_457 in x_lod and 654_321 in x_lod
+    assert np.array_equal(y_lod, y[x_lod])
+
+    x_lod, y_lod = plotting.minmax_decimate(y, start=10, stop=110, buckets=1000)
+    assert np.array_equal(x_lod, np.arange(10, 110))
+
+
+def test_benchmark_results_and_regression_check():
+    import bench
+
+    current = bench.run([1000], [14], [(0.01, 0.01)], [100], repeat=1, verbose=False)
+    names = {result["name"] for result in current["results"]}
+
+    assert names == {"calculations", "kalman_filters", "rolling_mad", "clean_data", "load_npy", "load_csv"}
+    assert all(result["seconds"] > 0 and result["peak_bytes"] >= 0 for result in current["results"])
+
+    slower = {"results": [dict(result, seconds=result["seconds"] * 2) for result in current["results"]]}
+    assert len(bench.compare(slower, current, threshold=1.5)) == len(current["results"])
+    assert bench.compare(current, slower, threshold=1.5) == []
+
+
+def test_instrument_stages_write_json_lines(tmp_path):
+    import json
+    import instrument
+
+    assert instrument.stage("detect") is instrument.stage("clean")
+
+    trace_path = tmp_path / "trace.jsonl"
+    instrument.enable(str(trace_path), profile=["tracemalloc"])
+    try:
+        with instrument.stage("detect", algorithm="STD based") as stage:
+            labels, _, _, _ = calcs.calculations(np.arange(1000.0), 14, 2)
+            stage.count(items=len(labels))
+    finally:
+        instrument.disable()
+
+    records = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["stage"] == "detect" and records[0]["items"] == 1000
+    assert records[0]["seconds"] >= 0 and records[0]["peak_bytes"] > 0
+
+
+def test_validity_mask_counts_and_masked_detection():
+    raw = np.array([1.0, np.nan, 0.0, 3.0, np.nan, 0.0, 5.0])
+
+    mask, counts = calcs.validity_mask(raw, keep_zeros=False)
+    assert counts == {"nan": 2, "zero": 2, "invalid": 4}
+    assert np.array_equal(mask, [True, False, False, True, False, False, True])
+
+    cleaned, removed = calcs.clean_data(raw.copy(), keep_zeros=False, in_place=True)
+    assert removed == 4 and np.array_equal(cleaned, [1.0, 3.0, 5.0])
+
+    rng = np.random.default_rng(6)
+    data = 100 + np.cumsum(rng.normal(0, 1, 500))
+    data[rng.integers(0, 500, 25)] = np.nan
+    data[rng.integers(0, 500, 25)] = 0
+    mask, _ = calcs.validity_mask(data)
+
+    labels, upper, _, _ = calcs.calculations(data, 10, 2, mask=mask)
+    compact_labels, compact_upper, _, _ = calcs.calculations(data[mask], 10, 2)
+    assert np.array_equal(labels[mask], compact_labels) and not labels[~mask].any()
+    assert np.array_equal(upper[mask], compact_upper) and np.isnan(upper[~mask]).all()
+
+    kalman_labels, _ = calcs.kalman_filters(data, 2.0, 1, mask=mask)
+    assert np.array_equal(kalman_labels[mask], calcs.kalman_filters(data[mask], 2.0, 1)[0])
+
+    # An all-valid mask runs on the data itself
+    clean = data[mask]
+    assert all(np.array_equal(a, b) for a, b in zip(calcs.calculations(clean, 10, 2, mask=np.ones(len(clean), dtype=bool))[:3],
+                                                     calcs.calculations(clean, 10, 2)[:3]))
+
+
+def test_result_cache_lru_and_disk(tmp_path, monkeypatch):
+    import memo
+
+    data = 100 + np.cumsum(np.random.default_rng(7).normal(0, 1, 1000))
+    cache = memo.ResultCache(max_bytes=3 * 1000 * 8, directory=str(tmp_path), persist_min_items=1000)
+
+    key = cache.key(data, "STD based", lookback=14, multiplier=2.0)
+    assert key == cache.key(data.copy(), "STD based", multiplier=2.0, lookback=14)
+    assert key != cache.key(data, "STD based", lookback=15, multiplier=2.0)
+    assert key != cache.key(data, "Kalman filters", lookback=14, multiplier=2.0)
+
+    # A strided column (like a memory-mapped .npy column) hashes like its contiguous copy, in chunks
+    monkeypatch.setattr(memo, "_HASH_CHUNK", 1024)
+    matrix = np.column_stack([np.arange(1000.0), data])
+    assert memo.fingerprint(matrix[:, 1]) == memo.fingerprint(data)
+    assert memo.fingerprint(matrix[:, 0]) != memo.fingerprint(data)
+    assert cache.get(key) is None
+
+    result = cache.put(key, calcs.calculations(data, 14, 2.0), items=len(data))
+    assert cache.get(key) is result and not result[1].flags.writeable
+
+    # Memory bound: two more results of the same size push the first one out of memory...
+    for lookback in (20, 30):
+        other = cache.key(data, "STD based", lookback=lookback, multiplier=2.0)
+        cache.put(other, calcs.calculations(data, lookback, 2.0))
+    assert cache.nbytes <= cache.max_bytes and len(cache) == 1
+
+    # ...but it was persisted and a new session still finds it
+    restored = memo.ResultCache(directory=str(tmp_path)).get(key)
+    assert restored is not None and restored[3] is True
+    for expected, actual in zip(result[:3], restored[:3]):
+        assert np.array_equal(expected, actual, equal_nan=True)
+
+
+def test_compact_float32_and_packed_labels(tmp_path):
+    import detectors
+    import main
+    import memo
+
+    data = 100 + np.cumsum(np.random.default_rng(8).normal(0, 1, 5000))
+
+    labels, upper, lower, _ = calcs.calculations(data, 14, 2)
+    labels32, upper32, lower32, _ = calcs.calculations(data.astype(np.float32), 14, 2, dtype=np.float32)
+    assert labels.dtype == bool and upper32.dtype == np.float32 and lower32.dtype == np.float32
+    assert np.allclose(upper32, upper, rtol=1e-5)
+    # Only points sitting right on a bound may be labeled differently
+    assert np.count_nonzero(labels32 != labels) <= 2
+
+    kalman_labels, _ = calcs.kalman_filters(data, 2.0, 1)
+    assert kalman_labels.dtype == bool and calcs.batch_kalman_filters(data, 2.0, 1)[0].dtype == bool
+
+    packed, length = calcs.pack_labels(labels)
+    assert packed.nbytes == -(-len(labels) // 8)
+    assert np.array_equal(calcs.unpack_labels(packed, length), labels)
+
+    # Results of the GUI are cached with packed mask and labels, and come back as computed
+    data[[100, 2000]] = [np.nan, 0]
+    for key, params in (("std", {"lookback_period": 14, "std_multiplier": 2.0}), ("kalman", {"outlier_threshold": 2.0, "measurement_noise": 1})):
+        cache = memo.ResultCache(directory=str(tmp_path), persist_min_items=0)
+        mask, result = main.run_detection(data, detectors.get(key), params, False, cache, lambda done, total: None)
+        bounds = sum(bound.nbytes for bound in (result.upper, result.lower) if bound is not None)
+        assert cache.nbytes == bounds + 2 * -(-len(data) // 8)
+        for results in (cache, memo.ResultCache(directory=str(tmp_path))):
+            cached_mask, cached = main.run_detection(data, detectors.get(key), params, False, results, lambda done, total: None)
+            assert results.hits == 1
+            assert np.array_equal(cached_mask, mask) and cached.labels.dtype == bool
+            assert np.array_equal(cached.labels, result.labels)
+
+
+def test_resample_ohlc_cache_and_drill_down(tmp_path, capsys):
+    import pandas as pd
+    import cli
+    import resample
+
+    rng = np.random.default_rng(9)
+    n = 20_000
+    times = 1_700_000_000 + np.cumsum(rng.integers(1, 120, n))
+    prices = 100 + np.cumsum(rng.normal(0, 0.1, n))
+    prices[rng.integers(0, n, 40)] += rng.normal(0, 10, 40)
+
+    frames = resample.TimeframeCache(times, prices)
+    built = frames.build(["1h", "1d", "1w"])
+
+    expected = pd.Series(prices, index=pd.to_datetime(times, unit="s")).resample("1D").ohlc().dropna()
+    assert np.allclose(built["1d"]["close"], expected["close"]) and np.allclose(built["1d"]["high"], expected["high"])
+    # The weekly bars come from the daily ones and match a direct resample of the ticks
+    direct = resample.ohlc(frames.times, frames.prices, "1w")
+    assert all(np.array_equal(direct[field], built["1w"][field]) for field in resample.BAR_FIELDS)
+    assert frames.bars("1d") is built["1d"]
+
+    labels, flagged = resample.drill_down(frames, "1h", lookback_period=14, std_multiplier=3)
+    full, _, _, _ = calcs.calculations(prices, 14, 3)
+    starts, stops = frames.tick_ranges("1h", flagged)
+    inside = np.zeros(n, dtype=bool)
+    for start, stop in zip(starts, stops):
+        inside[start:stop] = True
+    assert len(flagged) > 0 and np.array_equal(labels[inside], full[inside]) and not labels[~inside].any()
+
+    csv_path = tmp_path / "ticks.csv"
+    pd.DataFrame({"Datetime": pd.to_datetime(times, unit="s"), "Close": prices}).to_csv(csv_path, index=False)
+    assert cli.main([str(csv_path), "--timeframe", "1h", "1d", "--output-dir", str(tmp_path), "--jobs", "1"]) == 0
+    daily = pd.read_csv(tmp_path / "ticks_std_1d.csv")
+    assert np.array_equal(daily["time"], built["1d"]["time"]) and np.allclose(daily["price"], built["1d"]["close"])
+
+    # An auto lookback of the drill-down is chosen on the bars for the coarse run and on the ticks for the regions
+    capsys.readouterr()
+    assert cli.main([str(csv_path), "--timeframe", "1h", "--drill-down", "--lookback", "auto", "--output-dir", str(tmp_path), "--jobs", "1"]) == 0
+    tick_lookback = int(calcs.select_lookback(frames.prices)[0][0])
+    coarse_lookback = int(calcs.select_lookback(frames.bars("1h")["close"])[0][0])
+    assert f"(auto lookback_period={tick_lookback}, coarse_lookback={coarse_lookback})" in capsys.readouterr().out
+    expected, _ = resample.drill_down(frames, "1h", tick_lookback, 2.0, coarse_lookback=coarse_lookback)
+    assert np.array_equal(pd.read_csv(tmp_path / "ticks_std_1h.csv")["label"] == 1, expected)
+
+
+def test_rolling_mad_matches_reference_and_backends(monkeypatch):
+    rng = np.random.default_rng(10)
+    data = np.round(100 + np.cumsum(rng.normal(0, 1, 1500)), 1)
+    data[rng.integers(0, 1500, 10)] = np.nan
+
+    for lookback in (1, 4, 15):
+        windows = [data[i - lookback:i] for i in range(lookback, len(data))]
+        medians = np.array([np.median(w) for w in windows])
+        mads = np.array([np.median(np.abs(w - m)) for w, m in zip(windows, medians)])
+
+        # Skiplist kernel (run in Python here) and the numpy fallback give the reference values
+        median, mad = np.empty(len(windows)), np.empty(len(windows))
+        calcs._rolling_median_mad_kernel(data, lookback, median, mad)
+        assert np.array_equal(median, medians, equal_nan=True) and np.array_equal(mad, mads, equal_nan=True)
+
+        monkeypatch.setattr(calcs, "_rolling_median_mad_jit", None)
+        assert np.array_equal(calcs._rolling_median_mad(data, lookback)[1], mads, equal_nan=True)
+        monkeypatch.undo()
+
+    # A spike doesn't widen the following bounds, so a second spike right after it is still caught
+    series = np.full(100, 10.0) + np.tile([0.0, 0.1], 50)
+    series[[50, 52]] = 20
+    labels, upper, _, _ = calcs.rolling_mad(series, 10, 3)
+    assert labels[50] and labels[52] and upper[53] < 11
+
+    batch_labels, _, _, _ = calcs.batch_rolling_mad({"a": series, "b": series[:60]}, 10, 3)
+    assert np.array_equal(batch_labels[:, 0], labels) and np.array_equal(batch_labels[:60, 1], labels[:60])
+
+
+def test_detector_registry_contract():
+    import detectors
+    import parallel
+
+    data = 100 + np.cumsum(np.random.default_rng(11).normal(0, 1, 2000))
+    data[[500, 1500]] += 25
+
+    assert [d.title for d in detectors.available()][:3] == ["STD based", "Kalman filters", "Rolling MAD"]
+    assert detectors.get("STD based") is detectors.get("std")
+
+    for detector in detectors.available():
+        result = detector.run(data)
+        assert isinstance(result, detectors.DetectionResult) and len(result.labels) == len(data)
+        assert result.labels.dtype == bool
+        assert result.boundaries == (result.upper is not None) and result.elapsed >= 0
+        assert result.params == detector.defaults() and result.backend == detector.default_backend
+
+        batch = detector.run_batch(np.column_stack((data, data)))
+        assert batch.labels.dtype == bool and np.array_equal(batch.labels[:, 1], result.labels)
+
+    # Swappable backends give the same labels, also with prices tied to a band
+    std = detectors.get("std")
+    assert np.array_equal(std.run(data, backend="streaming").labels, std.run(data).labels)
+    rounded = np.round(100 + np.cumsum(np.random.default_rng(0).normal(0, 0.05, 2000)), 1)
+    for params in ({"lookback_period": 5, "std_multiplier": 3}, {"lookback_period": 5, "std_multiplier": 2}):
+        assert np.array_equal(std.run(rounded, backend="streaming", **params).labels, std.run(rounded, **params).labels)
+
+    try:
+        detectors.get("kalman").validate({"measurement_noise": -1})
+        assert False, "negative noise accepted"
+    except ValueError as e:
+        assert str(e) == "Noise >= 0, Threshold > 0"
+
+    sweep = parallel.sweep("mad", data, max_workers=2, lookback_period=[10, 20], mad_multiplier=[3.0])
+    assert list(sweep["outliers"]) == [int(np.count_nonzero(calcs.rolling_mad(data, lb, 3.0)[0])) for lb in (10, 20)]
+
+
+class FlakyGroupSource(FakeSource):
+    # Fake provider with grouped requests, failing the first attempt of every request
+    def __init__(self, n_days):
+        super().__init__(n_days)
+        self.groups = []
+        self.attempts = 0
+
+    def fetch_many(self, tickers, interval="1d", period="1y"):
+        self.attempts += 1
+        if self.attempts % 2 == 1:
+            raise ConnectionError("temporary failure")
+        self.groups.append(list(tickers))
+        return {ticker: self.fetch(ticker, interval, period=period) for ticker in tickers if ticker != "NODATA"}
+
+
+class BrokenGroupSource(FakeSource):
+    # Grouped requests always fail, one of the tickers also fails on its own
+    def fetch_many(self, tickers, interval="1d", period="1y"):
+        raise ConnectionError("group request rejected")
+
+    def fetch(self, ticker, interval="1d", start=None, period="1y"):
+        if ticker == "BAD":
+            raise ValueError("unknown ticker")
+        return super().fetch(ticker, interval, start, period)
+
+
+def test_download_many_groups_retries_and_rate_limits(tmp_path, monkeypatch):
+    import sys
+    import types
+    import pandas as pd
+    import datasource
+
+    source = FlakyGroupSource(10)
+    cache = datasource.SeriesCache(str(tmp_path), ttl=0)
+    datasource.fetch_prices("OLD", source=source, cache=cache)
+    source.available = 10
+    source.requests.clear()
+
+    tickers = ["OLD"] + [f"T{i}" for i in range(7)] + ["NODATA", "t0"]
+    series, errors = datasource.download_many(tickers, source=source, cache=cache, group_size=4, max_workers=3, rate=1000, backoff=0)
+
+    assert list(series) == ["OLD"] + [f"T{i}" for i in range(7)] and list(errors) == ["NODATA"]
+    assert sorted(len(group) for group in source.groups) == [4, 4]
+    # The stale ticker only fetched its tail, the new ones came from the cache afterwards
+    assert ("OLD", int(source.times[4])) in source.requests
+    assert np.array_equal(series["OLD"][1], source.prices)
+    assert np.array_equal(cache.get("T3", "1d")[1], source.prices)
+
+    # A group failing after its retries is fetched again ticker by ticker
+    series, errors = datasource.download_many(["A", "BAD", "C", "D"], source=BrokenGroupSource(10), group_size=4, retries=1, rate=1000, backoff=0)
+    assert list(series) == ["A", "C", "D"] and list(errors) == ["BAD"] and isinstance(errors["BAD"], ValueError)
+
+    # All the Yahoo requests of one call share a session, closed at the end
+    class Session:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def download(tickers, session=None, **options):
+        sessions.append(session)
+        index = pd.date_range("2024-01-01", periods=3, freq="D")
+        if isinstance(tickers, list):
+            return pd.DataFrame({(ticker, "Close"): [1.0, 2.0, 3.0] for ticker in tickers}, index=index)
+        return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+
+    sessions = []
+    session = Session()
+    monkeypatch.setitem(sys.modules, "yfinance", types.SimpleNamespace(download=download))
+    monkeypatch.setattr(datasource, "new_session", lambda: session)
+    series, errors = datasource.download_many(["AAA", "BBB", "CCC"], group_size=2, rate=1000)
+    assert sorted(series) == ["AAA", "BBB", "CCC"] and not errors
+    assert len(sessions) == 2 and all(used is session for used in sessions) and session.closed
+
+    now = [0.0]
+    limiter = datasource.RateLimiter(rate=2, burst=2, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+    for _ in range(6):
+        limiter.acquire()
+    assert abs(now[0] - 2.0) < 1e-9
+
+
+def test_auto_lookback_per_series_and_regime(capsys):
+    import detectors
+
+    rng = np.random.default_rng(12)
+    walk = 1000 + np.cumsum(rng.normal(0, 1, 20_000))
+    noise = 1000 + rng.normal(0, 1, 20_000)
+
+    # A wandering level wants a short window, pure noise around a fixed level a long one
+    assert calcs.select_lookback(walk)[0][0] == min(calcs.AUTO_LOOKBACKS)
+    assert calcs.select_lookback(noise)[0][0] == max(calcs.AUTO_LOOKBACKS)
+
+    chosen = int(calcs.select_lookback(walk)[0][0])
+    auto = calcs.calculations(walk, "auto", 2)
+    fixed = calcs.calculations(walk, chosen, 2)
+    assert all(np.array_equal(a, b) for a, b in zip(auto[:3], fixed[:3]))
+
+    both = np.concatenate((noise, walk - walk[0] + noise[-1]))
+    lookbacks, edges = calcs.select_lookback(both, regime_length=20_000)
+    assert list(lookbacks) == [max(calcs.AUTO_LOOKBACKS), min(calcs.AUTO_LOOKBACKS)] and list(edges) == [0, 20_000]
+    labels, upper, _, _ = calcs.calculations(both, "auto", 2, regime_length=20_000)
+    assert np.array_equal(labels[20_001:], calcs.calculations(both, 5, 2)[0][20_001:])
+    assert np.array_equal(upper[:20_000], calcs.calculations(both, 200, 2)[1][:20_000])
+
+    batch_labels, _, _, _ = calcs.batch_calculations({"walk": walk, "noise": noise[:15_000]}, "auto", 2)
+    assert np.array_equal(batch_labels[:, 0], fixed[0])
+    assert np.array_equal(batch_labels[:15_000, 1], calcs.calculations(noise[:15_000], 200, 2)[0])
+
+    assert detectors.get("std").validate({"lookback_period": "Auto"})["lookback_period"] == "auto"
+
+    # The registry chooses the window once for every backend and reports it in the result
+    std = detectors.get("std")
+    mask = np.ones(len(walk), dtype=bool)
+    mask[::50] = False
+    result = std.run(walk, mask=mask, lookback_period="auto")
+    assert result.params["lookback_period"] == int(calcs.select_lookback(walk[mask])[0][0])
+    assert np.array_equal(result.labels, calcs.calculations(walk, "auto", 2, mask=mask)[0])
+    assert np.array_equal(std.run(walk, mask=mask, backend="streaming", lookback_period="auto").labels, result.labels)
+    assert capsys.readouterr().out == ""
+
+    # Regimes shorter than the first lookback keep the bounds of the later regimes
+    lookbacks, edges = calcs.select_lookback(noise[:2000], regime_length=100)
+    assert lookbacks[0] > edges[1]
+    _, upper, _, _ = calcs.calculations(noise[:2000], "auto", 2, regime_length=100)
+    for start, stop, lookback in zip(edges[1:], np.append(edges[2:], 2000), lookbacks[1:]):
+        first = max(start, lookback)
+        assert np.isnan(upper[start:first]).all()
+        assert np.array_equal(upper[first:stop], calcs.calculations(noise[:2000], lookback, 2)[1][first:stop])
+
+
+def test_chunk_parallel_detection_matches_serial(monkeypatch, tmp_path):
+    import parallel
+
+    monkeypatch.setattr(parallel, "MIN_CHUNK", 1000)
+    rng = np.random.default_rng(13)
+    data = 1000 + np.cumsum(rng.normal(0, 1, 30_000))
+    # Runs of outliers straddling the chunk seams
+    edges = parallel.chunk_edges(len(data), 40, 6)
+    for edge in edges[1:-1]:
+        data[edge - 2:edge + 3] += 100
+    data[rng.integers(0, len(data), 30)] = np.nan
+
+    serial = calcs.calculations(data, 40, 2)
+    result = parallel.parallel_calculations(data, 40, 2, max_workers=2, chunks=6)
+    assert len(edges) == 7
+    assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(serial[:3], result[:3]))
+
+    # A memory-mapped .npy column is read by the workers straight from the file
+    np.save(tmp_path / "series.npy", data)
+    mapped = np.load(tmp_path / "series.npy", mmap_mode="r")
+    assert parallel._share_or_map(mapped)[0] is None
+    assert np.array_equal(parallel.parallel_calculations(mapped, 40, 2, max_workers=2, chunks=6)[0], serial[0])
+
+
+def test_event_store_extract_and_query(tmp_path):
+    import events
+    import cli
+
+    data = np.array([10.0, 10, 30, 10, -20, 10])
+    labels = np.array([0, 0, 1, 0, 1, 0], dtype=bool)
+    upper = np.full(6, 20.0)
+    lower = np.zeros(6)
+    times = np.arange(6) * 86400 + 1_700_000_000
+
+    found = events.extract_events(labels, data, upper, lower, times)
+    assert found["position"].tolist() == [2, 4]
+    assert found["ts"].tolist() == [times[2], times[4]]
+    assert np.allclose(found["score"], [2.0, -3.0])
+    assert np.isnan(events.extract_events(labels, data)["score"]).all()
+
+    with events.EventStore(str(tmp_path / "events.db")) as store:
+        store.add("AAA", found, detector="std")
+        store.add("BBB", events.extract_events(labels, data, times=times - 86400), detector="std")
+        store.add("AAA", found, detector="std")  # a re-run replaces the earlier events
+        assert store.count() == 4 and store.count("AAA") == 2
+
+        recent = store.query(["AAA", "BBB", "CCC"], start=times[3], end=times[5])
+        assert recent["series_id"].tolist() == ["AAA", "BBB"]
+        assert recent["position"].tolist() == [4, 4]
+        assert store.query(detector="kalman")["ts"].size == 0
+
+    # The CLI stores the outliers of every input under the file stem
+    series = 100 + np.sin(np.arange(500) / 5)
+    series[[100, 300]] += 50
+    np.save(tmp_path / "spiky.npy", series)
+    assert cli.main([str(tmp_path / "spiky.npy"), "--events-db", str(tmp_path / "cli.db"),
+                     "--output-dir", str(tmp_path), "--jobs", "1"]) == 0
+    with events.EventStore(str(tmp_path / "cli.db")) as store:
+        stored = store.query(["spiky"])
+        assert stored["position"].tolist() == np.flatnonzero(calcs.calculations(series, 14, 2)[0]).tolist()
+        assert (np.abs(stored["score"]) >= 1).all()
+
+
+def test_fast_startup_defers_heavy_imports():
+    import io
+    import subprocess
+    import sys
+    from PyQt5 import uic
+    import startup
+
+    # The precompiled interface matches warningSE.ui (generator comments aside)
+    compiled = io.StringIO()
+    with open("warningSE.ui") as f:
+        uic.compileUi(f, compiled)
+    with open("ui_warningSE.py") as f:
+        generated = f.read()
+    strip = lambda text: [line for line in text.splitlines() if line.strip() and not line.startswith("#")]
+    assert strip(compiled.getvalue()) == strip(generated)
+
+    report = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True, check=True).stderr
+    imports = startup.parse_importtime(report)
+    assert ("main", imports[-1][1], 0) == imports[-1]
+    assert not {name.split(".")[0] for name, _, _ in imports} & set(startup.DEFERRED_MODULES)
+
+    # The window comes up and the program exits on its own
+    walls, _ = startup.measure(startup.command_of(), repeat=1)
+    assert 0 < walls[0] < 30
+
+
+def test_monitor_replay_socket_tail_and_sinks(tmp_path):
+    import asyncio
+    import pytest
+    import monitor
+    import streaming
+
+    rng = np.random.default_rng(17)
+    series = {name: 100 + np.cumsum(rng.normal(0, 1, 3000)) for name in ("AAA", "BBB")}
+    series["AAA"][[500, 1500]] += 40
+
+    # Replays: the alerts of every symbol are the streaming detector's labels
+    alerts = []
+    std = monitor.Monitor("std", {"lookback_period": 20, "std_multiplier": 2.5}, [monitor.CallbackSink(alerts.append)])
+    report = asyncio.run(std.run([monitor.replay(prices, name, rate=0) for name, prices in series.items()]))
+    assert report["ticks"] == 6000 and report["symbols"] == 2 and report["dropped"] == 0
+    for name, prices in series.items():
+        expected = np.flatnonzero(streaming.RollingStdDetector(20, 2.5).update_many(prices))
+        assert [alert.time for alert in alerts if alert.symbol == name] == expected.tolist()
+    assert all(alert.lower < alert.upper and alert.latency >= 0 for alert in alerts)
+
+    # A slow sink drops its oldest alerts instead of slowing the detection down
+    async def slow(alert):
+        await asyncio.sleep(0.01)
+    slow_monitor = monitor.Monitor("std", {"lookback_period": 5, "std_multiplier": 0.5}, [monitor.CallbackSink(slow)],
+                                   sink_queue_size=2, flush_timeout=0.1)
+    assert asyncio.run(slow_monitor.run([monitor.replay(series["BBB"], "BBB", rate=0)]))["dropped"] > 0
+
+    # TCP feed and tailed file with "symbol,price,time" lines, Kalman detector
+    lines = "".join(f"AAA,{float(price)!r},{i}\n" for i, price in enumerate(series["AAA"]))
+    expected = np.flatnonzero(streaming.KalmanDetector(3, 1.0).update_many(series["AAA"])).tolist()
+
+    async def feed():
+        async def serve(reader, writer):
+            for start in range(0, len(lines), 5000):
+                writer.write(lines[start:start + 5000].encode())
+                await writer.drain()
+            writer.close()
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        found = []
+        kalman = monitor.Monitor("kalman", {"outlier_threshold": 3}, [monitor.CallbackSink(found.append)])
+        async with server:
+            await kalman.run([monitor.connect("127.0.0.1", port)])
+        return [int(alert.time) for alert in found]
+    assert asyncio.run(feed()) == expected
+
+    (tmp_path / "ticks.csv").write_text(lines)
+    found = []
+    kalman = monitor.Monitor("kalman", {"outlier_threshold": 3}, [monitor.CallbackSink(found.append)])
+    report = asyncio.run(kalman.run([monitor.tail(str(tmp_path / "ticks.csv"), from_start=True)], duration=0.5))
+    assert report["ticks"] == 3000 and [int(alert.time) for alert in found] == expected
+
+    # Detectors without a streaming implementation are refused
+    with pytest.raises(ValueError):
+        monitor.Monitor("mad")
+
+
+def test_lockstep_kalman_matches_single_series(monkeypatch):
+    rng = np.random.default_rng(23)
+    series = {f"S{k}": 100 + np.cumsum(rng.normal(0, 1, n)) for k, n in enumerate(rng.integers(1, 400, 40))}
+    for values in series.values():
+        values[rng.integers(0, len(values), 3)] += 15
+    matrix, _, lengths = calcs.stack_series(series)
+    # Gaps inside the series are skipped like the invalid points of kalman_filters(mask=...)
+    mask = rng.random(matrix.shape) > 0.1
+
+    expected = np.zeros(matrix.shape, dtype=np.uint8)
+    for k, values in enumerate(series.values()):
+        expected[:lengths[k], k], _ = calcs.kalman_filters(values, 3.0, 2.0, mask=mask[:lengths[k], k])
+
+    compiled, _ = calcs.batch_kalman_filters(series, 3.0, 2.0, mask=mask)
+    assert np.array_equal(compiled, expected)
+
+    # NumPy lockstep steps, and the series one by one below _LOCKSTEP_MIN_SERIES
+    monkeypatch.setattr(calcs, "_kalman_batch_jit", None)
+    for min_series in (1, 1000):
+        monkeypatch.setattr(calcs, "_LOCKSTEP_MIN_SERIES", min_series)
+        labels, boundaries = calcs.batch_kalman_filters(series, 3.0, 2.0, mask=mask)
+        assert np.array_equal(labels, expected) and boundaries is False
+
+
+def test_drill_down_checks_every_bar_of_a_run():
+    import resample
+
+    # Three daily closes in a row are out of band, all three days are re-checked tick by tick
+    rng = np.random.default_rng(5)
+    times = np.arange(40 * 1440) * 60
+    prices = 100 + np.cumsum(rng.normal(0, 0.01, len(times)))
+    prices[19 * 1440:22 * 1440] -= 30
+
+    labels, flagged = resample.drill_down(resample.TimeframeCache(times, prices), "1d", lookback_period=14, std_multiplier=2)
+    full = calcs.calculations(prices, 14, 2)[0]
+    assert flagged.tolist() == [19, 20, 21]
+    for day in (19, 20, 21):
+        day_ticks = slice(day * 1440, (day + 1) * 1440)
+        assert labels[day_ticks].any()
+        assert np.array_equal(labels[day_ticks], full[day_ticks])
+
+
+def test_rolling_passes_bound_all_series_together(monkeypatch):
+    rng = np.random.default_rng(29)
+    data = 100 + np.cumsum(rng.normal(0, 1, (5000, 8)), axis=0)
+    expected = calcs._rolling_mean_std(data, 14, 14, len(data))
+
+    # A pass holds about _PASS_SIZE points over all the columns, not per column
+    monkeypatch.setattr(calcs, "_PASS_SIZE", 4096)
+    done = []
+    mean, std = calcs._rolling_mean_std(data, 14, 14, len(data), progress=lambda d, total: done.append(d))
+    assert max(np.diff([0] + done)) * data.shape[1] <= 4096
+    assert np.array_equal(mean, expected[0]) and np.array_equal(std, expected[1])
+
+
+def test_progress_passes_cancel_and_task_worker(monkeypatch):
+    import pytest
+    import main
+
+    monkeypatch.setattr(calcs, "_PASS_SIZE", 4096)
+    rng = np.random.default_rng(31)
+    data = 100 + np.cumsum(rng.normal(0, 1, 50_000))
+    data[rng.integers(0, len(data), 100)] += 20
+    assert len(data) > calcs._PASS_SIZE
+
+    # Runs in passes give the labels of a run without progress, and report up to the total
+    for run in (lambda **kw: calcs.calculations(data, 14, 2, **kw)[:3],
+                lambda **kw: calcs.kalman_filters(data, 3.0, 1, **kw)[:1]):
+        reports = []
+        with_progress = run(progress=lambda done, total: reports.append((done, total)))
+        assert all(np.array_equal(a, b) for a, b in zip(with_progress, run()))
+        assert len(reports) > 1 and reports[-1][0] == reports[-1][1]
+        assert [done for done, _ in reports] == sorted(done for done, _ in reports)
+
+    # Raising from the callback stops the run
+    def cancel_after(passes):
+        calls = []
+        def progress(done, total):
+            calls.append(done)
+            if len(calls) > passes:
+                raise main.Cancelled()
+        return progress
+    with pytest.raises(main.Cancelled):
+        calcs.calculations(data, 14, 2, progress=cancel_after(2))
+    with pytest.raises(main.Cancelled):
+        calcs.kalman_filters(data, 3.0, 1, progress=cancel_after(2))
+
+    # TaskWorker: finished with the result, cancelled from the progress report or after the call
+    def collect(worker):
+        seen = {"finished": [], "cancelled": [], "failed": [], "progress": []}
+        worker.finished.connect(seen["finished"].append)
+        worker.cancelled.connect(lambda: seen["cancelled"].append(True))
+        worker.failed.connect(seen["failed"].append)
+        worker.progress.connect(seen["progress"].append)
+        return seen
+
+    worker = main.TaskWorker(calcs.kalman_filters, data, 3.0, 1)
+    seen = collect(worker)
+    worker.run()
+    assert np.array_equal(seen["finished"][0][0], calcs.kalman_filters(data, 3.0, 1)[0])
+    assert seen["progress"][-1] == 100 and not seen["cancelled"]
+
+    worker = main.TaskWorker(calcs.calculations, data, 14, 2)
+    seen = collect(worker)
+    worker.progress.connect(lambda percent: worker.cancel())
+    worker.run()
+    assert seen["cancelled"] == [True] and not seen["finished"] and len(seen["progress"]) == 1
+
+    worker = main.TaskWorker(lambda progress: worker.cancel() or "done")
+    seen = collect(worker)
+    worker.run()
+    assert seen["cancelled"] == [True] and not seen["finished"]
+
+    worker = main.TaskWorker(lambda progress: 1 / 0)
+    seen = collect(worker)
+    worker.run()
+    assert seen["failed"] and not seen["finished"]
+
+
+def test_rolling_mad_reports_progress_in_passes(monkeypatch):
+    import pytest
+
+    monkeypatch.setattr(calcs, "_PASS_SIZE", 2048)
+    rng = np.random.default_rng(37)
+    data = 100 + np.cumsum(rng.normal(0, 1, 20_000))
+    data[rng.integers(0, len(data), 50)] += 20
+    expected = calcs.rolling_mad(data, 30, 3)
+
+    for kernel in (calcs._rolling_median_mad_jit, None):
+        monkeypatch.setattr(calcs, "_rolling_median_mad_jit", kernel)
+        reports = []
+        result = calcs.rolling_mad(data, 30, 3, progress=lambda done, total: reports.append(done))
+        assert all(np.array_equal(a, b) for a, b in zip(result[:3], expected[:3]))
+        assert len(reports) > 5
+
+    def cancel(done, total):
+        if done > 4096:
+            raise RuntimeError("cancelled")
+    with pytest.raises(RuntimeError):
+        calcs.rolling_mad(data, 30, 3, progress=cancel)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'warningSE.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_Dialog(object):
+    def setupUi(self, Dialog):
+        Dialog.setObjectName("Dialog")
+        Dialog.resize(880, 630)
+        Dialog.setLayoutDirection(QtCore.Qt.LeftToRight)
+        Dialog.setLocale(QtCore.QLocale(QtCore.QLocale.English, QtCore.QLocale.Germany))
+        self.verticalLayout = QtWidgets.QVBoxLayout(Dialog)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem)
+        self.label = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        self.label.setFont(font)
+        self.label.setObjectName("label")
+        self.horizontalLayout.addWidget(self.label)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem1)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.label_3 = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_3.setFont(font)
+        self.label_3.setObjectName("label_3")
+        self.horizontalLayout_7.addWidget(self.label_3)
+        self.verticalLayout.addLayout(self.horizontalLayout_7)
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.data_collection = QtWidgets.QLineEdit(Dialog)
+        self.data_collection.setObjectName("data_collection")
+        self.horizontalLayout_3.addWidget(self.data_collection)
+        self.btn_generate_values = QtWidgets.QPushButton(Dialog)
+        self.btn_generate_values.setObjectName("btn_generate_values")
+        self.horizontalLayout_3.addWidget(self.btn_generate_values)
+        self.verticalLayout.addLayout(self.horizontalLayout_3)
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.label_5 = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_5.setFont(font)
+        self.label_5.setObjectName("label_5")
+        self.horizontalLayout_8.addWidget(self.label_5)
+        self.verticalLayout.addLayout(self.horizontalLayout_8)
+        self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_5.setObjectName("horizontalLayout_5")
+        self.label_4 = QtWidgets.QLabel(Dialog)
+        self.label_4.setText("")
+        self.label_4.setObjectName("label_4")
+        self.horizontalLayout_5.addWidget(self.label_4)
+        self.csv_txt_input = QtWidgets.QLineEdit(Dialog)
+        self.csv_txt_input.setEnabled(False)
+        self.csv_txt_input.setDragEnabled(False)
+        self.csv_txt_input.setReadOnly(False)
+        self.csv_txt_input.setObjectName("csv_txt_input")
+        self.horizontalLayout_5.addWidget(self.csv_txt_input)
+        self.csv_button_input = QtWidgets.QPushButton(Dialog)
+        self.csv_button_input.setObjectName("csv_button_input")
+        self.horizontalLayout_5.addWidget(self.csv_button_input)
+        self.verticalLayout.addLayout(self.horizontalLayout_5)
+        self.horizontalLayout_9 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_9.setObjectName("horizontalLayout_9")
+        self.label_6 = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_6.setFont(font)
+        self.label_6.setObjectName("label_6")
+        self.horizontalLayout_9.addWidget(self.label_6)
+        self.loockback_txtField = QtWidgets.QLineEdit(Dialog)
+        self.loockback_txtField.setPlaceholderText("")
+        self.loockback_txtField.setObjectName("loockback_txtField")
+        self.horizontalLayout_9.addWidget(self.loockback_txtField)
+        self.label_7 = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_7.setFont(font)
+        self.label_7.setObjectName("label_7")
+        self.horizontalLayout_9.addWidget(self.label_7)
+        self.multiplier_txtField = QtWidgets.QLineEdit(Dialog)
+        self.multiplier_txtField.setObjectName("multiplier_txtField")
+        self.horizontalLayout_9.addWidget(self.multiplier_txtField)
+        self.comboBox = QtWidgets.QComboBox(Dialog)
+        self.comboBox.setObjectName("comboBox")
+        self.horizontalLayout_9.addWidget(self.comboBox)
+        self.label_8 = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setPointSize(10)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_8.setFont(font)
+        self.label_8.setObjectName("label_8")
+        self.horizontalLayout_9.addWidget(self.label_8)
+        self.zero_checkbox = QtWidgets.QCheckBox(Dialog)
+        self.zero_checkbox.setText("")
+        self.zero_checkbox.setChecked(True)
+        self.zero_checkbox.setObjectName("zero_checkbox")
+        self.horizontalLayout_9.addWidget(self.zero_checkbox)
+        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_9.addItem(spacerItem2)
+        spacerItem3 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_9.addItem(spacerItem3)
+        self.verticalLayout.addLayout(self.horizontalLayout_9)
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_2.addItem(spacerItem4)
+        self.label_2 = QtWidgets.QLabel(Dialog)
+        font = QtGui.QFont()
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_2.setFont(font)
+        self.label_2.setObjectName("label_2")
+        self.horizontalLayout_2.addWidget(self.label_2)
+        spacerItem5 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_2.addItem(spacerItem5)
+        self.verticalLayout.addLayout(self.horizontalLayout_2)
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.plot_view_result = QtWidgets.QGraphicsView(Dialog)
+        self.plot_view_result.setObjectName("plot_view_result")
+        self.horizontalLayout_6.addWidget(self.plot_view_result)
+        self.verticalLayout.addLayout(self.horizontalLayout_6)
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName("horizontalLayout_4")
+        self.progress_bar = QtWidgets.QProgressBar(Dialog)
+        self.progress_bar.setProperty("value", 0)
+        self.progress_bar.setObjectName("progress_bar")
+        self.horizontalLayout_4.addWidget(self.progress_bar)
+        self.btn_cancel = QtWidgets.QPushButton(Dialog)
+        self.btn_cancel.setObjectName("btn_cancel")
+        self.horizontalLayout_4.addWidget(self.btn_cancel)
+        self.btn_export = QtWidgets.QPushButton(Dialog)
+        self.btn_export.setObjectName("btn_export")
+        self.horizontalLayout_4.addWidget(self.btn_export)
+        self.btn_execute = QtWidgets.QPushButton(Dialog)
+        self.btn_execute.setObjectName("btn_execute")
+        self.horizontalLayout_4.addWidget(self.btn_execute)
+        self.verticalLayout.addLayout(self.horizontalLayout_4)
+
+        self.retranslateUi(Dialog)
+        QtCore.QMetaObject.connectSlotsByName(Dialog)
+
+    def retranslateUi(self, Dialog):
+        _translate = QtCore.QCoreApplication.translate
+        Dialog.setWindowTitle(_translate("Dialog", "Dialog"))
+        self.label.setText(_translate("Dialog", "WARNING SYSTEM - SOFTWARE ENGINERING"))
+        self.label_3.setText(_translate("Dialog", "Option 1: Download Market Data"))
+        self.data_collection.setPlaceholderText(_translate("Dialog", "Type a symbol to download data(e.g., AAPL, TSLA, MSFT, etc...)"))
+        self.btn_generate_values.setText(_translate("Dialog", "Download data"))
+        self.label_5.setText(_translate("Dialog", "Option 2: Import Local File"))
+        self.csv_txt_input.setPlaceholderText(_translate("Dialog", "Please select a npy/xlsx/csv file to check outlayers of the graph"))
+        self.csv_button_input.setText(_translate("Dialog", "Select file"))
+        self.label_6.setText(_translate("Dialog", "Lookback/Threshold: "))
+        self.label_7.setText(_translate("Dialog", "Sensitiviy:"))
+        self.multiplier_txtField.setPlaceholderText(_translate("Dialog", "e.g. 1, 1.5, 2, 2.5, etc..."))
+        self.label_8.setText(_translate("Dialog", "Do you want to keep values ​​at zero?"))
+        self.label_2.setText(_translate("Dialog", "PLOT RESULT"))
+        self.btn_cancel.setText(_translate("Dialog", "Cancel"))
+        self.btn_export.setText(_translate("Dialog", "Export plot"))
+        self.btn_execute.setText(_translate("Dialog", "Execute script"))